@@ -13,6 +13,15 @@ from api.routes.credentials import router as credentials_router
 from api.routes.recommendations import router as recommendations_router
 from api.routes.metrics import router as metrics_router
 from streaming.websocket_manager import websocket_manager
+from config.database import get_database
+from engines.opportunity_index import OpportunityIndex
+from engines.classification_runner import IncrementalClassificationScheduler
+from ml.prediction_engine import MLPredictionEngine
+from ml.prediction_cache import prediction_cache
+from orchestration.migration_runner import migration_runner
+from services.deduplication.hash_manager import hash_manager
+from services.cloud.client_cache import client_cache
+import asyncio
 
 app = FastAPI(title="CloudFlow Intelligence Platform", version="1.0.0")
 
@@ -29,17 +38,59 @@ app.middleware("http")(rate_limit_middleware)
 
 mongodb_client = None
 redis_client = None
+prediction_engine = None
+classification_scheduler = None
+opportunity_index = None
 
 @app.on_event("startup")
 async def startup_event():
-    global mongodb_client, redis_client
+    global mongodb_client, redis_client, prediction_engine, classification_scheduler, opportunity_index
     mongodb_client = MongoClient(settings.mongodb_url)
     redis_client = Redis.from_url(settings.redis_url, decode_responses=True)
+    prediction_cache.attach_redis(redis_client)
+    prediction_cache.start_listener()
+    opportunity_index = OpportunityIndex(get_database())
+    try:
+        opportunity_index.ensure_indexes()
+    except Exception as e:
+        logging.warning(f"Could not create opportunity indexes: {str(e)}")
+    try:
+        migration_runner.ensure_indexes(get_database())
+    except Exception as e:
+        logging.warning(f"Could not create migration job indexes: {str(e)}")
+    try:
+        hash_manager.chunk_store("system", db=get_database()).ensure_indexes()
+    except Exception as e:
+        logging.warning(f"Could not create dedup manifest indexes: {str(e)}")
+    prediction_engine = MLPredictionEngine(get_database(), settings.ml_model_path)
+    prediction_engine.warm_up()
+    prediction_engine.start_watcher()
+    if prediction_engine.feature_store:
+        try:
+            prediction_engine.feature_store.ensure_indexes()
+        except Exception as e:
+            logging.warning(f"Could not create feature store indexes: {str(e)}")
+        prediction_engine.feature_store.start()
+    migration_runner.start(asyncio.get_running_loop())
+    classification_scheduler = IncrementalClassificationScheduler(get_database())
+    classification_scheduler.start()
+    opportunity_index.start()
     logging.info("Database connections established")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    global mongodb_client, redis_client
+    global mongodb_client, redis_client, prediction_engine, classification_scheduler, opportunity_index
+    if prediction_engine:
+        prediction_engine.stop_watcher()
+        if prediction_engine.feature_store:
+            prediction_engine.feature_store.stop()
+    if classification_scheduler:
+        classification_scheduler.stop()
+    if opportunity_index:
+        opportunity_index.stop()
+    migration_runner.stop()
+    prediction_cache.stop_listener()
+    await client_cache.close()
     if mongodb_client:
         mongodb_client.close()
     if redis_client:
@@ -65,6 +116,9 @@ async def health_check():
 def get_redis():
     return redis_client
 
+def get_prediction_engine():
+    return prediction_engine
+
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await websocket_manager.connect(websocket, client_id)
@@ -3,6 +3,7 @@ from typing import Dict, List
 from datetime import datetime, timedelta
 from config.database import get_database
 from middleware.auth_middleware import get_current_user
+from services.compression.pipeline import billable_bytes
 
 router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
 
@@ -33,7 +34,7 @@ async def get_user_cost_breakdown(current_user: dict = Depends(get_current_user)
     for obj in user_objects:
         location = obj.get("current_location", "on-premise")
         tier = obj.get("current_tier", "warm")
-        size_gb = obj.get("size_bytes", 0) / (1024**3)
+        size_gb = billable_bytes(obj) / (1024**3)
         cost_per_gb = cost_matrix.get(location, {}).get(tier, 0.020)
         obj_cost = size_gb * cost_per_gb
         total_cost += obj_cost
@@ -4,6 +4,10 @@ from datetime import datetime
 from bson import ObjectId
 from config.database import get_database
 from middleware.auth_middleware import get_current_user
+from engines.classification_engine import DataClassificationEngine
+from ml.feature_store import FeatureStore
+from ml.prediction_cache import prediction_cache
+from services.deduplication.hash_manager import hash_manager
 
 router = APIRouter(prefix="/api/v1/data", tags=["data"])
 
@@ -36,9 +40,14 @@ async def get_user_data_object(object_id: str, current_user: dict = Depends(get_
 @router.delete("/{object_id}")
 async def delete_user_data_object(object_id: str, current_user: dict = Depends(get_current_user)):
     collection = get_data_collection()
-    result = collection.delete_one({"_id": ObjectId(object_id), "user_id": current_user["sub"]})
-    if result.deleted_count == 0:
+    deleted = collection.find_one_and_delete({"_id": ObjectId(object_id), "user_id": current_user["sub"]}, {"dedup": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Data object not found")
+    if deleted.get("dedup"):
+        hash_manager.chunk_store(current_user["sub"]).release(object_id)
+    get_database()[DataClassificationEngine.OPPORTUNITIES_COLLECTION].delete_one({"_id": ObjectId(object_id)})
+    FeatureStore(get_database()).evict([object_id])
+    prediction_cache.invalidate(object_id)
     return {"status": "deleted", "object_id": object_id}
 
 @router.post("/{object_id}/access")
@@ -51,6 +60,8 @@ async def log_user_access(object_id: str, access_type: str, latency_ms: float, l
     access_log = {"data_object_id": object_id, "user_id": current_user["sub"], "access_type": access_type, "latency_ms": latency_ms, "location": location, "timestamp": datetime.utcnow()}
     logs_collection.insert_one(access_log)
     collection.update_one({"_id": ObjectId(object_id)}, {"$inc": {"access_count": 1}, "$set": {"last_accessed": datetime.utcnow()}})
+    FeatureStore(get_database()).mark_stale([object_id])
+    prediction_cache.invalidate(object_id)
     return {"status": "logged", "object_id": object_id}
 
 @router.get("/{object_id}/history")
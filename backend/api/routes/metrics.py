@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
 from middleware.auth_middleware import get_current_user
 from services.metrics.performance_tracker import performance_tracker
+from ml.prediction_cache import prediction_cache
 
 router = APIRouter(prefix="/api/v1/metrics", tags=["metrics"])
 
@@ -21,3 +22,7 @@ async def get_latency_metrics(time_range: int = 60, current_user: dict = Depends
     avg_latency = await performance_tracker.get_average_latency(time_range)
     percentiles = await performance_tracker.get_latency_percentiles(time_range)
     return {"average": avg_latency, "percentiles": percentiles}
+
+@router.get("/prediction-cache")
+async def get_prediction_cache_metrics(current_user: dict = Depends(get_current_user)):
+    return prediction_cache.stats()
@@ -3,7 +3,9 @@ from typing import List
 from datetime import datetime, timedelta
 from bson import ObjectId
 from config.database import get_database
-from middleware.auth_middleware import get_current_user
+from middleware.auth_middleware import get_current_user, require_admin
+from engines.opportunity_index import OpportunityIndex
+from services.compression.pipeline import billable_bytes
 
 router = APIRouter(prefix="/api/v1/recommendations", tags=["recommendations"])
 
@@ -36,12 +38,24 @@ async def get_user_recommendations(current_user: dict = Depends(get_current_user
         if access_count > 100 and current_tier == "cold":
             recommendations.append({"object_id": str(obj["_id"]), "object_name": obj["name"], "action": "tier_upgrade", "current_tier": "cold", "recommended_tier": "hot", "reason": f"High access frequency ({access_count} accesses)", "savings_per_month": 0, "priority": "high"})
         if current_location == "on-premise" and obj["size_bytes"] > 100000000:
-            aws_savings = calculate_cost_savings(obj["size_bytes"], "on-premise", current_tier, "aws", current_tier)
+            aws_savings = calculate_cost_savings(billable_bytes(obj), "on-premise", current_tier, "aws", current_tier)
             if aws_savings > 5:
                 recommendations.append({"object_id": str(obj["_id"]), "object_name": obj["name"], "action": "location_change", "current_location": "on-premise", "recommended_location": "aws", "reason": "High cost on-premise for large file", "savings_per_month": aws_savings, "priority": "high"})
     recommendations.sort(key=lambda x: x.get("savings_per_month", 0), reverse=True)
     return {"recommendations": recommendations[:10], "total_potential_savings": round(sum(r.get("savings_per_month", 0) for r in recommendations), 2), "count": len(recommendations)}
 
+@router.get("/opportunities")
+async def get_optimization_opportunities(limit: int = 20, current_user: dict = Depends(get_current_user)):
+    return OpportunityIndex(get_database()).top(limit, user_id=current_user["sub"])
+
+@router.post("/opportunities/rebuild")
+def rebuild_optimization_opportunities(current_user: dict = Depends(require_admin)):
+    return OpportunityIndex(get_database()).rebuild()
+
+@router.get("/opportunities/consistency")
+def check_optimization_opportunities(current_user: dict = Depends(require_admin)):
+    return OpportunityIndex(get_database()).check_consistency()
+
 @router.post("/simulate-access")
 async def simulate_user_access_patterns(current_user: dict = Depends(get_current_user)):
     import random
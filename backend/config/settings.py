@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     mongodb_url: str
@@ -26,6 +26,11 @@ class Settings(BaseSettings):
     cors_origins: str = "http://localhost:3000"
     ml_model_path: str = "./models"
     ml_training_interval: int = 21600
+    ml_model_watch_interval: int = 30
+    prediction_cache_enabled: bool = True
+    prediction_cache_size: int = 10000
+    prediction_cache_ttl: int = 300
+    prediction_cache_redis_ttl: int = 3600
     smtp_host: str = "smtp.gmail.com"
     smtp_port: int = 587
     smtp_user: str = ""
@@ -35,18 +40,74 @@ class Settings(BaseSettings):
     migration_max_retries: int = 3
     migration_retry_delay: int = 5
     migration_retry_multiplier: int = 2
+    migration_max_concurrency: int = 4
+    migration_destination_limits: str = "aws:2,azure:2,gcp:2,on-premise:2"
+    migration_lease_seconds: int = 60
+    migration_heartbeat_interval: int = 15
+    migration_reaper_interval: int = 30
+    migration_poll_interval: int = 5
+    migration_fallback_poll_interval: int = 60
+    transfer_part_size: int = 8388608
+    transfer_concurrency: int = 4
+    cloud_client_cache_size: int = 64
+    cloud_max_pool_connections: int = 32
+    cloud_io_threads: int = 32
+    progress_flush_interval: float = 1.0
+    progress_ws_min_delta: float = 5.0
+    progress_ws_min_interval: float = 2.0
+    queue_status_ttl: float = 5.0
+    queue_status_full_refresh_interval: float = 300.0
+    queue_throughput_window: int = 3600
+    migration_scheduler_policy: str = "priority"
+    user_migration_concurrency: int = 4
+    user_migration_max_queued: int = 200
+    user_migration_step_delay: float = 1.0
+    migration_batch_max_objects: int = 10000
+    scheduler_candidate_window: int = 200
+    scheduler_throughput_window_hours: int = 24
+    scheduler_default_mbps: float = 50.0
+    scheduler_model_refresh_interval: float = 300.0
+    scheduler_aging_seconds: float = 600.0
+    scheduler_route_caps: str = ""
+    local_storage_path: str = "./storage"
     conflict_resolution_strategy: str = "last_write_wins"
     transaction_log_enabled: bool = True
     performance_metrics_enabled: bool = True
     metrics_collection_interval: int = 60
     deduplication_enabled: bool = True
+    dedup_chunk_min_size: int = 16384
+    dedup_chunk_avg_size: int = 65536
+    dedup_chunk_max_size: int = 262144
+    dedup_scan_buffer_size: int = 8388608
+    dedup_lookup_batch: int = 512
+    dedup_manifest_segment_size: int = 20000
     compression_enabled: bool = True
     compression_level: int = 6
+    compression_codec: str = "gzip"
+    compression_chunk_size: int = 1048576
+    compression_block_size: int = 4194304
+    compression_threads: int = 4
+    compression_sample_size: int = 196608
+    compression_candidates: str = "zstd,lz4,gzip,zlib,lzma"
+    compression_min_savings: float = 10.0
+    compression_min_throughput_mbps: float = 20.0
+    compression_tiers: str = "cold"
+    compression_spool_size: int = 67108864
     multi_region_enabled: bool = True
     default_region: str = "us-east-1"
     backup_enabled: bool = True
     backup_interval: int = 3600
     backup_retention_days: int = 7
+    classification_workers: int = 4
+    classification_shard_size: int = 50000
+    classification_interval: int = 300
+    scheduled_job_lease_seconds: int = 3600
+    scheduled_job_poll_interval: int = 60
+    opportunity_rebuild_interval: int = 86400
+    feature_store_enabled: bool = True
+    feature_store_ttl: int = 604800
+    feature_store_max_age: int = 86400
+    feature_store_refresh_interval: int = 3600
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -54,5 +115,31 @@ class Settings(BaseSettings):
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
+    
+    @property
+    def compression_candidates_list(self) -> List[str]:
+        return [name.strip() for name in self.compression_candidates.split(",") if name.strip()]
+    
+    @property
+    def compression_tiers_list(self) -> List[str]:
+        return [tier.strip() for tier in self.compression_tiers.split(",") if tier.strip()]
+    
+    @property
+    def scheduler_route_caps_map(self) -> Dict[str, float]:
+        caps = {}
+        for entry in self.scheduler_route_caps.split(","):
+            if ":" in entry:
+                route, cap = entry.rsplit(":", 1)
+                caps[route.strip()] = float(cap)
+        return caps
+    
+    @property
+    def migration_destination_limits_map(self) -> Dict[str, int]:
+        limits = {}
+        for entry in self.migration_destination_limits.split(","):
+            if ":" in entry:
+                location, limit = entry.rsplit(":", 1)
+                limits[location.strip()] = int(limit)
+        return limits
 
 settings = Settings()
@@ -1,3 +1,6 @@
 from .classification_engine import DataClassificationEngine
+from .placement_scorer import PlacementScorer
+from .classification_runner import ShardedClassificationRunner, IncrementalClassificationScheduler
+from .opportunity_index import OpportunityIndex
 
-__all__ = ['DataClassificationEngine']
+__all__ = ['DataClassificationEngine', 'PlacementScorer', 'ShardedClassificationRunner', 'IncrementalClassificationScheduler', 'OpportunityIndex']
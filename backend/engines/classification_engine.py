@@ -1,8 +1,20 @@
 from datetime import datetime, timedelta
-from typing import Dict, Tuple
+from typing import Dict, Iterator, Tuple
+from pymongo import UpdateOne, DeleteOne, DeleteMany
+from bson import ObjectId
+import numpy as np
 import logging
+import time
+from config.settings import settings
+from services.compression.pipeline import billable_bytes
+from utils.pagination import iter_id_pages
+from .placement_scorer import PlacementScorer
 
 class DataClassificationEngine:
+    STATE_WATERMARK_ID = "__access_log_watermark__"
+    STATE_BUCKET_FORMAT = "%Y-%m-%dT%H"
+    OPPORTUNITIES_COLLECTION = "optimization_opportunities"
+    
     def __init__(self, db):
         self.db = db
         self.tier_thresholds = {
@@ -22,6 +34,7 @@ class DataClassificationEngine:
             "azure": {"hot": 35, "warm": 120, "cold": 600},
             "gcp": {"hot": 32, "warm": 110, "cold": 550}
         }
+        self.placement_scorer = PlacementScorer(self.location_costs, self.location_latency)
     
     def classify_data_object(self, object_id: str) -> Tuple[str, str]:
         data_obj = self.db["data_objects"].find_one({"_id": object_id})
@@ -34,18 +47,23 @@ class DataClassificationEngine:
             return "warm", "on-premise"
         recent_period = datetime.utcnow() - timedelta(days=7)
         recent_accesses = [log for log in access_logs if log["timestamp"] >= recent_period]
-        access_per_day = len(recent_accesses) / 7.0
-        avg_latency = sum(log.get("latency_ms", 100) for log in recent_accesses) / max(len(recent_accesses), 1)
-        size_gb = data_obj.get("size_bytes", 0) / (1024**3)
-        if access_per_day >= self.tier_thresholds["hot"]["min_access_per_day"]:
-            tier = "hot"
-        elif access_per_day >= self.tier_thresholds["warm"]["min_access_per_day"]:
-            tier = "warm"
-        else:
-            tier = "cold"
+        latency_sum = sum(log.get("latency_ms", 100) for log in recent_accesses)
+        return self._classify_from_stats(data_obj.get("size_bytes", 0), len(recent_accesses), latency_sum)
+    
+    def _classify_from_stats(self, size_bytes: int, recent_count: int, latency_sum: float) -> Tuple[str, str]:
+        avg_latency = latency_sum / max(recent_count, 1)
+        size_gb = size_bytes / (1024**3)
+        tier = self._tier_for_rate(recent_count / 7.0)
         best_location = self._find_optimal_location(tier, size_gb, avg_latency)
         return tier, best_location
     
+    def _tier_for_rate(self, access_per_day: float) -> str:
+        if access_per_day >= self.tier_thresholds["hot"]["min_access_per_day"]:
+            return "hot"
+        if access_per_day >= self.tier_thresholds["warm"]["min_access_per_day"]:
+            return "warm"
+        return "cold"
+    
     def _find_optimal_location(self, tier: str, size_gb: float, required_latency: float) -> str:
         location_scores = {}
         for location in self.location_costs.keys():
@@ -79,36 +97,317 @@ class DataClassificationEngine:
                 results["errors"] += 1
         return results
     
-    def analyze_optimization_opportunities(self) -> Dict:
-        objects = list(self.db["data_objects"].find())
-        opportunities = []
-        total_potential_savings = 0.0
-        for obj in objects:
+    def _recent_access_stats(self, days: int = 7, object_id_range: Dict = None) -> Dict[str, Tuple[int, float]]:
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        match = {"timestamp": {"$gte": cutoff}}
+        if object_id_range:
+            match["data_object_id"] = object_id_range
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": "$data_object_id",
+                "count": {"$sum": 1},
+                "latency_sum": {"$sum": {"$ifNull": ["$latency_ms", 100]}}
+            }}
+        ]
+        stats = {}
+        for row in self.db["access_logs"].aggregate(pipeline, allowDiskUse=True):
+            stats[str(row["_id"])] = (row["count"], row["latency_sum"])
+        return stats
+    
+    def _iter_object_pages(self, query: Dict = None, page_size: int = 1000) -> Iterator[list]:
+        projection = {"_id": 1, "user_id": 1, "name": 1, "size_bytes": 1, "compression": 1, "current_tier": 1, "current_location": 1, "access_count": 1}
+        return iter_id_pages(self.db["data_objects"], query, projection, page_size)
+    
+    def _classify_tiers(self, access_per_day: np.ndarray) -> np.ndarray:
+        tier_index = self.placement_scorer.tier_index
+        return np.where(
+            access_per_day >= self.tier_thresholds["hot"]["min_access_per_day"], tier_index["hot"],
+            np.where(access_per_day >= self.tier_thresholds["warm"]["min_access_per_day"], tier_index["warm"], tier_index["cold"])
+        )
+    
+    def _score_page(self, page: list, stats: Dict) -> Dict[str, np.ndarray]:
+        scorer = self.placement_scorer
+        n = len(page)
+        recent_count = np.zeros(n, dtype=np.float64)
+        latency_sum = np.zeros(n, dtype=np.float64)
+        no_history = np.zeros(n, dtype=bool)
+        for i, obj in enumerate(page):
+            recent = stats.get(str(obj["_id"]))
+            if recent is None:
+                no_history[i] = not obj.get("access_count")
+            else:
+                recent_count[i], latency_sum[i] = recent
+        size_bytes = np.array([obj.get("size_bytes") or 0 for obj in page], dtype=np.float64)
+        tier_idx = self._classify_tiers(recent_count / 7.0)
+        tier_idx = np.where(no_history, scorer.tier_index["warm"], tier_idx)
+        current_location_idx = scorer.encode_locations([obj.get("current_location") for obj in page])
+        current_tier_idx = scorer.encode_tiers([obj.get("current_tier") for obj in page])
+        location_idx = scorer.best_locations(size_bytes, latency_sum / np.maximum(recent_count, 1), tier_idx)
+        location_idx = np.where(no_history, scorer.location_index["on-premise"], location_idx)
+        stored_bytes = np.array([billable_bytes(obj) for obj in page], dtype=np.float64)
+        compressed_tiers = [scorer.tier_index[tier] for tier in settings.compression_tiers_list if tier in scorer.tier_index]
+        proposed_cost = scorer.placement_cost(location_idx, tier_idx, np.where(np.isin(tier_idx, compressed_tiers), stored_bytes, size_bytes))
+        current_cost = scorer.placement_cost(current_location_idx, current_tier_idx, stored_bytes)
+        return {
+            "tier_idx": tier_idx,
+            "location_idx": location_idx,
+            "changed": (tier_idx != current_tier_idx) | (location_idx != current_location_idx),
+            "current_cost": current_cost,
+            "proposed_cost": proposed_cost,
+            "savings": current_cost - proposed_cost
+        }
+    
+    def _iter_classified(self, query: Dict = None, page_size: int = 1000, stats: Dict = None) -> Iterator[Tuple[list, Dict]]:
+        if stats is None:
+            stats = self._recent_access_stats()
+        for page in self._iter_object_pages(query, page_size):
             try:
-                new_tier, new_location = self.classify_data_object(obj["_id"])
-                current_cost = self._calculate_cost(
-                    obj["current_location"], obj["current_tier"], obj["size_bytes"]
-                )
-                proposed_cost = self._calculate_cost(new_location, new_tier, obj["size_bytes"])
-                if proposed_cost < current_cost * 0.8:
-                    savings = current_cost - proposed_cost
-                    opportunities.append({
-                        "object_id": obj["_id"],
-                        "name": obj["name"],
-                        "current": f"{obj['current_location']}/{obj['current_tier']}",
-                        "proposed": f"{new_location}/{new_tier}",
-                        "monthly_savings": round(savings, 2)
-                    })
-                    total_potential_savings += savings
+                scored = self._score_page(page, stats)
             except Exception as e:
-                logging.error(f"Analysis error for {obj.get('_id', 'unknown')}: {str(e)}")
+                logging.error(f"Classification error for page starting at {page[0]['_id']}: {str(e)}")
+                scored = None
+            yield page, scored
+    
+    def _new_opportunity_tracker(self) -> Dict:
+        return {"savings": np.empty(0, dtype=np.float64), "entries": [], "total": 0.0, "count": 0}
+    
+    def _track_opportunities(self, tracker: Dict, page: list, scored: Dict, top_n: int):
+        scorer = self.placement_scorer
+        eligible = np.flatnonzero(scored["proposed_cost"] < scored["current_cost"] * 0.8)
+        if not len(eligible):
+            return
+        savings = scored["savings"][eligible]
+        tracker["total"] += float(savings.sum())
+        tracker["count"] += len(eligible)
+        page_top = eligible[scorer.top_k(savings, top_n)]
+        top_savings = np.concatenate([tracker["savings"], scored["savings"][page_top]])
+        entries = tracker["entries"]
+        for i in page_top:
+            obj = page[i]
+            entries.append({
+                "object_id": obj["_id"],
+                "name": obj.get("name"),
+                "current": f"{obj.get('current_location')}/{obj.get('current_tier')}",
+                "proposed": f"{scorer.locations[scored['location_idx'][i]]}/{scorer.tiers[scored['tier_idx'][i]]}",
+                "monthly_savings": round(float(scored["savings"][i]), 2)
+            })
+        keep = scorer.top_k(top_savings, top_n)
+        tracker["savings"] = top_savings[keep]
+        tracker["entries"] = [entries[i] for i in keep]
+    
+    def _opportunity_ops(self, page: list, scored: Dict, now: datetime) -> list:
+        scorer = self.placement_scorer
+        eligible = scored["proposed_cost"] < scored["current_cost"] * 0.8
+        ops = []
+        for i in np.flatnonzero(eligible):
+            obj = page[i]
+            ops.append(UpdateOne({"_id": obj["_id"]}, {"$set": {
+                "user_id": obj.get("user_id"),
+                "name": obj.get("name"),
+                "current_location": obj.get("current_location"),
+                "current_tier": obj.get("current_tier"),
+                "proposed_location": scorer.locations[scored["location_idx"][i]],
+                "proposed_tier": scorer.tiers[scored["tier_idx"][i]],
+                "current_cost": float(scored["current_cost"][i]),
+                "proposed_cost": float(scored["proposed_cost"][i]),
+                "monthly_savings": float(scored["savings"][i]),
+                "indexed_at": now
+            }}, upsert=True))
+        stale = [page[i]["_id"] for i in np.flatnonzero(~eligible)]
+        if stale:
+            ops.append(DeleteMany({"_id": {"$in": stale}}))
+        return ops
+    
+    def _write_opportunities(self, page: list, scored: Dict, now: datetime):
+        ops = self._opportunity_ops(page, scored, now)
+        if ops:
+            self.db[self.OPPORTUNITIES_COLLECTION].bulk_write(ops, ordered=False)
+    
+    def refresh_opportunities(self, object_ids: list):
+        lookup_ids = []
+        for object_id in object_ids:
+            lookup_ids.append(object_id)
+            if isinstance(object_id, ObjectId):
+                lookup_ids.append(str(object_id))
+            elif ObjectId.is_valid(object_id):
+                lookup_ids.append(ObjectId(object_id))
+        projection = {"_id": 1, "user_id": 1, "name": 1, "size_bytes": 1, "compression": 1, "current_tier": 1, "current_location": 1, "access_count": 1}
+        objects = list(self.db["data_objects"].find({"_id": {"$in": lookup_ids}}, projection))
+        found = {str(obj["_id"]) for obj in objects}
+        missing = [object_id for object_id in lookup_ids if str(object_id) not in found]
+        if missing:
+            self.db[self.OPPORTUNITIES_COLLECTION].delete_many({"_id": {"$in": missing}})
+        if objects:
+            stats = self._recent_access_stats(object_id_range={"$in": list(found)})
+            self._write_opportunities(objects, self._score_page(objects, stats), datetime.utcnow())
+    
+    def _opportunity_summary(self, tracker: Dict) -> Dict:
         return {
-            "opportunities": sorted(opportunities, key=lambda x: x["monthly_savings"], reverse=True)[:20],
-            "total_potential_savings": round(total_potential_savings, 2),
-            "count": len(opportunities)
+            "opportunities": tracker["entries"],
+            "total_potential_savings": round(tracker["total"], 2),
+            "count": tracker["count"]
         }
     
-    def _calculate_cost(self, location: str, tier: str, size_bytes: int) -> float:
-        size_gb = size_bytes / (1024**3)
+    def bulk_classify(self, query: Dict = None, page_size: int = 1000, write_batch_size: int = 1000, stats: Dict = None, top_n: int = 0) -> Dict:
+        start = time.time()
+        results = {"reclassified": 0, "unchanged": 0, "errors": 0}
+        tiers = self.placement_scorer.tiers
+        tracker = self._new_opportunity_tracker() if top_n else None
+        pending = []
+        processed = 0
+        for page, scored in self._iter_classified(query, page_size, stats):
+            processed += len(page)
+            if scored is None:
+                results["errors"] += len(page)
+                continue
+            now = datetime.utcnow()
+            changed = np.flatnonzero(scored["changed"])
+            for i in changed:
+                pending.append(UpdateOne(
+                    {"_id": page[i]["_id"]},
+                    {"$set": {"predicted_tier": tiers[scored["tier_idx"][i]], "updated_at": now}}
+                ))
+            results["reclassified"] += len(changed)
+            results["unchanged"] += len(page) - len(changed)
+            if tracker is not None:
+                self._track_opportunities(tracker, page, scored, top_n)
+            self._write_opportunities(page, scored, now)
+            if len(pending) >= write_batch_size:
+                self.db["data_objects"].bulk_write(pending, ordered=False)
+                pending = []
+        if pending:
+            self.db["data_objects"].bulk_write(pending, ordered=False)
+        elapsed = time.time() - start
+        results["processed"] = processed
+        results["elapsed_seconds"] = round(elapsed, 2)
+        results["objects_per_second"] = round(processed / elapsed, 2) if elapsed > 0 else float(processed)
+        if tracker is not None:
+            results["optimization"] = self._opportunity_summary(tracker)
+        logging.info(f"Bulk classification processed {processed} objects at {results['objects_per_second']} objects/s")
+        return results
+    
+    def analyze_optimization_opportunities(self, top_n: int = 20) -> Dict:
+        tracker = self._new_opportunity_tracker()
+        for page, scored in self._iter_classified():
+            if scored is not None:
+                self._track_opportunities(tracker, page, scored, top_n)
+        return self._opportunity_summary(tracker)
+    
+    def ensure_indexes(self):
+        self.db["classification_state"].create_index("next_review_at")
+    
+    def _hourly_pipeline(self, match: Dict) -> list:
+        return [
+            {"$match": match},
+            {"$group": {
+                "_id": {"object_id": "$data_object_id", "hour": {"$dateToString": {"format": self.STATE_BUCKET_FORMAT, "date": "$timestamp"}}},
+                "count": {"$sum": 1},
+                "latency_sum": {"$sum": {"$ifNull": ["$latency_ms", 100]}}
+            }}
+        ]
+    
+    def incremental_classify(self, batch_size: int = 1000) -> Dict:
+        start = time.time()
+        now = datetime.utcnow()
+        state = self.db["classification_state"]
+        watermark = state.find_one({"_id": self.STATE_WATERMARK_ID})
+        upper = ObjectId.from_datetime(now - timedelta(seconds=5))
+        window_start = now - timedelta(days=7)
+        id_range = {"$lt": upper}
+        if watermark:
+            id_range["$gte"] = watermark["last_log_id"]
+        touched_hours = {}
+        for row in self.db["access_logs"].aggregate(self._hourly_pipeline({"_id": id_range, "timestamp": {"$gte": window_start}}), allowDiskUse=True):
+            touched_hours.setdefault(row["_id"]["object_id"], set()).add(row["_id"]["hour"])
+        touched = {str(object_id) for object_id in touched_hours}
+        object_keys = list(touched_hours)
+        for i in range(0, len(object_keys), batch_size):
+            chunk = object_keys[i:i + batch_size]
+            hours = [hour for object_id in chunk for hour in touched_hours[object_id]]
+            match = {
+                "_id": {"$lt": upper},
+                "data_object_id": {"$in": chunk},
+                "timestamp": {
+                    "$gte": max(datetime.strptime(min(hours), self.STATE_BUCKET_FORMAT), window_start),
+                    "$lt": datetime.strptime(max(hours), self.STATE_BUCKET_FORMAT) + timedelta(hours=1)
+                }
+            }
+            ops = [UpdateOne(
+                {"_id": str(row["_id"]["object_id"])},
+                {"$set": {f"hourly.{row['_id']['hour']}": {"count": row["count"], "latency_sum": row["latency_sum"]}, "next_review_at": now}},
+                upsert=True
+            ) for row in self.db["access_logs"].aggregate(self._hourly_pipeline(match), allowDiskUse=True)
+                if row["_id"]["hour"] in touched_hours.get(row["_id"]["object_id"], ())]
+            if ops:
+                state.bulk_write(ops, ordered=False)
+        state.update_one({"_id": self.STATE_WATERMARK_ID}, {"$set": {"last_log_id": upper, "updated_at": now}}, upsert=True)
+        results = {"reclassified": 0, "unchanged": 0, "errors": 0, "objects_with_new_logs": len(touched), "reviewed": 0}
+        due = [doc["_id"] for doc in state.find({"next_review_at": {"$lte": now}}, {"_id": 1})]
+        for i in range(0, len(due), batch_size):
+            self._review_states(due[i:i + batch_size], now, results)
+        results["elapsed_seconds"] = round(time.time() - start, 2)
+        logging.info(f"Incremental classification reviewed {results['reviewed']} objects ({len(touched)} with new logs)")
+        return results
+    
+    def _review_states(self, object_ids: list, now: datetime, results: Dict):
+        state = self.db["classification_state"]
+        states = {doc["_id"]: doc for doc in state.find({"_id": {"$in": object_ids}})}
+        lookup_ids = list(object_ids) + [ObjectId(i) for i in object_ids if ObjectId.is_valid(i)]
+        projection = {"_id": 1, "user_id": 1, "name": 1, "size_bytes": 1, "compression": 1, "current_tier": 1, "current_location": 1}
+        objects = {str(obj["_id"]): obj for obj in self.db["data_objects"].find({"_id": {"$in": lookup_ids}}, projection)}
+        cutoff_hour = (now - timedelta(days=7)).strftime(self.STATE_BUCKET_FORMAT)
+        state_ops = []
+        object_ops = []
+        reviewed = []
+        review_stats = {}
+        for object_id in object_ids:
+            obj = objects.get(object_id)
+            if obj is None:
+                state_ops.append(DeleteOne({"_id": object_id}))
+                continue
+            try:
+                hourly = {hour: bucket for hour, bucket in (states[object_id].get("hourly") or {}).items() if hour > cutoff_hour}
+                count = sum(bucket["count"] for bucket in hourly.values())
+                latency_sum = sum(bucket["latency_sum"] for bucket in hourly.values())
+                tier, location = self._classify_from_stats(obj.get("size_bytes", 0), count, latency_sum)
+                if tier != obj.get("current_tier") or location != obj.get("current_location"):
+                    object_ops.append(UpdateOne({"_id": obj["_id"]}, {"$set": {"predicted_tier": tier, "updated_at": now}}))
+                    results["reclassified"] += 1
+                else:
+                    results["unchanged"] += 1
+                state_ops.append(UpdateOne({"_id": object_id}, {"$set": {
+                    "hourly": hourly,
+                    "count_7d": count,
+                    "latency_sum_7d": latency_sum,
+                    "last_tier": tier,
+                    "last_location": location,
+                    "evaluated_at": now,
+                    "next_review_at": self._next_tier_boundary(hourly)
+                }}))
+                reviewed.append(obj)
+                review_stats[object_id] = (count, latency_sum)
+                results["reviewed"] += 1
+            except Exception as e:
+                logging.error(f"Incremental classification error for {object_id}: {str(e)}")
+                results["errors"] += 1
+        if object_ops:
+            self.db["data_objects"].bulk_write(object_ops, ordered=False)
+        if reviewed:
+            self._write_opportunities(reviewed, self._score_page(reviewed, review_stats), now)
+        if state_ops:
+            state.bulk_write(state_ops, ordered=False)
+    
+    def _next_tier_boundary(self, hourly: Dict) -> datetime:
+        count = sum(bucket["count"] for bucket in hourly.values())
+        tier = self._tier_for_rate(count / 7.0)
+        for hour in sorted(hourly):
+            count -= hourly[hour]["count"]
+            if self._tier_for_rate(count / 7.0) != tier:
+                return datetime.strptime(hour, self.STATE_BUCKET_FORMAT) + timedelta(days=7)
+        return None
+    
+    def _calculate_cost(self, location: str, tier: str, size_bytes: int, compression: Dict = None) -> float:
+        size_gb = ((compression or {}).get("stored_bytes") or size_bytes) / (1024**3)
         cost_per_gb = self.location_costs.get(location, {}).get(tier, 0.020)
         return size_gb * cost_per_gb
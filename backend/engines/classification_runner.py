@@ -0,0 +1,162 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from pymongo import MongoClient
+import heapq
+import logging
+import threading
+import time
+from config.settings import settings
+from utils.job_lease import run_exclusive
+from .classification_engine import DataClassificationEngine
+
+_worker_db = None
+
+def _init_worker():
+    global _worker_db
+    client = MongoClient(settings.mongodb_url)
+    _worker_db = client[settings.mongodb_database]
+
+def _stats_range(lower, upper) -> Optional[Dict]:
+    if lower is not None and upper is not None and type(lower) is not type(upper):
+        return None
+    id_range = {}
+    if lower is not None:
+        id_range["$gte"] = str(lower)
+    if upper is not None:
+        id_range["$lt"] = str(upper)
+    return id_range or None
+
+def _classify_shard(lower, upper, top_n: int, page_size: int) -> Dict:
+    id_query = {}
+    if lower is not None:
+        id_query["$gte"] = lower
+    if upper is not None:
+        id_query["$lt"] = upper
+    engine = DataClassificationEngine(_worker_db)
+    stats = engine._recent_access_stats(object_id_range=_stats_range(lower, upper))
+    return engine.bulk_classify({"_id": id_query} if id_query else None, page_size=page_size, stats=stats, top_n=top_n)
+
+class ShardedClassificationRunner:
+    def __init__(self, db, workers: int = None, shard_size: int = None, top_n: int = 20, page_size: int = 1000):
+        self.db = db
+        self.workers = workers or settings.classification_workers
+        self.shard_size = shard_size or settings.classification_shard_size
+        self.top_n = top_n
+        self.page_size = page_size
+
+    def plan_shards(self) -> List[Tuple]:
+        bounds = [None]
+        cursor = self.db["data_objects"].find({}, {"_id": 1}).sort("_id", 1).batch_size(10000)
+        for i, doc in enumerate(cursor):
+            if i and i % self.shard_size == 0:
+                bounds.append(doc["_id"])
+        return [(lower, bounds[i + 1] if i + 1 < len(bounds) else None) for i, lower in enumerate(bounds)]
+
+    def run(self, resume: bool = False) -> Dict:
+        start = time.time()
+        runs = self.db["classification_runs"]
+        run = runs.find_one({"status": "running"}, sort=[("created_at", -1)]) if resume else None
+        if run is None:
+            run = {
+                "status": "running",
+                "shards": [{"index": i, "lower": lower, "upper": upper} for i, (lower, upper) in enumerate(self.plan_shards())],
+                "completed": {},
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }
+            run["_id"] = runs.insert_one(run).inserted_id
+        else:
+            logging.info(f"Resuming classification run {run['_id']} with {len(run.get('completed') or {})}/{len(run['shards'])} shards done")
+        completed = dict(run.get("completed") or {})
+        remaining = [shard for shard in run["shards"] if str(shard["index"]) not in completed]
+        failed = 0
+        if remaining:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(remaining)), initializer=_init_worker) as executor:
+                futures = {
+                    executor.submit(_classify_shard, shard["lower"], shard["upper"], self.top_n, self.page_size): shard
+                    for shard in remaining
+                }
+                for future in as_completed(futures):
+                    shard = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logging.error(f"Classification shard {shard['index']} failed: {str(e)}")
+                        failed += 1
+                        continue
+                    completed[str(shard["index"])] = result
+                    runs.update_one(
+                        {"_id": run["_id"]},
+                        {"$set": {f"completed.{shard['index']}": result, "updated_at": datetime.utcnow()}}
+                    )
+        summary = self._merge_results(list(completed.values()))
+        summary["shards"] = len(run["shards"])
+        summary["shards_completed"] = len(completed)
+        summary["shards_failed"] = failed
+        elapsed = time.time() - start
+        summary["elapsed_seconds"] = round(elapsed, 2)
+        summary["objects_per_second"] = round(summary["processed"] / elapsed, 2) if elapsed > 0 else float(summary["processed"])
+        status = "completed" if len(completed) == len(run["shards"]) else "running"
+        runs.update_one({"_id": run["_id"]}, {"$set": {"status": status, "summary": summary, "updated_at": datetime.utcnow()}})
+        summary["run_id"] = str(run["_id"])
+        summary["status"] = status
+        logging.info(f"Sharded classification {status}: {summary['processed']} objects at {summary['objects_per_second']} objects/s")
+        return summary
+
+    def _merge_results(self, results: List[Dict]) -> Dict:
+        merged = {"reclassified": 0, "unchanged": 0, "errors": 0, "processed": 0}
+        opportunities = []
+        total_savings = 0.0
+        count = 0
+        for result in results:
+            for key in merged:
+                merged[key] += result.get(key, 0)
+            optimization = result.get("optimization") or {}
+            opportunities.extend(optimization.get("opportunities", []))
+            total_savings += optimization.get("total_potential_savings", 0.0)
+            count += optimization.get("count", 0)
+        merged["optimization"] = {
+            "opportunities": heapq.nlargest(self.top_n, opportunities, key=lambda o: o["monthly_savings"]),
+            "total_potential_savings": round(total_savings, 2),
+            "count": count
+        }
+        return merged
+
+class IncrementalClassificationScheduler:
+    LEASE_NAME = "incremental_classification"
+
+    def __init__(self, db, engine: DataClassificationEngine = None, interval: int = None):
+        self.db = db
+        self.engine = engine or DataClassificationEngine(db)
+        self.interval = interval or settings.classification_interval
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        try:
+            self.engine.ensure_indexes()
+        except Exception as e:
+            logging.warning(f"Could not create classification state indexes: {str(e)}")
+        self.running = True
+        self.thread = threading.Thread(target=self._classify_loop, daemon=True)
+        self.thread.start()
+        logging.info("Incremental classification scheduler started")
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=5)
+        logging.info("Incremental classification scheduler stopped")
+
+    def _classify_loop(self):
+        next_run = time.time() + settings.scheduled_job_poll_interval
+        while self.running:
+            if time.time() >= next_run:
+                ran = False
+                try:
+                    ran = run_exclusive(self.db, self.LEASE_NAME, self.interval, self.engine.incremental_classify)
+                except Exception as e:
+                    logging.error(f"Incremental classification error: {str(e)}")
+                next_run = time.time() + (self.interval if ran else settings.scheduled_job_poll_interval)
+            time.sleep(1)
@@ -0,0 +1,133 @@
+from datetime import datetime
+from typing import Dict
+from pymongo import ASCENDING, DESCENDING
+import logging
+import threading
+import time
+from config.settings import settings
+from utils.job_lease import run_exclusive
+from .classification_engine import DataClassificationEngine
+
+class OpportunityIndex:
+    LEASE_NAME = "opportunity_rebuild"
+
+    def __init__(self, db, engine: DataClassificationEngine = None):
+        self.db = db
+        self.engine = engine or DataClassificationEngine(db)
+        self.collection = db[DataClassificationEngine.OPPORTUNITIES_COLLECTION]
+        self.rebuild_interval = settings.opportunity_rebuild_interval
+        self.running = False
+        self.rebuild_thread = None
+
+    def ensure_indexes(self):
+        self.collection.create_index([("monthly_savings", DESCENDING)])
+        self.collection.create_index([("user_id", ASCENDING), ("monthly_savings", DESCENDING)])
+        self.collection.create_index([("indexed_at", ASCENDING)])
+
+    def top(self, limit: int = 20, user_id: str = None) -> Dict:
+        query = {"user_id": user_id} if user_id else {}
+        docs = list(self.collection.find(query).sort("monthly_savings", DESCENDING).limit(limit))
+        totals = list(self.collection.aggregate([
+            {"$match": query},
+            {"$group": {"_id": None, "total": {"$sum": "$monthly_savings"}, "count": {"$sum": 1}}}
+        ]))
+        return {
+            "opportunities": [{
+                "object_id": str(doc["_id"]),
+                "name": doc.get("name"),
+                "current": f"{doc.get('current_location')}/{doc.get('current_tier')}",
+                "proposed": f"{doc.get('proposed_location')}/{doc.get('proposed_tier')}",
+                "monthly_savings": round(doc["monthly_savings"], 2)
+            } for doc in docs],
+            "total_potential_savings": round(totals[0]["total"], 2) if totals else 0.0,
+            "count": totals[0]["count"] if totals else 0
+        }
+
+    def refresh_object(self, object_id):
+        try:
+            self.engine.refresh_opportunities([object_id])
+        except Exception as e:
+            logging.error(f"Opportunity refresh failed for {object_id}: {str(e)}")
+
+    def rebuild(self) -> Dict:
+        start = time.time()
+        stamp = datetime.utcnow()
+        processed = 0
+        for page, scored in self.engine._iter_classified():
+            processed += len(page)
+            if scored is not None:
+                self.engine._write_opportunities(page, scored, stamp)
+        removed = self.collection.delete_many({"indexed_at": {"$lt": stamp}}).deleted_count
+        elapsed = time.time() - start
+        logging.info(f"Opportunity index rebuilt from {processed} objects in {elapsed:.1f}s")
+        return {
+            "processed": processed,
+            "indexed": self.collection.count_documents({}),
+            "removed": removed,
+            "elapsed_seconds": round(elapsed, 2)
+        }
+
+    def check_consistency(self, tolerance: float = 0.01) -> Dict:
+        scorer = self.engine.placement_scorer
+        report = {"checked": 0, "missing": 0, "stale": 0, "mismatched": 0, "orphaned": 0,
+                  "fresh_total": 0.0, "materialized_total": 0.0, "max_savings_drift": 0.0}
+        matched = 0
+        for page, scored in self.engine._iter_classified():
+            if scored is None:
+                continue
+            report["checked"] += len(page)
+            eligible = scored["proposed_cost"] < scored["current_cost"] * 0.8
+            materialized = {doc["_id"]: doc for doc in self.collection.find(
+                {"_id": {"$in": [obj["_id"] for obj in page]}},
+                {"monthly_savings": 1, "proposed_location": 1, "proposed_tier": 1}
+            )}
+            matched += len(materialized)
+            for i, obj in enumerate(page):
+                doc = materialized.get(obj["_id"])
+                if doc is not None:
+                    report["materialized_total"] += doc["monthly_savings"]
+                if not eligible[i]:
+                    if doc is not None:
+                        report["stale"] += 1
+                    continue
+                savings = float(scored["savings"][i])
+                report["fresh_total"] += savings
+                if doc is None:
+                    report["missing"] += 1
+                    continue
+                drift = abs(doc["monthly_savings"] - savings)
+                report["max_savings_drift"] = max(report["max_savings_drift"], drift)
+                proposed = (scorer.locations[scored["location_idx"][i]], scorer.tiers[scored["tier_idx"][i]])
+                if drift > tolerance or proposed != (doc.get("proposed_location"), doc.get("proposed_tier")):
+                    report["mismatched"] += 1
+        report["orphaned"] = max(self.collection.count_documents({}) - matched, 0)
+        drifted = report["missing"] + report["stale"] + report["mismatched"] + report["orphaned"]
+        report["drift_ratio"] = round(drifted / max(report["checked"], 1), 4)
+        report["total_drift"] = round(report["materialized_total"] - report["fresh_total"], 2)
+        for key in ("fresh_total", "materialized_total", "max_savings_drift"):
+            report[key] = round(report[key], 2)
+        return report
+
+    def start(self):
+        self.running = True
+        self.rebuild_thread = threading.Thread(target=self._rebuild_loop, daemon=True)
+        self.rebuild_thread.start()
+        logging.info("Opportunity index rebuild scheduler started")
+
+    def stop(self):
+        self.running = False
+        if self.rebuild_thread:
+            self.rebuild_thread.join(timeout=5)
+        logging.info("Opportunity index rebuild scheduler stopped")
+
+    def _rebuild_loop(self):
+        next_run = time.time() + settings.scheduled_job_poll_interval
+        while self.running:
+            if time.time() >= next_run:
+                ran = False
+                try:
+                    ran = run_exclusive(self.db, self.LEASE_NAME, self.rebuild_interval, self.rebuild)
+                except Exception as e:
+                    logging.error(f"Opportunity index rebuild error: {str(e)}")
+                next_run = time.time() + (self.rebuild_interval if ran else settings.scheduled_job_poll_interval)
+            time.sleep(1)
@@ -0,0 +1,51 @@
+import numpy as np
+from typing import Dict, Sequence, Tuple
+
+class PlacementScorer:
+    def __init__(self, location_costs: Dict[str, Dict[str, float]], location_latency: Dict[str, Dict[str, float]], default_location: str = "on-premise", default_cost_per_gb: float = 0.020):
+        self.locations = list(location_costs.keys())
+        self.tiers = list(next(iter(location_costs.values())).keys())
+        self.location_index = {location: i for i, location in enumerate(self.locations)}
+        self.tier_index = {tier: i for i, tier in enumerate(self.tiers)}
+        self.cost_matrix = np.array([[location_costs[l][t] for t in self.tiers] for l in self.locations], dtype=np.float64)
+        self.latency_matrix = np.array([[location_latency[l][t] for t in self.tiers] for l in self.locations], dtype=np.float64)
+        self.default_location_idx = self.location_index[default_location]
+        self.default_cost_per_gb = default_cost_per_gb
+
+    def encode_locations(self, locations: Sequence[str]) -> np.ndarray:
+        return np.fromiter((self.location_index.get(l, -1) for l in locations), dtype=np.int64, count=len(locations))
+
+    def encode_tiers(self, tiers: Sequence[str]) -> np.ndarray:
+        return np.fromiter((self.tier_index.get(t, -1) for t in tiers), dtype=np.int64, count=len(tiers))
+
+    def placement_cost(self, location_idx: np.ndarray, tier_idx: np.ndarray, size_bytes: np.ndarray) -> np.ndarray:
+        valid = (location_idx >= 0) & (tier_idx >= 0)
+        cost_per_gb = np.full(location_idx.shape, self.default_cost_per_gb, dtype=np.float64)
+        cost_per_gb[valid] = self.cost_matrix[location_idx[valid], tier_idx[valid]]
+        return cost_per_gb * (np.asarray(size_bytes, dtype=np.float64) / (1024**3))
+
+    def best_locations(self, size_bytes: np.ndarray, required_latency: np.ndarray, tier_idx: np.ndarray) -> np.ndarray:
+        size_gb = np.asarray(size_bytes, dtype=np.float64) / (1024**3)
+        required = np.asarray(required_latency, dtype=np.float64)[:, None]
+        latency = self.latency_matrix[:, tier_idx].T
+        cost = self.cost_matrix[:, tier_idx].T * size_gb[:, None]
+        feasible = latency <= required * 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            latency_score = 100 - (latency / required * 50)
+        scores = np.where(feasible, latency_score * 0.6 + (100 - cost * 10) * 0.4, -np.inf)
+        best = np.argmax(scores, axis=1)
+        return np.where(feasible.any(axis=1), best, self.default_location_idx)
+
+    def score(self, size_bytes: np.ndarray, required_latency: np.ndarray, tier_idx: np.ndarray, current_location_idx: np.ndarray, current_tier_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        best = self.best_locations(size_bytes, required_latency, tier_idx)
+        proposed_cost = self.placement_cost(best, tier_idx, size_bytes)
+        current_cost = self.placement_cost(current_location_idx, current_tier_idx, size_bytes)
+        return best, proposed_cost, current_cost - proposed_cost
+
+    @staticmethod
+    def top_k(values: np.ndarray, k: int) -> np.ndarray:
+        if len(values) > k:
+            candidates = np.argpartition(-values, k - 1)[:k]
+        else:
+            candidates = np.arange(len(values))
+        return candidates[np.argsort(-values[candidates], kind="stable")]
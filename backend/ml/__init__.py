@@ -1,3 +1,7 @@
 from .prediction_engine import MLPredictionEngine
+from .feature_pipeline import FeaturePipeline, FEATURE_COLUMNS, FEATURE_SET_VERSION
+from .feature_store import FeatureStore
+from .model_registry import ModelBundle, ModelRegistry
+from .prediction_cache import PredictionCache, prediction_cache
 
-__all__ = ['MLPredictionEngine']
+__all__ = ['MLPredictionEngine', 'FeaturePipeline', 'FEATURE_COLUMNS', 'FEATURE_SET_VERSION', 'FeatureStore', 'ModelBundle', 'ModelRegistry', 'PredictionCache', 'prediction_cache']
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+from utils.pagination import iter_id_pages
+
+FEATURE_SET_VERSION = "v1"
+FEATURE_COLUMNS = ["size_gb", "access_count", "avg_latency", "access_per_day", "days_since_creation", "days_since_last_access"]
+
+class FeaturePipeline:
+    def __init__(self, db, window_days: int = 7):
+        self.db = db
+        self.window_days = window_days
+        self.projection = {"_id": 1, "name": 1, "size_bytes": 1, "access_count": 1, "created_at": 1, "last_accessed": 1, "current_tier": 1, "current_location": 1}
+
+    def load_objects(self, query: Dict = None, limit: int = 0) -> List[dict]:
+        cursor = self.db["data_objects"].find(query or {}, self.projection)
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor)
+
+    def iter_pages(self, query: Dict = None, page_size: int = 10000, limit: int = 0) -> Iterator[List[dict]]:
+        return iter_id_pages(self.db["data_objects"], query, self.projection, page_size, limit)
+
+    def iter_feature_frames(self, query: Dict = None, page_size: int = 10000, limit: int = 0) -> Iterator[Tuple[List[dict], pd.DataFrame]]:
+        for page in self.iter_pages(query, page_size, limit):
+            now = datetime.utcnow()
+            stats = self.access_stats([str(obj["_id"]) for obj in page], now)
+            yield page, self.build(page, stats, now)
+
+    def access_stats(self, object_ids: List[str] = None, now: datetime = None) -> Dict[str, Tuple[int, int, float]]:
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.window_days)
+        in_window = {"$gte": ["$timestamp", cutoff]}
+        pipeline = []
+        if object_ids is not None:
+            pipeline.append({"$match": {"data_object_id": {"$in": object_ids}}})
+        pipeline.append({"$group": {
+            "_id": "$data_object_id",
+            "total": {"$sum": 1},
+            "recent_count": {"$sum": {"$cond": [in_window, 1, 0]}},
+            "latency_sum": {"$sum": {"$cond": [in_window, {"$ifNull": ["$latency_ms", 100]}, 0]}}
+        }})
+        return {
+            str(row["_id"]): (row["total"], row["recent_count"], row["latency_sum"])
+            for row in self.db["access_logs"].aggregate(pipeline, allowDiskUse=True)
+        }
+
+    def build(self, objects: List[dict], stats: Dict[str, Tuple[int, int, float]], now: datetime = None) -> pd.DataFrame:
+        now = now or datetime.utcnow()
+        n = len(objects)
+        ids = [str(obj["_id"]) for obj in objects]
+        has_logs = np.zeros(n, dtype=bool)
+        recent_count = np.zeros(n, dtype=np.float64)
+        latency_sum = np.zeros(n, dtype=np.float64)
+        for i, object_id in enumerate(ids):
+            row = stats.get(object_id)
+            if row is not None:
+                has_logs[i] = row[0] > 0
+                recent_count[i], latency_sum[i] = row[1], row[2]
+        size_gb = np.array([obj.get("size_bytes", 0) or 0 for obj in objects], dtype=np.float64) / (1024**3)
+        access_count = np.array([obj.get("access_count", 0) or 0 for obj in objects], dtype=np.float64)
+        created = pd.to_datetime(pd.Series([obj.get("created_at") for obj in objects], dtype="object")).fillna(now)
+        last_accessed = pd.to_datetime(pd.Series([obj.get("last_accessed") for obj in objects], dtype="object")).fillna(now)
+        days_since_creation = (now - created).dt.days.to_numpy(dtype=np.float64)
+        days_since_last_access = (now - last_accessed).dt.days.to_numpy(dtype=np.float64)
+        return pd.DataFrame({
+            "size_gb": size_gb,
+            "access_count": np.where(has_logs, access_count, 0.0),
+            "avg_latency": np.where(has_logs, latency_sum / np.maximum(recent_count, 1), 100.0),
+            "access_per_day": recent_count / 7.0,
+            "days_since_creation": days_since_creation,
+            "days_since_last_access": np.where(has_logs, days_since_last_access, 999.0)
+        }, index=pd.Index(ids, name="object_id"), columns=FEATURE_COLUMNS)
+
+    def extract(self, query: Dict = None, limit: int = 0, restrict_logs: bool = True) -> Tuple[List[dict], pd.DataFrame]:
+        now = datetime.utcnow()
+        objects = self.load_objects(query, limit)
+        if not objects:
+            return [], pd.DataFrame(columns=FEATURE_COLUMNS)
+        object_ids = [str(obj["_id"]) for obj in objects] if restrict_logs else None
+        return objects, self.build(objects, self.access_stats(object_ids, now), now)
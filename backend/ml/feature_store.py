@@ -0,0 +1,163 @@
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, List
+from bson import ObjectId
+from pymongo import UpdateOne
+import logging
+import threading
+import time
+from config.settings import settings
+from utils.job_lease import run_exclusive
+from .feature_pipeline import FeaturePipeline, FEATURE_COLUMNS, FEATURE_SET_VERSION
+
+class FeatureStore:
+    LEASE_NAME = "feature_store_refresh"
+
+    def __init__(self, db, pipeline: FeaturePipeline = None, version: str = FEATURE_SET_VERSION):
+        self.db = db
+        self.pipeline = pipeline or FeaturePipeline(db)
+        self.version = version
+        self.collection = db["feature_store"]
+        self.manifests = db["feature_store_manifest"]
+        self.ttl = settings.feature_store_ttl
+        self.max_age = settings.feature_store_max_age
+        self.refresh_interval = settings.feature_store_refresh_interval
+        self.batch_size = 10000
+        self.running = False
+        self.refresh_thread = None
+
+    def ensure_indexes(self):
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+        self.collection.create_index([("version", 1), ("computed_at", 1)])
+
+    def _row_id(self, object_id) -> str:
+        return f"{self.version}:{object_id}"
+
+    def _lookup_ids(self, object_ids: List[str]) -> list:
+        return list(object_ids) + [ObjectId(i) for i in object_ids if ObjectId.is_valid(i)]
+
+    def write(self, X: pd.DataFrame, now: datetime = None):
+        now = now or datetime.utcnow()
+        window_start = now - timedelta(days=self.pipeline.window_days)
+        ops = [UpdateOne({"_id": self._row_id(object_id)}, {"$set": {
+            "object_id": object_id,
+            "version": self.version,
+            "values": [float(v) for v in values],
+            "window_start": window_start,
+            "window_end": now,
+            "computed_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl)
+        }}, upsert=True) for object_id, values in zip(X.index, X.to_numpy())]
+        for i in range(0, len(ops), self.batch_size):
+            self.collection.bulk_write(ops[i:i + self.batch_size], ordered=False)
+
+    def read(self, object_ids: List[str], max_age: int = None) -> pd.DataFrame:
+        rows = {}
+        for i in range(0, len(object_ids), self.batch_size):
+            query = {"_id": {"$in": [self._row_id(object_id) for object_id in object_ids[i:i + self.batch_size]]}}
+            if max_age is not None:
+                query["computed_at"] = {"$gte": datetime.utcnow() - timedelta(seconds=max_age)}
+            for row in self.collection.find(query, {"object_id": 1, "values": 1}):
+                rows[row["object_id"]] = row["values"]
+        return pd.DataFrame.from_dict(rows, orient="index", columns=FEATURE_COLUMNS)
+
+    def get_features(self, objects: List[dict]) -> pd.DataFrame:
+        ids = [str(obj["_id"]) for obj in objects]
+        X = self.read(ids, self.max_age)
+        missing = [obj for obj in objects if str(obj["_id"]) not in X.index]
+        frames = [X] if len(X) else []
+        for i in range(0, len(missing), self.batch_size):
+            chunk = missing[i:i + self.batch_size]
+            now = datetime.utcnow()
+            computed = self.pipeline.build(chunk, self.pipeline.access_stats([str(obj["_id"]) for obj in chunk], now), now)
+            self.write(computed, now)
+            frames.append(computed)
+        if len(frames) > 1:
+            X = pd.concat(frames)
+        elif frames:
+            X = frames[0]
+        X = X.reindex(ids)
+        X.index.name = "object_id"
+        return X
+
+    def mark_stale(self, object_ids: List[str]) -> int:
+        return self.collection.update_many({"_id": {"$in": [self._row_id(object_id) for object_id in object_ids]}}, {"$set": {"computed_at": datetime.min}}).modified_count
+
+    def evict(self, object_ids: List[str]) -> int:
+        return self.collection.delete_many({"_id": {"$in": [self._row_id(object_id) for object_id in object_ids]}}).deleted_count
+
+    def manifest(self) -> Dict:
+        return self.manifests.find_one({"_id": self.version}) or {}
+
+    def refresh(self) -> Dict:
+        start = time.time()
+        now = datetime.utcnow()
+        manifest = self.manifests.find_one({"_id": self.version})
+        upper = ObjectId.from_datetime(now - timedelta(seconds=5))
+        results = {"refreshed": 0, "evicted": 0, "full_build": manifest is None}
+        if manifest is None:
+            for objects, X in self.pipeline.iter_feature_frames(page_size=self.batch_size):
+                self.write(X)
+                results["refreshed"] += len(X)
+        else:
+            log_range = {"$gte": manifest["last_log_id"], "$lt": upper}
+            candidates = {str(row["_id"]) for row in self.db["access_logs"].aggregate([
+                {"$match": {"_id": log_range}},
+                {"$group": {"_id": "$data_object_id"}}
+            ], allowDiskUse=True)}
+            stale_before = now - timedelta(seconds=self.max_age)
+            candidates.update(row["object_id"] for row in self.collection.find(
+                {"version": self.version, "computed_at": {"$lt": stale_before}}, {"object_id": 1}
+            ))
+            candidates.update(str(obj["_id"]) for obj in self.db["data_objects"].find(
+                {"created_at": {"$gte": manifest["last_run_at"]}}, {"_id": 1}
+            ))
+            candidates = sorted(candidates)
+            for i in range(0, len(candidates), self.batch_size):
+                chunk = candidates[i:i + self.batch_size]
+                objects = list(self.db["data_objects"].find({"_id": {"$in": self._lookup_ids(chunk)}}, self.pipeline.projection))
+                found = {str(obj["_id"]) for obj in objects}
+                gone = [object_id for object_id in chunk if object_id not in found]
+                if gone:
+                    results["evicted"] += self.evict(gone)
+                if objects:
+                    chunk_now = datetime.utcnow()
+                    self.write(self.pipeline.build(objects, self.pipeline.access_stats(list(found), chunk_now), chunk_now), chunk_now)
+                    results["refreshed"] += len(objects)
+        rows = self.collection.count_documents({"version": self.version})
+        self.manifests.update_one({"_id": self.version}, {"$set": {
+            "columns": FEATURE_COLUMNS,
+            "window_days": self.pipeline.window_days,
+            "last_log_id": upper,
+            "last_run_at": now,
+            "rows": rows,
+            "updated_at": datetime.utcnow()
+        }}, upsert=True)
+        results["rows"] = rows
+        results["elapsed_seconds"] = round(time.time() - start, 2)
+        logging.info(f"Feature store {self.version} refreshed {results['refreshed']} rows, evicted {results['evicted']}")
+        return results
+
+    def start(self):
+        self.running = True
+        self.refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self.refresh_thread.start()
+        logging.info("Feature store refresher started")
+
+    def stop(self):
+        self.running = False
+        if self.refresh_thread:
+            self.refresh_thread.join(timeout=5)
+        logging.info("Feature store refresher stopped")
+
+    def _refresh_loop(self):
+        next_run = time.time() + settings.scheduled_job_poll_interval
+        while self.running:
+            if time.time() >= next_run:
+                ran = False
+                try:
+                    ran = run_exclusive(self.db, f"{self.LEASE_NAME}:{self.version}", self.refresh_interval, self.refresh)
+                except Exception as e:
+                    logging.error(f"Feature store refresh error: {str(e)}")
+                next_run = time.time() + (self.refresh_interval if ran else settings.scheduled_job_poll_interval)
+            time.sleep(1)
@@ -0,0 +1,78 @@
+import joblib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from typing import List, Optional
+
+MODEL_FILES = ("tier_model", "location_model", "scaler")
+
+class ModelBundle:
+    def __init__(self, version: str, tier_model, location_model, scaler):
+        self.version = version
+        self.tier_model = tier_model
+        self.location_model = location_model
+        self.scaler = scaler
+
+class ModelRegistry:
+    def __init__(self, model_path: str, keep_versions: int = 3):
+        self.model_path = model_path
+        self.versions_path = os.path.join(model_path, "versions")
+        self.pointer_path = os.path.join(model_path, "CURRENT")
+        self.keep_versions = keep_versions
+        os.makedirs(self.versions_path, exist_ok=True)
+
+    def list_versions(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.versions_path) if not name.startswith("."))
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(self.pointer_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def save(self, tier_model, location_model, scaler, metadata: dict = None) -> str:
+        version = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+        staging = os.path.join(self.versions_path, f".{version}")
+        os.makedirs(staging)
+        for name, model in zip(MODEL_FILES, (tier_model, location_model, scaler)):
+            joblib.dump(model, os.path.join(staging, f"{name}.joblib"), compress=0)
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump({"version": version, "created_at": datetime.utcnow().isoformat(), **(metadata or {})}, f)
+        os.rename(staging, os.path.join(self.versions_path, version))
+        self.promote(version)
+        self.prune()
+        return version
+
+    def promote(self, version: str):
+        if not os.path.isdir(os.path.join(self.versions_path, version)):
+            raise ValueError(f"Unknown model version {version}")
+        tmp_path = f"{self.pointer_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.pointer_path)
+
+    def load(self, version: str = None) -> ModelBundle:
+        version = version or self.current_version()
+        if version is None:
+            return self._load_legacy()
+        version_path = os.path.join(self.versions_path, version)
+        models = [joblib.load(os.path.join(version_path, f"{name}.joblib"), mmap_mode="r") for name in MODEL_FILES]
+        return ModelBundle(version, *models)
+
+    def _load_legacy(self) -> ModelBundle:
+        models = [joblib.load(os.path.join(self.model_path, f"{name}.pkl")) for name in MODEL_FILES]
+        return ModelBundle("legacy", *models)
+
+    def prune(self):
+        current = self.current_version()
+        for version in self.list_versions()[:-self.keep_versions]:
+            if version != current:
+                try:
+                    shutil.rmtree(os.path.join(self.versions_path, version))
+                except OSError as e:
+                    logging.warning(f"Could not remove model version {version}: {str(e)}")
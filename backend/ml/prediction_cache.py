@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import json
+import logging
+import threading
+import time
+from config.settings import settings
+
+INVALIDATION_CHANNEL = "prediction_cache:invalidate"
+
+class PredictionCache:
+    def __init__(self, redis_client=None, max_size: int = None, ttl: int = None, redis_ttl: int = None):
+        self.redis = redis_client
+        self.max_size = max_size or settings.prediction_cache_size
+        self.ttl = ttl or settings.prediction_cache_ttl
+        self.redis_ttl = redis_ttl or settings.prediction_cache_redis_ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0, "remote_invalidations": 0, "evictions": 0}
+        self.listening = False
+        self.listener_thread = None
+
+    def attach_redis(self, redis_client):
+        self.redis = redis_client
+
+    def _redis_key(self, object_id: str) -> str:
+        return f"prediction:{object_id}"
+
+    def get(self, object_id: str, version: str) -> Optional[Tuple[str, str, float]]:
+        object_id = str(object_id)
+        with self.lock:
+            entry = self.entries.get(object_id)
+            if entry is not None:
+                entry_version, value, expires_at = entry
+                if entry_version == version and expires_at > time.time():
+                    self.entries.move_to_end(object_id)
+                    self.counters["hits"] += 1
+                    return value
+                del self.entries[object_id]
+        if self.redis:
+            try:
+                cached = self.redis.hget(self._redis_key(object_id), version)
+            except Exception as e:
+                logging.warning(f"Prediction cache Redis read failed: {str(e)}")
+                cached = None
+            if cached:
+                value = tuple(json.loads(cached))
+                self._store(object_id, version, value)
+                with self.lock:
+                    self.counters["redis_hits"] += 1
+                return value
+        with self.lock:
+            self.counters["misses"] += 1
+        return None
+
+    def set(self, object_id: str, version: str, value: Tuple[str, str, float]):
+        object_id = str(object_id)
+        self._store(object_id, version, value)
+        if self.redis:
+            key = self._redis_key(object_id)
+            try:
+                pipe = self.redis.pipeline()
+                pipe.delete(key)
+                pipe.hset(key, version, json.dumps(list(value)))
+                pipe.expire(key, self.redis_ttl)
+                pipe.execute()
+            except Exception as e:
+                logging.warning(f"Prediction cache Redis write failed: {str(e)}")
+
+    def _store(self, object_id: str, version: str, value: Tuple[str, str, float]):
+        with self.lock:
+            self.entries[object_id] = (version, value, time.time() + self.ttl)
+            self.entries.move_to_end(object_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(self, object_id: str):
+        object_id = str(object_id)
+        with self.lock:
+            self.entries.pop(object_id, None)
+            self.counters["invalidations"] += 1
+        if self.redis:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.delete(self._redis_key(object_id))
+                pipe.publish(INVALIDATION_CHANNEL, object_id)
+                pipe.execute()
+            except Exception as e:
+                logging.warning(f"Prediction cache Redis invalidation failed: {str(e)}")
+
+    def _drop(self, object_id):
+        if isinstance(object_id, bytes):
+            object_id = object_id.decode()
+        with self.lock:
+            if self.entries.pop(object_id, None) is not None:
+                self.counters["remote_invalidations"] += 1
+
+    def start_listener(self):
+        if not self.redis or self.listening:
+            return
+        self.listening = True
+        self.listener_thread = threading.Thread(target=self._listen, daemon=True)
+        self.listener_thread.start()
+
+    def stop_listener(self):
+        self.listening = False
+        if self.listener_thread:
+            self.listener_thread.join(timeout=5)
+            self.listener_thread = None
+
+    def _listen(self):
+        while self.listening:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                with self.lock:
+                    self.entries.clear()
+                while self.listening:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        self._drop(message["data"])
+                pubsub.close()
+            except Exception as e:
+                logging.warning(f"Prediction cache invalidation listener error: {str(e)}")
+                time.sleep(1)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            counters = dict(self.counters)
+            size = len(self.entries)
+        lookups = counters["hits"] + counters["redis_hits"] + counters["misses"]
+        return {
+            **counters,
+            "size": size,
+            "max_size": self.max_size,
+            "hit_rate": round((counters["hits"] + counters["redis_hits"]) / lookups, 4) if lookups else 0.0,
+            "redis_enabled": self.redis is not None
+        }
+
+prediction_cache = PredictionCache()
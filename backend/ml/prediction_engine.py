@@ -2,79 +2,83 @@ import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
-import joblib
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Tuple
+from typing import Dict, Iterator, List, Tuple
 import os
+from config.settings import settings
+from .feature_pipeline import FeaturePipeline, FEATURE_COLUMNS
+from .feature_store import FeatureStore
+from .model_registry import ModelBundle, ModelRegistry
+from .prediction_cache import prediction_cache
 
 class MLPredictionEngine:
     def __init__(self, db, model_path: str):
         self.db = db
         self.model_path = model_path
-        self.tier_model = None
-        self.location_model = None
-        self.scaler = StandardScaler()
+        self._bundle = None
         self.tier_mapping = {"hot": 0, "warm": 1, "cold": 2}
         self.reverse_tier_mapping = {v: k for k, v in self.tier_mapping.items()}
         self.location_mapping = {"on-premise": 0, "aws": 1, "azure": 2, "gcp": 3}
         self.reverse_location_mapping = {v: k for k, v in self.location_mapping.items()}
+        self.feature_pipeline = FeaturePipeline(db)
+        self.feature_store = FeatureStore(db, self.feature_pipeline) if settings.feature_store_enabled else None
         self._ensure_model_dir()
+        self.registry = ModelRegistry(model_path)
+        self.watch_interval = settings.ml_model_watch_interval
+        self.watching = False
+        self.watcher_thread = None
+        self.cache = prediction_cache if settings.prediction_cache_enabled else None
     
     def _ensure_model_dir(self):
         os.makedirs(self.model_path, exist_ok=True)
     
+    @property
+    def model_version(self):
+        bundle = self._bundle
+        return bundle.version if bundle else None
+    
+    @property
+    def tier_model(self):
+        bundle = self._bundle
+        return bundle.tier_model if bundle else None
+    
+    @property
+    def location_model(self):
+        bundle = self._bundle
+        return bundle.location_model if bundle else None
+    
+    @property
+    def scaler(self):
+        bundle = self._bundle
+        return bundle.scaler if bundle else None
+    
+    def _features_for(self, objects: List[dict]) -> pd.DataFrame:
+        if self.feature_store:
+            return self.feature_store.get_features(objects)
+        now = datetime.utcnow()
+        return self.feature_pipeline.build(objects, self.feature_pipeline.access_stats([str(obj["_id"]) for obj in objects], now), now)
+    
     def prepare_training_data(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        objects = list(self.db["data_objects"].find())
+        if self.feature_store:
+            objects = self.feature_pipeline.load_objects()
+            X = self.feature_store.get_features(objects)
+        else:
+            objects, X = self.feature_pipeline.extract(restrict_logs=False)
         if len(objects) < 10:
             logging.warning("Insufficient data for training (need at least 10 objects)")
             return None, None
-        features_list = []
-        tier_labels = []
-        location_labels = []
-        for obj in objects:
-            features = self._extract_features(obj["_id"])
-            if features is not None:
-                features_list.append(features)
-                tier_labels.append(self.tier_mapping.get(obj["current_tier"], 1))
-                location_labels.append(self.location_mapping.get(obj["current_location"], 0))
-        if not features_list:
-            return None, None
-        X = pd.DataFrame(features_list)
-        y_tier = pd.Series(tier_labels)
-        y_location = pd.Series(location_labels)
-        return X, (y_tier, y_location)
+        y_tier = pd.Series([self.tier_mapping.get(obj.get("current_tier"), 1) for obj in objects])
+        y_location = pd.Series([self.location_mapping.get(obj.get("current_location"), 0) for obj in objects])
+        return X.reset_index(drop=True), (y_tier, y_location)
     
     def _extract_features(self, object_id: str) -> Dict:
-        obj = self.db["data_objects"].find_one({"_id": object_id})
-        if not obj:
+        objects = self.feature_pipeline.load_objects({"_id": object_id}, limit=1)
+        if not objects:
             return None
-        logs = list(self.db["access_logs"].find(
-            {"data_object_id": object_id}
-        ).sort("timestamp", -1).limit(100))
-        if not logs:
-            return {
-                "size_gb": obj.get("size_bytes", 0) / (1024**3),
-                "access_count": 0,
-                "avg_latency": 100.0,
-                "access_per_day": 0.0,
-                "days_since_creation": (datetime.utcnow() - obj.get("created_at", datetime.utcnow())).days,
-                "days_since_last_access": 999
-            }
-        recent_period = datetime.utcnow() - timedelta(days=7)
-        recent_logs = [log for log in logs if log["timestamp"] >= recent_period]
-        access_per_day = len(recent_logs) / 7.0
-        avg_latency = sum(log.get("latency_ms", 100) for log in recent_logs) / max(len(recent_logs), 1)
-        days_since_last = (datetime.utcnow() - obj.get("last_accessed", datetime.utcnow())).days
-        days_since_creation = (datetime.utcnow() - obj.get("created_at", datetime.utcnow())).days
-        return {
-            "size_gb": obj.get("size_bytes", 0) / (1024**3),
-            "access_count": obj.get("access_count", 0),
-            "avg_latency": avg_latency,
-            "access_per_day": access_per_day,
-            "days_since_creation": days_since_creation,
-            "days_since_last_access": days_since_last
-        }
+        return self._features_for(objects).iloc[0].to_dict()
     
     def train_models(self):
         X, y = self.prepare_training_data()
@@ -82,78 +86,142 @@ class MLPredictionEngine:
             logging.warning("Skipping model training due to insufficient data")
             return False
         y_tier, y_location = y
-        X_scaled = self.scaler.fit_transform(X)
-        self.tier_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.tier_model.fit(X_scaled, y_tier)
-        self.location_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.location_model.fit(X_scaled, y_location)
-        self._save_models()
-        logging.info("ML models trained successfully")
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        tier_model = RandomForestClassifier(n_estimators=100, random_state=42)
+        tier_model.fit(X_scaled, y_tier)
+        location_model = RandomForestClassifier(n_estimators=100, random_state=42)
+        location_model.fit(X_scaled, y_location)
+        version = self.registry.save(tier_model, location_model, scaler, {"samples": len(X), "feature_columns": FEATURE_COLUMNS})
+        self._bundle = ModelBundle(version, tier_model, location_model, scaler)
+        logging.info(f"ML models trained successfully (version {version})")
         return True
     
-    def _save_models(self):
-        joblib.dump(self.tier_model, f"{self.model_path}/tier_model.pkl")
-        joblib.dump(self.location_model, f"{self.model_path}/location_model.pkl")
-        joblib.dump(self.scaler, f"{self.model_path}/scaler.pkl")
-    
-    def load_models(self):
+    def load_models(self, version: str = None):
         try:
-            self.tier_model = joblib.load(f"{self.model_path}/tier_model.pkl")
-            self.location_model = joblib.load(f"{self.model_path}/location_model.pkl")
-            self.scaler = joblib.load(f"{self.model_path}/scaler.pkl")
-            logging.info("ML models loaded successfully")
+            self._bundle = self.registry.load(version)
+            logging.info(f"ML models loaded successfully (version {self._bundle.version})")
             return True
         except Exception as e:
             logging.warning(f"Could not load models: {str(e)}")
             return False
     
+    def warm_up(self) -> bool:
+        if self._bundle is None and not self.load_models():
+            return False
+        start = time.time()
+        self._predict_matrix(pd.DataFrame([[0.0] * len(FEATURE_COLUMNS)], columns=FEATURE_COLUMNS))
+        logging.info(f"ML models warmed up in {time.time() - start:.3f}s (version {self.model_version})")
+        return True
+    
+    def check_for_update(self) -> bool:
+        version = self.registry.current_version()
+        if version is None or version == self.model_version:
+            return False
+        try:
+            bundle = self.registry.load(version)
+            self._predict_matrix(pd.DataFrame([[0.0] * len(FEATURE_COLUMNS)], columns=FEATURE_COLUMNS), bundle)
+        except Exception as e:
+            logging.error(f"Could not swap to model version {version}: {str(e)}")
+            return False
+        self._bundle = bundle
+        logging.info(f"Swapped ML models to version {version}")
+        return True
+    
+    def start_watcher(self):
+        self.watching = True
+        self.watcher_thread = threading.Thread(target=self._watch_loop, daemon=True)
+        self.watcher_thread.start()
+        logging.info("ML model watcher started")
+    
+    def stop_watcher(self):
+        self.watching = False
+        if self.watcher_thread:
+            self.watcher_thread.join(timeout=5)
+        logging.info("ML model watcher stopped")
+    
+    def _watch_loop(self):
+        next_check = time.time() + self.watch_interval
+        while self.watching:
+            if time.time() >= next_check:
+                self.check_for_update()
+                next_check = time.time() + self.watch_interval
+            time.sleep(1)
+    
     def predict_optimal_placement(self, object_id: str) -> Tuple[str, str, float]:
-        if not self.tier_model or not self.location_model:
+        if self._bundle is None:
             if not self.load_models():
                 return "warm", "on-premise", 0.5
+        bundle = self._bundle
+        if self.cache:
+            cached = self.cache.get(object_id, bundle.version)
+            if cached:
+                return cached
         features = self._extract_features(object_id)
         if not features:
             return "warm", "on-premise", 0.5
-        X = pd.DataFrame([features])
-        X_scaled = self.scaler.transform(X)
-        tier_pred = self.tier_model.predict(X_scaled)[0]
-        tier_proba = self.tier_model.predict_proba(X_scaled)[0]
-        location_pred = self.location_model.predict(X_scaled)[0]
-        location_proba = self.location_model.predict_proba(X_scaled)[0]
-        predicted_tier = self.reverse_tier_mapping.get(tier_pred, "warm")
-        predicted_location = self.reverse_location_mapping.get(location_pred, "on-premise")
-        confidence = (max(tier_proba) + max(location_proba)) / 2.0
-        return predicted_tier, predicted_location, confidence
-    
-    def batch_predict(self, limit: int = 100) -> Dict:
-        objects = list(self.db["data_objects"].find().limit(limit))
-        predictions = []
-        for obj in objects:
+        tiers, locations, confidence = self._predict_matrix(pd.DataFrame([features], columns=FEATURE_COLUMNS), bundle)
+        prediction = (str(tiers[0]), str(locations[0]), float(confidence[0]))
+        if self.cache:
+            self.cache.set(object_id, bundle.version, prediction)
+        return prediction
+    
+    def _predict_matrix(self, X: pd.DataFrame, bundle: ModelBundle = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        bundle = bundle or self._bundle
+        X_scaled = bundle.scaler.transform(X)
+        tier_proba = bundle.tier_model.predict_proba(X_scaled)
+        location_proba = bundle.location_model.predict_proba(X_scaled)
+        tier_labels = np.array([self.reverse_tier_mapping.get(c, "warm") for c in bundle.tier_model.classes_], dtype=object)
+        location_labels = np.array([self.reverse_location_mapping.get(c, "on-premise") for c in bundle.location_model.classes_], dtype=object)
+        tiers = tier_labels[tier_proba.argmax(axis=1)]
+        locations = location_labels[location_proba.argmax(axis=1)]
+        confidence = (tier_proba.max(axis=1) + location_proba.max(axis=1)) / 2.0
+        return tiers, locations, confidence
+    
+    def iter_batch_predictions(self, query: Dict = None, chunk_size: int = 10000, limit: int = 0, only_changed: bool = True) -> Iterator[List[Dict]]:
+        if self._bundle is None:
+            self.load_models()
+        for objects in self.feature_pipeline.iter_pages(query, chunk_size, limit):
             try:
-                tier, location, confidence = self.predict_optimal_placement(obj["_id"])
-                if tier != obj["current_tier"] or location != obj["current_location"]:
-                    predictions.append({
-                        "object_id": obj["_id"],
-                        "name": obj["name"],
-                        "current_tier": obj["current_tier"],
-                        "current_location": obj["current_location"],
-                        "predicted_tier": tier,
-                        "predicted_location": location,
-                        "confidence": round(confidence, 2)
-                    })
+                X = self._features_for(objects)
+                bundle = self._bundle
+                if bundle:
+                    tiers, locations, confidence = self._predict_matrix(X, bundle)
+                else:
+                    tiers = np.full(len(objects), "warm", dtype=object)
+                    locations = np.full(len(objects), "on-premise", dtype=object)
+                    confidence = np.full(len(objects), 0.5)
             except Exception as e:
-                logging.error(f"Prediction error for {obj['_id']}: {str(e)}")
+                logging.error(f"Prediction error for chunk starting at {objects[0]['_id']}: {str(e)}")
+                continue
+            current_tiers = np.array([obj.get("current_tier") for obj in objects], dtype=object)
+            current_locations = np.array([obj.get("current_location") for obj in objects], dtype=object)
+            selected = (tiers != current_tiers) | (locations != current_locations) if only_changed else np.ones(len(objects), dtype=bool)
+            yield [{
+                "object_id": objects[i]["_id"],
+                "name": objects[i].get("name"),
+                "current_tier": current_tiers[i],
+                "current_location": current_locations[i],
+                "predicted_tier": tiers[i],
+                "predicted_location": locations[i],
+                "confidence": round(float(confidence[i]), 2)
+            } for i in np.flatnonzero(selected)]
+    
+    def batch_predict(self, limit: int = 100, chunk_size: int = 10000) -> Dict:
+        predictions = []
+        for chunk in self.iter_batch_predictions(chunk_size=chunk_size, limit=limit):
+            predictions.extend(chunk)
         return {
             "predictions": sorted(predictions, key=lambda x: x["confidence"], reverse=True),
             "count": len(predictions)
         }
     
     def get_feature_importance(self) -> Dict:
-        if not self.tier_model:
+        bundle = self._bundle
+        if not bundle:
             return {}
-        feature_names = ["size_gb", "access_count", "avg_latency", "access_per_day", "days_since_creation", "days_since_last_access"]
-        tier_importance = dict(zip(feature_names, self.tier_model.feature_importances_))
-        location_importance = dict(zip(feature_names, self.location_model.feature_importances_))
+        tier_importance = dict(zip(FEATURE_COLUMNS, bundle.tier_model.feature_importances_))
+        location_importance = dict(zip(FEATURE_COLUMNS, bundle.location_model.feature_importances_))
         return {
             "tier_prediction": {k: round(v, 3) for k, v in tier_importance.items()},
             "location_prediction": {k: round(v, 3) for k, v in location_importance.items()}
@@ -1,11 +1,11 @@
 from .data_object import DataObject, DataObjectCreate, DataObjectUpdate, DataObjectMetadata
-from .migration_job import MigrationJob, MigrationJobCreate, MigrationJobUpdate
+from .migration_job import MigrationJob, MigrationJobCreate, MigrationJobUpdate, MigrationBatchCreate
 from .access_log import AccessLog, AccessLogCreate
 from .policy import StoragePolicy, PolicyCreate, PolicyUpdate, PolicyRules, AlertThresholds
 
 __all__ = [
     'DataObject', 'DataObjectCreate', 'DataObjectUpdate', 'DataObjectMetadata',
-    'MigrationJob', 'MigrationJobCreate', 'MigrationJobUpdate',
+    'MigrationJob', 'MigrationJobCreate', 'MigrationJobUpdate', 'MigrationBatchCreate',
     'AccessLog', 'AccessLogCreate',
     'StoragePolicy', 'PolicyCreate', 'PolicyUpdate', 'PolicyRules', 'AlertThresholds'
 ]
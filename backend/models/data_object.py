@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from bson import ObjectId
 
@@ -25,6 +25,7 @@ class DataObject(BaseModel):
     access_policy_id: Optional[str] = None
     predicted_tier: Optional[str] = None
     cost_per_month: float = 0.0
+    compression: Optional[Dict] = None
     url: str = ""
     
     class Config:
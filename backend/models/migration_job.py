@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from datetime import datetime
 from bson import ObjectId
 
@@ -21,6 +21,9 @@ class MigrationJob(BaseModel):
     estimated_completion: Optional[datetime] = None
     error_message: str = ""
     retry_count: int = 0
+    worker_id: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    lease_recoveries: int = 0
     rollback_available: bool = True
     created_by: str = "system"
     metadata: Dict = Field(default_factory=dict)
@@ -35,6 +38,15 @@ class MigrationJobCreate(BaseModel):
     target_tier: str
     priority: int = 5
 
+class MigrationBatchCreate(BaseModel):
+    target_location: str
+    target_tier: Optional[str] = None
+    object_ids: Optional[List[str]] = None
+    tier: Optional[str] = None
+    location: Optional[str] = None
+    tags: Optional[List[str]] = None
+    priority: int = 5
+
 class MigrationJobUpdate(BaseModel):
     status: Optional[str] = None
     bytes_transferred: Optional[int] = None
@@ -1,3 +1,10 @@
-from .migration_orchestrator import MigrationOrchestrator
+from .migration_orchestrator import MigrationOrchestrator, notify_job_enqueued, MIGRATION_QUEUE_CHANNEL
+from .progress_aggregator import ProgressAggregator, ProgressGate
+from .queue_stats import QueueStats, shared_queue_stats
+from .scheduler import RouteThroughputModel, SchedulingPolicy, PriorityFifoPolicy, ShortestExpectedJobFirstPolicy, create_policy, register_policy
+from .scheduler_simulator import simulate, compare_policies, load_job_log
+from .migration_runner import MigrationRunner
 
-__all__ = ['MigrationOrchestrator']
+__all__ = ['MigrationOrchestrator', 'notify_job_enqueued', 'MIGRATION_QUEUE_CHANNEL', 'ProgressAggregator', 'ProgressGate', 'QueueStats', 'shared_queue_stats',
+           'RouteThroughputModel', 'SchedulingPolicy', 'PriorityFifoPolicy', 'ShortestExpectedJobFirstPolicy', 'create_policy', 'register_policy',
+           'simulate', 'compare_policies', 'load_job_log', 'MigrationRunner']
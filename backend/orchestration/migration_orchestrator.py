@@ -1,46 +1,288 @@
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import logging
+import os
+import socket
 import time
 import threading
-from typing import Optional
+import uuid
+from typing import Dict, Optional, Tuple
+import numpy as np
 import random
+from bson import ObjectId
+from config.settings import settings
+from engines.opportunity_index import OpportunityIndex
+from ml.prediction_cache import prediction_cache
+from services.cloud import ChunkedTransferEngine, AdapterSource, TransferInterrupted
+from services.cloud.client_cache import client_cache
+from .progress_aggregator import ProgressAggregator
+from .queue_stats import ensure_queue_indexes, shared_queue_stats
+from .scheduler import RouteThroughputModel, PriorityFifoPolicy, create_policy, route_key, remaining_bytes
+from services.metrics.performance_tracker import performance_tracker
+from services.deduplication.hash_manager import hash_manager
+from services.deduplication.chunk_store import DedupSource
+from services.compression.pipeline import billable_bytes, choose_codec, stage_source
+
+MIGRATION_QUEUE_CHANNEL = "migration_queue:wakeup"
+
+def notify_job_enqueued(redis_client, job_id: str = ""):
+    if redis_client:
+        try:
+            redis_client.publish(MIGRATION_QUEUE_CHANNEL, job_id)
+        except Exception as e:
+            logging.warning(f"Could not publish migration queue wakeup: {str(e)}")
 
 class MigrationOrchestrator:
-    def __init__(self, db, kafka_producer):
+    def __init__(self, db, kafka_producer, max_concurrency: int = None, destination_limits: Dict[str, int] = None, redis_client=None):
         self.db = db
         self.kafka = kafka_producer
+        self.redis = redis_client
         self.running = False
         self.worker_thread = None
+        self.opportunity_index = OpportunityIndex(db)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.max_concurrency = max_concurrency or settings.migration_max_concurrency
+        self.destination_limits = destination_limits if destination_limits is not None else settings.migration_destination_limits_map
+        self.lease_seconds = settings.migration_lease_seconds
+        self.heartbeat_interval = settings.migration_heartbeat_interval
+        self.reaper_interval = settings.migration_reaper_interval
+        self.lease_thread = None
+        self.notify_thread = None
+        self.change_stream_active = False
+        self.start_latencies = deque(maxlen=10000)
+        self.transfer_engine = ChunkedTransferEngine(db["migration_jobs"])
+        self.progress = ProgressAggregator(db["migration_jobs"], kafka_producer)
+        self.lost_jobs = set()
+        self.queue_stats = shared_queue_stats(db["migration_jobs"])
+        self.throughput_model = RouteThroughputModel(db)
+        self.policy = create_policy(settings.migration_scheduler_policy, self.throughput_model)
+        self.candidate_window = settings.scheduler_candidate_window
+        self.executor = None
+        self.active_jobs = {}
+        self.active_lock = threading.Lock()
+        self.wakeup = threading.Event()
+    
+    def ensure_indexes(self):
+        collection = self.db["migration_jobs"]
+        ensure_queue_indexes(collection)
+        collection.create_index([("status", 1), ("lease_expires_at", 1)])
+        collection.create_index("job_id")
     
     def start(self):
+        try:
+            self.ensure_indexes()
+        except Exception as e:
+            logging.warning(f"Could not create migration job indexes: {str(e)}")
         self.running = True
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="migration-worker")
+        self.progress.start()
         self.worker_thread = threading.Thread(target=self._process_queue, daemon=True)
         self.worker_thread.start()
-        logging.info("Migration orchestrator started")
+        self.lease_thread = threading.Thread(target=self._lease_loop, daemon=True)
+        self.lease_thread.start()
+        self.notify_thread = threading.Thread(target=self._listen_for_jobs, daemon=True)
+        self.notify_thread.start()
+        logging.info(f"Migration orchestrator {self.worker_id} started with {self.max_concurrency} workers")
     
     def stop(self):
         self.running = False
+        self.wakeup.set()
         if self.worker_thread:
             self.worker_thread.join(timeout=5)
+        if self.executor:
+            self.executor.shutdown(wait=True)
+        if self.lease_thread:
+            self.lease_thread.join(timeout=5)
+        if self.notify_thread:
+            self.notify_thread.join(timeout=5)
+        self.progress.stop()
         logging.info("Migration orchestrator stopped")
     
+    def _claim_query(self) -> Optional[dict]:
+        with self.active_lock:
+            if len(self.active_jobs) >= self.max_concurrency:
+                return None
+            running = {}
+            for location, _ in self.active_jobs.values():
+                running[location] = running.get(location, 0) + 1
+        query = {"status": "pending", "job_id": {"$exists": True}}
+        full = [location for location, limit in self.destination_limits.items() if running.get(location, 0) >= limit]
+        if full:
+            query["target_location"] = {"$nin": full}
+        return query
+    
+    def _listen_for_jobs(self):
+        pipeline = [{"$match": {"$or": [
+            {"operationType": "insert", "fullDocument.status": "pending", "fullDocument.job_id": {"$exists": True}},
+            {"operationType": "update", "updateDescription.updatedFields.status": "pending"}
+        ]}}]
+        try:
+            with self.db["migration_jobs"].watch(pipeline, max_await_time_ms=1000) as stream:
+                self.change_stream_active = True
+                logging.info("Migration queue listening on change stream")
+                while self.running and stream.alive:
+                    if stream.try_next() is not None:
+                        self.wakeup.set()
+            return
+        except Exception as e:
+            logging.info(f"Migration queue change stream unavailable: {str(e)}")
+        finally:
+            self.change_stream_active = False
+        if not self.redis:
+            logging.info(f"Migration queue falling back to polling every {settings.migration_poll_interval}s")
+            return
+        try:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(MIGRATION_QUEUE_CHANNEL)
+            logging.info(f"Migration queue listening on Redis channel {MIGRATION_QUEUE_CHANNEL}")
+            while self.running:
+                if pubsub.get_message(timeout=1.0):
+                    self.wakeup.set()
+            pubsub.close()
+        except Exception as e:
+            logging.error(f"Migration queue Redis listener error: {str(e)}")
+    
+    def _poll_interval(self) -> int:
+        return settings.migration_fallback_poll_interval if self.change_stream_active else settings.migration_poll_interval
+    
+    def _annotate_claim(self, job: dict, started_at: datetime):
+        fields = {"estimated_completion": self.throughput_model.estimated_completion(job, started_at)}
+        queued_at = job.get("queued_at") or job.get("created_at")
+        if queued_at:
+            wait_ms = max((started_at - queued_at).total_seconds() * 1000, 0.0)
+            self.start_latencies.append(wait_ms)
+            fields["queue_wait_ms"] = round(wait_ms, 2)
+        job.update(fields)
+        self.db["migration_jobs"].update_one({"job_id": job["job_id"]}, {"$set": fields})
+    
+    def get_start_latency_stats(self) -> dict:
+        if not self.start_latencies:
+            return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        samples = np.fromiter(self.start_latencies, dtype=np.float64)
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        return {
+            "count": len(samples),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(samples.max()), 2)
+        }
+    
+    def _running_routes(self) -> Dict[str, int]:
+        with self.active_lock:
+            routes = {}
+            for _, route in self.active_jobs.values():
+                routes[route] = routes.get(route, 0) + 1
+        return routes
+    
+    def _claim_job(self) -> Optional[dict]:
+        query = self._claim_query()
+        if query is None:
+            return None
+        now = datetime.utcnow()
+        claim = {"$set": {
+            "status": "in_progress",
+            "start_time": now,
+            "worker_id": self.worker_id,
+            "lease_expires_at": now + timedelta(seconds=self.lease_seconds)
+        }}
+        if isinstance(self.policy, PriorityFifoPolicy) and not self.policy.route_caps:
+            job = self.db["migration_jobs"].find_one_and_update(
+                query,
+                claim,
+                sort=[("priority", -1), ("created_at", 1)],
+                return_document=True
+            )
+        else:
+            job = None
+            candidates = list(self.db["migration_jobs"].find(query).sort([("priority", -1), ("created_at", 1)]).limit(self.candidate_window))
+            for candidate in self.policy.order(candidates, now, self._running_routes()):
+                job = self.db["migration_jobs"].find_one_and_update({"_id": candidate["_id"], "status": "pending"}, claim, return_document=True)
+                if job:
+                    break
+        if job:
+            self.queue_stats.record_transition("pending", "in_progress")
+            self._annotate_claim(job, now)
+        return job
+    
     def _process_queue(self):
         while self.running:
             try:
-                pending_job = self.db["migration_jobs"].find_one_and_update(
-                    {"status": "pending"},
-                    {"$set": {"status": "in_progress", "start_time": datetime.utcnow()}},
-                    sort=[("priority", -1), ("created_at", 1)],
-                    return_document=True
-                )
+                self.wakeup.clear()
+                pending_job = self._claim_job()
                 if pending_job:
-                    self._execute_migration(pending_job)
+                    with self.active_lock:
+                        self.active_jobs[pending_job["job_id"]] = (pending_job["target_location"], route_key(pending_job.get("source_location"), pending_job["target_location"]))
+                    self.executor.submit(self._run_job, pending_job)
                 else:
-                    time.sleep(5)
+                    self.wakeup.wait(self._poll_interval())
             except Exception as e:
                 logging.error(f"Queue processing error: {str(e)}")
                 time.sleep(10)
     
+    def _run_job(self, job: dict):
+        job["_run_started"] = time.time()
+        job["_run_bytes"] = remaining_bytes(job)
+        try:
+            self._execute_migration(job)
+        finally:
+            self.progress.discard(job["job_id"])
+            with self.active_lock:
+                self.active_jobs.pop(job["job_id"], None)
+                self.lost_jobs.discard(job["job_id"])
+            self.wakeup.set()
+    
+    def heartbeat(self) -> int:
+        with self.active_lock:
+            job_ids = list(self.active_jobs)
+        if not job_ids:
+            return 0
+        owned = {"job_id": {"$in": job_ids}, "worker_id": self.worker_id, "status": "in_progress"}
+        result = self.db["migration_jobs"].update_many(
+            owned,
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+        )
+        if result.matched_count < len(job_ids):
+            still_owned = {job["job_id"] for job in self.db["migration_jobs"].find(owned, {"job_id": 1})}
+            with self.active_lock:
+                self.lost_jobs.update(job_id for job_id in job_ids if job_id not in still_owned)
+        return result.modified_count
+    
+    def reap_expired_leases(self) -> int:
+        result = self.db["migration_jobs"].update_many(
+            {"status": "in_progress", "lease_expires_at": {"$lt": datetime.utcnow()}},
+            {
+                "$set": {"status": "pending", "queued_at": datetime.utcnow()},
+                "$unset": {"worker_id": "", "lease_expires_at": ""},
+                "$inc": {"lease_recoveries": 1}
+            }
+        )
+        if result.modified_count:
+            self.queue_stats.record_transition("in_progress", "pending", result.modified_count)
+            notify_job_enqueued(self.redis)
+            logging.warning(f"Recovered {result.modified_count} migration jobs with expired leases")
+        return result.modified_count
+    
+    def _lease_loop(self):
+        next_heartbeat = time.time()
+        next_reap = time.time()
+        while self.running:
+            now = time.time()
+            try:
+                if now >= next_heartbeat:
+                    self.heartbeat()
+                    next_heartbeat = now + self.heartbeat_interval
+                if now >= next_reap:
+                    self.reap_expired_leases()
+                    next_reap = now + self.reaper_interval
+            except Exception as e:
+                logging.error(f"Migration lease maintenance error: {str(e)}")
+            time.sleep(1)
+    
+    def _owned(self, job_id: str) -> dict:
+        return {"job_id": job_id, "worker_id": self.worker_id, "status": "in_progress"}
+    
     def _execute_migration(self, job: dict):
         job_id = job["job_id"]
         try:
@@ -49,99 +291,177 @@ class MigrationOrchestrator:
             if not data_obj:
                 self._fail_job(job_id, "Data object not found")
                 return
+            if data_obj.get("cloud_url"):
+                try:
+                    cloud_url, compression = self._transfer_object(job, data_obj)
+                except TransferInterrupted as e:
+                    logging.warning(f"Migration job {job_id} transfer interrupted: {str(e)}")
+                    if not self.running:
+                        self._release_job(job_id)
+                    return
+                if self._complete_migration(job, cloud_url, compression) and data_obj.get("dedup"):
+                    self._release_dedup(data_obj)
+                return
             total_bytes = job["total_bytes"]
-            transferred = 0
+            transferred = min(job.get("bytes_transferred") or 0, total_bytes)
+            if transferred:
+                logging.info(f"Resuming migration job {job_id} from byte {transferred}/{total_bytes}")
             chunk_size = max(total_bytes // 10, 1024 * 1024)
             while transferred < total_bytes and self.running:
                 transfer_amount = min(chunk_size, total_bytes - transferred)
                 time.sleep(random.uniform(0.1, 0.5))
                 transferred += transfer_amount
-                progress = (transferred / total_bytes) * 100
-                self.db["migration_jobs"].update_one(
-                    {"job_id": job_id},
-                    {"$set": {
-                        "bytes_transferred": transferred,
-                        "progress_percentage": progress
-                    }}
-                )
-                self.kafka.send_migration_event(job_id, "in_progress", progress, job["data_object_id"])
+                if job_id in self.lost_jobs:
+                    logging.warning(f"Migration job {job_id} is no longer owned by {self.worker_id}, abandoning")
+                    return
+                self.progress.report(job_id, job["data_object_id"], transferred, (transferred / total_bytes) * 100, self._owned(job_id))
             if transferred >= total_bytes:
                 self._complete_migration(job)
             else:
-                self._fail_job(job_id, "Migration interrupted")
+                self._release_job(job_id)
         except Exception as e:
             logging.error(f"Migration execution error for job {job_id}: {str(e)}")
             self._fail_job(job_id, str(e))
     
-    def _complete_migration(self, job: dict):
+    def _source_adapter(self, data_obj: dict):
+        credential_id = data_obj.get("credential_id")
+        if not credential_id:
+            return client_cache.default_adapter(data_obj["current_location"])
+        credential = self.db["cloud_credentials"].find_one({"_id": ObjectId(credential_id)})
+        if not credential:
+            raise ValueError(f"Credential {credential_id} for data object {data_obj['_id']} no longer exists")
+        return client_cache.get_adapter(credential)
+    
+    def _transfer_object(self, job: dict, data_obj: dict) -> Tuple[str, dict]:
         job_id = job["job_id"]
-        self.db["migration_jobs"].update_one(
-            {"job_id": job_id},
+        source_adapter = self._source_adapter(data_obj)
+        if data_obj.get("dedup"):
+            source = DedupSource(hash_manager.chunk_store(data_obj.get("user_id", "system"), source_adapter, self.db), str(data_obj["_id"]))
+        else:
+            source = AdapterSource(source_adapter, data_obj["cloud_url"], billable_bytes(data_obj) or job["total_bytes"])
+        codec = job.get("compression_codec")
+        if codec is None:
+            codec = choose_codec(source, data_obj, job["target_tier"]) or ""
+            self.db["migration_jobs"].update_one(self._owned(job_id), {"$set": {"compression_codec": codec}})
+        staged, compression = stage_source(source, data_obj, job["target_tier"], codec)
+        destination = f"cloudflow/{data_obj.get('user_id', 'system')}/{data_obj['name']}"
+        def on_progress(transferred: int, total: int):
+            self.progress.report(job_id, job["data_object_id"], None, (transferred / total) * 100 if total else 100.0, self._owned(job_id))
+        try:
+            cloud_url = self.transfer_engine.transfer(
+                self._owned(job_id),
+                staged,
+                client_cache.default_adapter(job["target_location"]),
+                destination,
+                on_progress=on_progress,
+                should_continue=lambda: self.running and job_id not in self.lost_jobs
+            )
+        finally:
+            if staged is not source:
+                staged.close()
+        return cloud_url, compression
+    
+    def _release_dedup(self, data_obj: dict):
+        try:
+            hash_manager.chunk_store(data_obj.get("user_id", "system"), db=self.db).release(str(data_obj["_id"]))
+            self.db["data_objects"].update_one({"_id": data_obj["_id"]}, {"$set": {"dedup": False}})
+        except Exception as e:
+            logging.warning(f"Could not release chunk references for {data_obj['_id']}: {str(e)}")
+    
+    def _complete_migration(self, job: dict, cloud_url: str = None, compression: dict = None) -> bool:
+        job_id = job["job_id"]
+        result = self.db["migration_jobs"].update_one(
+            self._owned(job_id),
             {"$set": {
                 "status": "completed",
                 "end_time": datetime.utcnow(),
                 "progress_percentage": 100.0
-            }}
-        )
-        self.db["data_objects"].update_one(
-            {"_id": job["data_object_id"]},
-            {"$set": {
-                "current_location": job["target_location"],
-                "current_tier": job["target_tier"],
-                "updated_at": datetime.utcnow()
-            }}
+            }, "$unset": {"worker_id": "", "lease_expires_at": ""}}
         )
+        if result.matched_count == 0:
+            logging.warning(f"Migration job {job_id} finished after losing ownership, result discarded")
+            return False
+        self.queue_stats.record_transition("in_progress", "completed")
+        if "_run_started" in job:
+            try:
+                performance_tracker.record_migration_performance(job_id, "migration", job["_run_started"], True, job["_run_bytes"], job.get("source_location"), job["target_location"], db=self.db)
+            except Exception as e:
+                logging.warning(f"Could not record migration performance for job {job_id}: {str(e)}")
+        object_update = {
+            "current_location": job["target_location"],
+            "current_tier": job["target_tier"],
+            "updated_at": datetime.utcnow()
+        }
+        if cloud_url:
+            object_update["cloud_url"] = cloud_url
+        update = {"$set": object_update}
+        for operator, fields in (compression or {}).items():
+            update.setdefault(operator, {}).update(fields)
+        self.db["data_objects"].update_one({"_id": job["data_object_id"]}, update)
+        self.opportunity_index.refresh_object(job["data_object_id"])
+        prediction_cache.invalidate(job["data_object_id"])
         self.kafka.send_migration_event(job_id, "completed", 100.0, job["data_object_id"])
         logging.info(f"Migration job {job_id} completed successfully")
+        return True
+    
+    def _release_job(self, job_id: str):
+        self.progress.flush()
+        result = self.db["migration_jobs"].update_one(
+            self._owned(job_id),
+            {"$set": {"status": "pending", "queued_at": datetime.utcnow()}, "$unset": {"worker_id": "", "lease_expires_at": ""}}
+        )
+        if result.modified_count:
+            self.queue_stats.record_transition("in_progress", "pending")
+        notify_job_enqueued(self.redis, job_id)
+        logging.info(f"Migration job {job_id} released back to the queue")
     
     def _fail_job(self, job_id: str, error_message: str):
-        job = self.db["migration_jobs"].find_one({"job_id": job_id})
+        self.progress.flush()
+        job = self.db["migration_jobs"].find_one(self._owned(job_id))
         if not job:
             return
         retry_count = job.get("retry_count", 0)
         max_retries = 3
         if retry_count < max_retries:
             self.db["migration_jobs"].update_one(
-                {"job_id": job_id},
+                self._owned(job_id),
                 {"$set": {
                     "status": "pending",
                     "retry_count": retry_count + 1,
-                    "error_message": error_message
-                }}
+                    "error_message": error_message,
+                    "queued_at": datetime.utcnow()
+                }, "$unset": {"worker_id": "", "lease_expires_at": ""}}
             )
+            self.queue_stats.record_transition("in_progress", "pending")
+            notify_job_enqueued(self.redis, job_id)
             logging.warning(f"Migration job {job_id} retry {retry_count + 1}/{max_retries}: {error_message}")
         else:
             self.db["migration_jobs"].update_one(
-                {"job_id": job_id},
+                self._owned(job_id),
                 {"$set": {
                     "status": "failed",
                     "end_time": datetime.utcnow(),
                     "error_message": error_message
-                }}
+                }, "$unset": {"worker_id": "", "lease_expires_at": ""}}
             )
+            self.queue_stats.record_transition("in_progress", "failed")
             self.kafka.send_migration_event(job_id, "failed", 0.0, job["data_object_id"])
             logging.error(f"Migration job {job_id} failed after {max_retries} retries: {error_message}")
     
     def cancel_job(self, job_id: str) -> bool:
-        result = self.db["migration_jobs"].update_one(
+        previous = self.db["migration_jobs"].find_one_and_update(
             {"job_id": job_id, "status": {"$in": ["pending", "in_progress"]}},
-            {"$set": {"status": "cancelled", "end_time": datetime.utcnow()}}
+            {"$set": {"status": "cancelled", "end_time": datetime.utcnow()}, "$unset": {"worker_id": "", "lease_expires_at": ""}},
+            projection={"status": 1}
         )
-        if result.modified_count > 0:
+        if previous:
+            self.queue_stats.record_transition(previous["status"], "cancelled")
             self.kafka.send_migration_event(job_id, "cancelled", 0.0, "")
             logging.info(f"Migration job {job_id} cancelled")
             return True
         return False
     
-    def get_queue_status(self) -> dict:
-        pending = self.db["migration_jobs"].count_documents({"status": "pending"})
-        in_progress = self.db["migration_jobs"].count_documents({"status": "in_progress"})
-        completed = self.db["migration_jobs"].count_documents({"status": "completed"})
-        failed = self.db["migration_jobs"].count_documents({"status": "failed"})
-        return {
-            "pending": pending,
-            "in_progress": in_progress,
-            "completed": completed,
-            "failed": failed,
-            "total": pending + in_progress + completed + failed
-        }
+    def get_queue_status(self, force: bool = False) -> dict:
+        status = self.queue_stats.snapshot(force)
+        status["enqueue_to_start"] = self.get_start_latency_stats()
+        return status
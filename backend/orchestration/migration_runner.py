@@ -0,0 +1,341 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+import traceback
+from config.settings import settings
+from config.database import get_database
+from streaming.websocket_manager import websocket_manager
+from services.cloud import ChunkedTransferEngine, FileSource, AdapterSource
+from services.cloud.client_cache import client_cache
+from services.metrics.performance_tracker import performance_tracker
+from services.compression.pipeline import billable_bytes, choose_codec, stage_source
+from services.deduplication.hash_manager import hash_manager
+from services.deduplication.chunk_store import DedupSource
+from engines.opportunity_index import OpportunityIndex
+from ml.prediction_cache import prediction_cache
+from .progress_aggregator import ProgressGate
+from .queue_stats import ensure_queue_indexes, shared_queue_stats
+
+class BatchContext:
+    def __init__(self, batch_id: str, user_id: str, db):
+        self.batch_id = batch_id
+        self.user_id = user_id
+        self.db = db
+        self.adapters: Dict[str, object] = {}
+        self.lock = threading.Lock()
+
+    def adapter(self, destination: str):
+        with self.lock:
+            if destination not in self.adapters:
+                self.adapters[destination] = _resolve_adapter(self.db, self.user_id, destination)
+            return self.adapters[destination]
+
+def _resolve_adapter(db, user_id: str, destination: str):
+    cred = db["cloud_credentials"].find_one({"user_id": user_id, "provider": destination, "is_active": True})
+    if not cred:
+        return None
+    return client_cache.get_adapter(cred)
+
+class MigrationRunner:
+    def __init__(self, max_workers: int = None, max_queued: int = None, step_delay: float = None):
+        self.max_workers = max_workers or settings.user_migration_concurrency
+        self.max_queued = max_queued if max_queued is not None else settings.user_migration_max_queued
+        self.step_delay = step_delay if step_delay is not None else settings.user_migration_step_delay
+        self.executor = None
+        self.loop = None
+        self.gate = ProgressGate()
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.waiting: Dict[str, Optional[BatchContext]] = {}
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "skipped": 0}
+
+    def start(self, loop: asyncio.AbstractEventLoop = None):
+        with self.lock:
+            if self.executor:
+                return
+            self.loop = loop or asyncio.get_running_loop()
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="user-migration")
+
+    def stop(self, wait: bool = True):
+        with self.lock:
+            executor = self.executor
+            self.executor = None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        with self.lock:
+            stranded = self.waiting
+            self.waiting = {}
+            self.queued = 0
+        if stranded:
+            self._fail_stranded(stranded)
+
+    def _fail_stranded(self, stranded: Dict[str, Optional[BatchContext]]):
+        groups = {}
+        for job_id, batch in stranded.items():
+            groups.setdefault(batch.batch_id if batch else None, (batch, []))[1].append(job_id)
+        for batch, job_ids in groups.values():
+            try:
+                collection = get_database()["migration_jobs"]
+                result = collection.update_many(
+                    {"_id": {"$in": [ObjectId(job_id) for job_id in job_ids]}, "status": "pending"},
+                    {"$set": {"status": "failed", "error": "Migration runner stopped before the job started", "end_time": datetime.utcnow()}}
+                )
+                shared_queue_stats(collection).record_transition("pending", "failed", result.modified_count)
+                with self.lock:
+                    self.stats["failed"] += result.modified_count
+                    self.stats["skipped"] += len(job_ids) - result.modified_count
+                if batch:
+                    self._record_batch_outcome(batch, "failed", 0, result.modified_count)
+                    self._record_batch_outcome(batch, "skipped", 0, len(job_ids) - result.modified_count)
+            except Exception as e:
+                logging.error(f"Could not fail {len(job_ids)} migration jobs stranded by shutdown: {str(e)}")
+
+    def ensure_indexes(self, db):
+        ensure_queue_indexes(db["migration_jobs"])
+        db["migration_jobs"].create_index([("batch_id", 1), ("status", 1)])
+        db["migration_batches"].create_index("batch_id", unique=True)
+        db["migration_batches"].create_index([("user_id", 1), ("created_at", -1)])
+
+    def _admit(self, count: int) -> bool:
+        if not self.executor:
+            self.start()
+        with self.lock:
+            if self.max_queued and self.queued + count > self.max_queued:
+                self.stats["rejected"] += count
+                return False
+            self.queued += count
+            self.stats["submitted"] += count
+        return True
+
+    def submit(self, job_id: str, user_id: str) -> bool:
+        if not self._admit(1):
+            return False
+        with self.lock:
+            self.waiting[job_id] = None
+        self.executor.submit(self._run, job_id, user_id)
+        return True
+
+    def submit_batch(self, batch_id: str, user_id: str, job_ids: List[str]) -> bool:
+        if not self._admit(len(job_ids)):
+            return False
+        batch = BatchContext(batch_id, user_id, get_database())
+        with self.lock:
+            self.waiting.update((job_id, batch) for job_id in job_ids)
+        for job_id in job_ids:
+            self.executor.submit(self._run, job_id, user_id, batch)
+        return True
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {**self.stats, "queued": self.queued, "running": self.running, "max_workers": self.max_workers, "max_queued": self.max_queued}
+
+    def _emit(self, message: dict, user_id: str):
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(websocket_manager.send_personal(message, user_id), self.loop)
+        except RuntimeError as e:
+            logging.warning(f"Could not deliver migration update for {message.get('job_id')}: {str(e)}")
+
+    def _progress(self, collection, job_id: str, user_id: str, progress: float, persist: bool = True, notify: bool = True):
+        if persist:
+            collection.update_one({"_id": ObjectId(job_id)}, {"$set": {"progress": progress}})
+        if notify and self.gate.due(job_id, progress):
+            self._emit({"type": "migration_update", "job_id": job_id, "progress": progress, "status": "in_progress"}, user_id)
+
+    def _run(self, job_id: str, user_id: str, batch: Optional[BatchContext] = None):
+        with self.lock:
+            self.waiting.pop(job_id, None)
+            self.queued -= 1
+            self.running += 1
+        size_bytes = 0
+        try:
+            outcome, size_bytes = self._execute(job_id, user_id, batch)
+        except Exception as e:
+            logging.error(f"Migration runner crashed on job {job_id}: {str(e)}")
+            outcome = "failed"
+        finally:
+            self.gate.forget(job_id)
+        with self.lock:
+            self.running -= 1
+            self.stats[outcome] += 1
+        if batch:
+            try:
+                self._record_batch_outcome(batch, outcome, size_bytes)
+            except Exception as e:
+                logging.error(f"Could not update migration batch {batch.batch_id}: {str(e)}")
+
+    def _record_batch_outcome(self, batch: BatchContext, outcome: str, size_bytes: int, count: int = 1):
+        if count <= 0:
+            return
+        batches = batch.db["migration_batches"]
+        inc = {f"{outcome}_jobs": count}
+        if outcome == "completed":
+            inc["completed_bytes"] = size_bytes
+        doc = batches.find_one_and_update({"batch_id": batch.batch_id}, {"$inc": inc}, return_document=ReturnDocument.AFTER)
+        if not doc:
+            return
+        done = doc.get("completed_jobs", 0) + doc.get("failed_jobs", 0) + doc.get("skipped_jobs", 0)
+        progress = round(done / max(doc["total_jobs"], 1) * 100, 2)
+        message = {"batch_id": batch.batch_id, "progress": progress, "completed": doc.get("completed_jobs", 0), "failed": doc.get("failed_jobs", 0), "skipped": doc.get("skipped_jobs", 0), "total": doc["total_jobs"]}
+        if done >= doc["total_jobs"]:
+            status = "completed" if doc.get("failed_jobs", 0) == 0 else "completed_with_errors"
+            batches.update_one({"batch_id": batch.batch_id, "status": {"$in": ["pending", "in_progress"]}}, {"$set": {"status": status, "end_time": datetime.utcnow()}})
+            self.gate.forget(batch.batch_id)
+            self._emit({"type": "batch_complete", "status": status, **message}, batch.user_id)
+        elif self.gate.due(batch.batch_id, progress):
+            self._emit({"type": "batch_update", **message}, batch.user_id)
+
+    def _execute(self, job_id: str, user_id: str, batch: Optional[BatchContext] = None):
+        db = get_database()
+        collection = db["migration_jobs"]
+        data_collection = db["data_objects"]
+        notify = batch is None
+        job = collection.find_one_and_update(
+            {"_id": ObjectId(job_id), "status": "pending"},
+            {"$set": {"status": "in_progress", "progress": 0, "start_time": datetime.utcnow()}}
+        )
+        if not job:
+            return "skipped", 0
+        queue_stats = shared_queue_stats(collection)
+        queue_stats.record_transition("pending", "in_progress")
+        if batch:
+            db["migration_batches"].update_one({"batch_id": batch.batch_id, "status": "pending"}, {"$set": {"status": "in_progress", "start_time": datetime.utcnow()}})
+        try:
+            data_obj = data_collection.find_one({"_id": ObjectId(job["object_id"])})
+            if not data_obj:
+                raise ValueError(f"Data object {job['object_id']} no longer exists")
+            self._progress(collection, job_id, user_id, 0, persist=False, notify=notify)
+            target_location = job["target_location"]
+            time.sleep(self.step_delay)
+            self._progress(collection, job_id, user_id, 25, notify=notify)
+            if target_location in ['aws', 'azure', 'gcp']:
+                adapter = batch.adapter(target_location) if batch else _resolve_adapter(db, user_id, target_location)
+                if adapter:
+                    time.sleep(self.step_delay)
+                    self._progress(collection, job_id, user_id, 50, notify=notify)
+                    self._upload(collection, data_collection, job, job_id, user_id, data_obj, adapter, notify, batch)
+            time.sleep(self.step_delay)
+            self._progress(collection, job_id, user_id, 75, notify=notify)
+            time.sleep(self.step_delay)
+            finished = collection.update_one({"_id": ObjectId(job_id), "status": "in_progress"}, {"$set": {"status": "completed", "progress": 100, "end_time": datetime.utcnow()}})
+            if finished.matched_count == 0:
+                logging.warning(f"Migration job {job_id} was cancelled while running, result discarded")
+                return "skipped", 0
+            queue_stats.record_transition("in_progress", "completed")
+            data_collection.update_one({"_id": ObjectId(job["object_id"])}, {"$set": {"current_location": job["target_location"], "current_tier": job["target_tier"], "updated_at": datetime.utcnow()}})
+            OpportunityIndex(db).refresh_object(job["object_id"])
+            prediction_cache.invalidate(job["object_id"])
+            if notify:
+                self._emit({"type": "migration_complete", "job_id": job_id, "object_id": job["object_id"], "object_name": data_obj['name']}, user_id)
+                self._notify_completion(db, job, job_id, user_id, data_obj)
+            return "completed", data_obj['size_bytes']
+        except Exception as e:
+            error_details = {
+                "error": str(e),
+                "type": type(e).__name__,
+                "traceback": traceback.format_exc()
+            }
+            logging.error(f"Migration failed for job {job_id}: {error_details}")
+            if collection.update_one({"_id": ObjectId(job_id), "status": "in_progress"}, {"$set": {"status": "failed", "error": str(e), "end_time": datetime.utcnow()}}).matched_count:
+                queue_stats.record_transition("in_progress", "failed")
+            if notify:
+                self._emit({"type": "migration_failed", "job_id": job_id, "error": str(e)}, user_id)
+            return "failed", 0
+
+    def _source_adapter(self, db, data_obj: dict, user_id: str, batch: Optional[BatchContext] = None):
+        location = data_obj["current_location"]
+        credential_id = data_obj.get("credential_id")
+        if credential_id:
+            credential = db["cloud_credentials"].find_one({"_id": ObjectId(credential_id)})
+            if credential and credential["provider"] == location:
+                return client_cache.get_adapter(credential)
+        adapter = batch.adapter(location) if batch else _resolve_adapter(db, user_id, location)
+        return adapter or client_cache.default_adapter(location)
+
+    def _upload(self, collection, data_collection, job: dict, job_id: str, user_id: str, data_obj: dict, adapter, notify: bool = True, batch: Optional[BatchContext] = None):
+        tmp_path = None
+        if data_obj.get("dedup"):
+            source = DedupSource(hash_manager.chunk_store(data_obj.get("user_id", user_id), self._source_adapter(collection.database, data_obj, user_id, batch), collection.database), str(data_obj["_id"]))
+        elif data_obj.get("cloud_url"):
+            source = AdapterSource(self._source_adapter(collection.database, data_obj, user_id, batch), data_obj["cloud_url"], billable_bytes(data_obj))
+        else:
+            with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt') as tmp:
+                tmp.write(f"CloudFlow File: {data_obj['name']}\n")
+                tmp.write(f"Size: {data_obj['size_bytes']} bytes\n")
+                tmp.write(f"Created: {data_obj['created_at']}\n")
+                tmp.write(f"User: {user_id}\n")
+                tmp.write(f"Original Location: {data_obj['current_location']}\n")
+                tmp.write(f"Content: This is a sample file generated by CloudFlow Intelligence Platform\n")
+                tmp_path = tmp.name
+            source = FileSource(tmp_path)
+        staged = None
+        try:
+            destination_key = f"cloudflow/{user_id}/{data_obj['name']}"
+            staged, compression = stage_source(source, data_obj, job["target_tier"], choose_codec(source, data_obj, job["target_tier"]))
+            engine = ChunkedTransferEngine(collection)
+            transfer_started = time.time()
+            cloud_url = engine.transfer(
+                {"_id": ObjectId(job_id)},
+                staged,
+                adapter,
+                destination_key,
+                on_progress=lambda done, total: self._progress(collection, job_id, user_id, round(50 + 25 * done / max(total, 1), 2), persist=False, notify=notify)
+            )
+            performance_tracker.record_migration_performance(job_id, "migration", transfer_started, True, staged.size, job.get("source_location"), job.get("target_location"), db=collection.database)
+            update = {"$set": {"cloud_url": cloud_url, "cloud_key": destination_key, "dedup": False}}
+            for operator, fields in compression.items():
+                update.setdefault(operator, {}).update(fields)
+            data_collection.update_one({"_id": ObjectId(job["object_id"])}, update)
+            if data_obj.get("dedup"):
+                self._release_dedup(data_obj, user_id, collection.database)
+        finally:
+            if staged is not None and staged is not source:
+                staged.close()
+            if tmp_path:
+                os.unlink(tmp_path)
+
+    def _release_dedup(self, data_obj: dict, user_id: str, db):
+        try:
+            hash_manager.chunk_store(data_obj.get("user_id", user_id), db=db).release(str(data_obj["_id"]))
+        except Exception as e:
+            logging.warning(f"Could not release chunk references for {data_obj['_id']}: {str(e)}")
+
+    def _notify_completion(self, db, job: dict, job_id: str, user_id: str, data_obj: dict):
+        try:
+            from services.alerts.email_notifier import EmailNotifier
+            email_service = EmailNotifier()
+            user_doc = db["users"].find_one({"_id": ObjectId(user_id)})
+            if user_doc:
+                user_email = user_doc.get('email', 'demo@cloudflow.com')
+                subject = f"✅ Migration Completed: {data_obj['name']}"
+                body = f"""Hello,
+
+Your file migration has completed successfully!
+
+File: {data_obj['name']}
+Size: {data_obj['size_bytes']} bytes
+From: {job['source_location']}
+To: {job['target_location']}
+Completed: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}
+
+This is an automated notification from CloudFlow Intelligence Platform.
+
+Best regards,
+CloudFlow Team
+"""
+                asyncio.run(email_service.send_custom_email([user_email], subject, body))
+                logging.info(f"Email notification sent to {user_email} for migration {job_id}")
+        except Exception as e:
+            logging.info(f"Migration email for job {job_id} not sent (SMTP not configured): {str(e)}")
+
+migration_runner = MigrationRunner()
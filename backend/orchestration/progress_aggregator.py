@@ -0,0 +1,105 @@
+from pymongo import UpdateOne
+from typing import Dict, List, Optional
+import logging
+import threading
+import time
+from config.settings import settings
+
+class ProgressGate:
+    def __init__(self, min_delta: float = None, min_interval: float = None):
+        self.min_delta = min_delta if min_delta is not None else settings.progress_ws_min_delta
+        self.min_interval = min_interval if min_interval is not None else settings.progress_ws_min_interval
+        self.last_sent: Dict[str, tuple] = {}
+        self.lock = threading.Lock()
+
+    def due(self, job_id: str, progress: float, final: bool = False) -> bool:
+        now = time.time()
+        with self.lock:
+            last = self.last_sent.get(job_id)
+            if final or last is None or abs(progress - last[0]) >= self.min_delta or now - last[1] >= self.min_interval:
+                if final:
+                    self.last_sent.pop(job_id, None)
+                else:
+                    self.last_sent[job_id] = (progress, now)
+                return True
+            return False
+
+    def forget(self, job_id: str):
+        with self.lock:
+            self.last_sent.pop(job_id, None)
+
+class ProgressAggregator:
+    def __init__(self, collection, kafka_producer=None, interval: float = None, gate: ProgressGate = None, on_deltas=None):
+        self.collection = collection
+        self.kafka = kafka_producer
+        self.on_deltas = on_deltas
+        self.interval = interval or settings.progress_flush_interval
+        self.gate = gate or ProgressGate()
+        self.pending: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.running = False
+        self.flush_thread = None
+        self.stats = {"reports": 0, "flushes": 0, "writes": 0}
+
+    def report(self, job_id: str, data_object_id, bytes_transferred: Optional[int], progress: float, job_filter: Dict = None):
+        with self.lock:
+            self.pending[job_id] = {
+                "job_id": job_id,
+                "data_object_id": str(data_object_id),
+                "bytes_transferred": bytes_transferred,
+                "progress": round(progress, 2),
+                "status": "in_progress",
+                "filter": job_filter or {"job_id": job_id, "status": "in_progress"}
+            }
+            self.stats["reports"] += 1
+
+    def discard(self, job_id: str):
+        with self.lock:
+            self.pending.pop(job_id, None)
+        self.gate.forget(job_id)
+
+    def flush(self) -> List[Dict]:
+        with self.lock:
+            updates = list(self.pending.values())
+            self.pending.clear()
+        if not updates:
+            return []
+        ops = []
+        for update in updates:
+            fields = {"progress_percentage": update["progress"]}
+            if update["bytes_transferred"] is not None:
+                fields["bytes_transferred"] = update["bytes_transferred"]
+            ops.append(UpdateOne(update["filter"], {"$set": fields}))
+        self.collection.bulk_write(ops, ordered=False)
+        messages = [{key: value for key, value in update.items() if key != "filter"} for update in updates]
+        if self.kafka:
+            self.kafka.send_migration_progress_batch(messages)
+        with self.lock:
+            self.stats["flushes"] += 1
+            self.stats["writes"] += len(updates)
+        deltas = [message for message in messages if self.gate.due(message["job_id"], message["progress"])]
+        if deltas and self.on_deltas:
+            self.on_deltas(deltas)
+        return deltas
+
+    def start(self):
+        self.running = True
+        self.flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flush_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.flush_thread:
+            self.flush_thread.join(timeout=5)
+        try:
+            self.flush()
+        except Exception as e:
+            logging.error(f"Final progress flush failed: {str(e)}")
+
+    def _flush_loop(self):
+        while self.running:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Progress flush error: {str(e)}")
@@ -0,0 +1,139 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import threading
+import time
+from config.settings import settings
+
+ACTIVE_STATUSES = ("pending", "in_progress")
+REPORTED_STATUSES = ("pending", "in_progress", "completed", "failed")
+TRACKED_STATUSES = REPORTED_STATUSES + ("cancelled",)
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+def ensure_queue_indexes(collection):
+    collection.create_index([("status", 1), ("priority", -1), ("created_at", 1)])
+    collection.create_index([("status", 1), ("end_time", 1)])
+    collection.create_index([("status", 1), ("target_location", 1)])
+
+class QueueStats:
+    def __init__(self, collection, ttl: float = None, full_refresh_interval: float = None, throughput_window: int = None):
+        self.collection = collection
+        self.ttl = ttl if ttl is not None else settings.queue_status_ttl
+        self.full_refresh_interval = full_refresh_interval if full_refresh_interval is not None else settings.queue_status_full_refresh_interval
+        self.throughput_window = throughput_window or settings.queue_throughput_window
+        self.lock = threading.Lock()
+        self.deltas = defaultdict(int)
+        self.totals = {}
+        self.totals_at = 0.0
+        self.active = None
+        self.active_at = 0.0
+
+    def record_transition(self, from_status: Optional[str], to_status: Optional[str], count: int = 1):
+        with self.lock:
+            if from_status:
+                self.deltas[from_status] -= count
+            if to_status:
+                self.deltas[to_status] += count
+
+    def _remaining_bytes(self) -> Dict:
+        return {"$max": [0, {"$subtract": [
+            {"$ifNull": ["$total_bytes", {"$ifNull": ["$size_bytes", 0]}]},
+            {"$ifNull": ["$bytes_transferred", 0]}
+        ]}]}
+
+    def _refresh_totals(self):
+        totals = {row["_id"]: row["count"] for row in self.collection.aggregate([
+            {"$match": {"status": {"$in": list(TRACKED_STATUSES)}}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ])}
+        with self.lock:
+            self.totals = totals
+            self.totals_at = time.time()
+            self.deltas.clear()
+
+    def _refresh_active(self, now: datetime):
+        rows = list(self.collection.aggregate([
+            {"$match": {"status": {"$in": list(ACTIVE_STATUSES)}}},
+            {"$group": {
+                "_id": {"status": "$status", "destination": "$target_location"},
+                "count": {"$sum": 1},
+                "remaining_bytes": {"$sum": self._remaining_bytes()},
+                "oldest": {"$min": {"$ifNull": ["$queued_at", "$created_at"]}}
+            }}
+        ]))
+        throughput = {row["_id"]: row for row in self.collection.aggregate([
+            {"$match": {"status": "completed", "end_time": {"$gte": now - timedelta(seconds=self.throughput_window)}}},
+            {"$group": {
+                "_id": "$target_location",
+                "jobs": {"$sum": 1},
+                "bytes": {"$sum": {"$ifNull": ["$total_bytes", {"$ifNull": ["$size_bytes", 0]}]}}
+            }}
+        ])}
+        active_counts = defaultdict(int)
+        for row in rows:
+            active_counts[row["_id"]["status"]] += row["count"]
+        with self.lock:
+            self.active = {"rows": rows, "throughput": throughput, "generated_at": now}
+            self.active_at = time.time()
+            for status in ACTIVE_STATUSES:
+                self.totals[status] = active_counts[status]
+                self.deltas.pop(status, None)
+
+    def snapshot(self, force: bool = False) -> Dict:
+        now = datetime.utcnow()
+        cached = not force
+        if force or time.time() - self.totals_at >= self.full_refresh_interval:
+            self._refresh_totals()
+            cached = False
+        if force or self.active is None or time.time() - self.active_at >= self.ttl:
+            self._refresh_active(now)
+            cached = False
+        with self.lock:
+            counts = {status: max(self.totals.get(status, 0) + self.deltas.get(status, 0), 0) for status in set(self.totals) | set(self.deltas)}
+            active = self.active
+        destinations = {}
+        oldest_pending = None
+        for row in active["rows"]:
+            destination = row["_id"].get("destination") or "unknown"
+            entry = destinations.setdefault(destination, {"pending": 0, "in_progress": 0, "remaining_bytes": 0, "oldest_pending_age_seconds": None})
+            entry[row["_id"]["status"]] = row["count"]
+            entry["remaining_bytes"] += row["remaining_bytes"]
+            if row["_id"]["status"] == "pending" and row.get("oldest"):
+                age = round((active["generated_at"] - row["oldest"]).total_seconds(), 1)
+                entry["oldest_pending_age_seconds"] = age
+                oldest_pending = age if oldest_pending is None else max(oldest_pending, age)
+        total_bytes_rate = 0.0
+        total_remaining = 0
+        for destination, entry in destinations.items():
+            recent = active["throughput"].get(destination)
+            rate = recent["bytes"] / self.throughput_window if recent else 0.0
+            entry["throughput_bytes_per_second"] = round(rate, 2)
+            entry["estimated_drain_seconds"] = round(entry["remaining_bytes"] / rate, 1) if rate > 0 else None
+            total_bytes_rate += rate
+            total_remaining += entry["remaining_bytes"]
+        recent_jobs = sum(row["jobs"] for row in active["throughput"].values())
+        status = {key: counts.get(key, 0) for key in REPORTED_STATUSES}
+        return {
+            **status,
+            "total": sum(status.values()),
+            "cancelled": counts.get("cancelled", 0),
+            "by_destination": destinations,
+            "oldest_pending_age_seconds": oldest_pending,
+            "throughput": {
+                "window_seconds": self.throughput_window,
+                "jobs_per_minute": round(recent_jobs / (self.throughput_window / 60), 2),
+                "bytes_per_second": round(total_bytes_rate, 2)
+            },
+            "estimated_drain_seconds": round(total_remaining / total_bytes_rate, 1) if total_bytes_rate > 0 else None,
+            "generated_at": active["generated_at"].isoformat(),
+            "cached": cached
+        }
+
+def shared_queue_stats(collection) -> QueueStats:
+    key = (collection.database.name, collection.name)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = QueueStats(collection)
+        return _shared[key]
@@ -0,0 +1,113 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from config.settings import settings
+
+def route_key(source: Optional[str], target: Optional[str]) -> str:
+    return f"{source or 'unknown'}->{target or 'unknown'}"
+
+def remaining_bytes(job: Dict) -> int:
+    total = job.get("total_bytes") or job.get("size_bytes") or 0
+    return max(total - (job.get("bytes_transferred") or 0), 0)
+
+class RouteThroughputModel:
+    def __init__(self, db=None, window_hours: int = None, default_mbps: float = None, refresh_interval: float = None):
+        self.db = db
+        self.window_hours = window_hours or settings.scheduler_throughput_window_hours
+        self.default_mbps = default_mbps or settings.scheduler_default_mbps
+        self.refresh_interval = refresh_interval if refresh_interval is not None else settings.scheduler_model_refresh_interval
+        self.rates: Dict[str, float] = {}
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+
+    def refresh(self) -> Dict[str, float]:
+        cutoff = datetime.utcnow() - timedelta(hours=self.window_hours)
+        rates = {}
+        for row in self.db["performance_metrics"].aggregate([
+            {"$match": {"timestamp": {"$gte": cutoff}, "success": True, "source_location": {"$exists": True}}},
+            {"$group": {
+                "_id": {"source": "$source_location", "target": "$target_location"},
+                "bytes": {"$sum": "$data_size_bytes"},
+                "duration_ms": {"$sum": "$duration_ms"}
+            }}
+        ]):
+            if row["duration_ms"] > 0:
+                rates[route_key(row["_id"]["source"], row["_id"]["target"])] = (row["bytes"] / (1024 * 1024)) / (row["duration_ms"] / 1000)
+        with self.lock:
+            self.rates = rates
+            self.refreshed_at = time.time()
+        return rates
+
+    def _maybe_refresh(self):
+        if self.db is not None and time.time() - self.refreshed_at >= self.refresh_interval:
+            self.refresh()
+
+    def rate_mbps(self, source: Optional[str], target: Optional[str]) -> float:
+        self._maybe_refresh()
+        return self.rates.get(route_key(source, target), self.default_mbps)
+
+    def expected_seconds(self, job: Dict) -> float:
+        rate = self.rate_mbps(job.get("source_location"), job.get("target_location"))
+        return (remaining_bytes(job) / (1024 * 1024)) / rate if rate > 0 else float("inf")
+
+    def estimated_completion(self, job: Dict, start: datetime = None) -> datetime:
+        return (start or datetime.utcnow()) + timedelta(seconds=self.expected_seconds(job))
+
+class SchedulingPolicy(ABC):
+    name = "base"
+
+    def __init__(self, model: RouteThroughputModel, route_caps: Dict[str, float] = None):
+        self.model = model
+        self.route_caps = route_caps if route_caps is not None else settings.scheduler_route_caps_map
+
+    def admissible(self, job: Dict, running_routes: Dict[str, int]) -> bool:
+        key = route_key(job.get("source_location"), job.get("target_location"))
+        cap = self.route_caps.get(key)
+        if cap is None:
+            return True
+        rate = self.model.rate_mbps(job.get("source_location"), job.get("target_location"))
+        return (running_routes.get(key, 0) + 1) * rate <= cap or running_routes.get(key, 0) == 0
+
+    @abstractmethod
+    def score(self, job: Dict, now: datetime) -> Tuple:
+        pass
+
+    def order(self, candidates: List[Dict], now: datetime, running_routes: Dict[str, int] = None) -> List[Dict]:
+        running_routes = running_routes or {}
+        return sorted((job for job in candidates if self.admissible(job, running_routes)), key=lambda job: self.score(job, now))
+
+class PriorityFifoPolicy(SchedulingPolicy):
+    name = "priority"
+
+    def score(self, job: Dict, now: datetime) -> Tuple:
+        return (-(job.get("priority") or 0), job.get("created_at") or now)
+
+class ShortestExpectedJobFirstPolicy(SchedulingPolicy):
+    name = "sejf"
+
+    def __init__(self, model: RouteThroughputModel, route_caps: Dict[str, float] = None, aging_seconds: float = None):
+        super().__init__(model, route_caps)
+        self.aging_seconds = aging_seconds or settings.scheduler_aging_seconds
+
+    def score(self, job: Dict, now: datetime) -> Tuple:
+        weight = max(job.get("priority") or 1, 1)
+        queued_at = job.get("queued_at") or job.get("created_at") or now
+        waited = max((now - queued_at).total_seconds(), 0.0)
+        return (self.model.expected_seconds(job) / weight / (1 + waited / self.aging_seconds),)
+
+SCHEDULING_POLICIES = {
+    PriorityFifoPolicy.name: PriorityFifoPolicy,
+    ShortestExpectedJobFirstPolicy.name: ShortestExpectedJobFirstPolicy
+}
+
+def register_policy(policy_class):
+    SCHEDULING_POLICIES[policy_class.name] = policy_class
+    return policy_class
+
+def create_policy(name: str, model: RouteThroughputModel, **kwargs) -> SchedulingPolicy:
+    policy_class = SCHEDULING_POLICIES.get(name)
+    if not policy_class:
+        raise ValueError(f"Unknown scheduling policy: {name}")
+    return policy_class(model, **kwargs)
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+import heapq
+import json
+import numpy as np
+from .scheduler import SchedulingPolicy, route_key
+
+def load_job_log(db=None, path: str = None, limit: int = 0) -> List[Dict]:
+    jobs = []
+    if path:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    job = json.loads(line)
+                    job["created_at"] = datetime.fromisoformat(job["created_at"])
+                    jobs.append(job)
+    else:
+        cursor = db["migration_jobs"].find(
+            {"status": "completed", "start_time": {"$exists": True}, "end_time": {"$exists": True}},
+            {"created_at": 1, "priority": 1, "source_location": 1, "target_location": 1, "total_bytes": 1, "size_bytes": 1, "start_time": 1, "end_time": 1}
+        ).sort("created_at", 1)
+        if limit:
+            cursor = cursor.limit(limit)
+        for row in cursor:
+            jobs.append({
+                "job_id": str(row["_id"]),
+                "created_at": row.get("created_at") or row["start_time"],
+                "priority": row.get("priority", 5),
+                "source_location": row.get("source_location"),
+                "target_location": row.get("target_location"),
+                "total_bytes": row.get("total_bytes") or row.get("size_bytes") or 0,
+                "duration_seconds": max((row["end_time"] - row["start_time"]).total_seconds(), 0.0)
+            })
+    return jobs
+
+def simulate(jobs: Iterable[Dict], policy: SchedulingPolicy, workers: int) -> Dict:
+    jobs = sorted(jobs, key=lambda job: job["created_at"])
+    if not jobs:
+        return {"policy": policy.name, "jobs": 0}
+    base = jobs[0]["created_at"]
+    arrivals = [(job["created_at"] - base).total_seconds() for job in jobs]
+    pending: List[Dict] = []
+    running = []
+    running_routes: Dict[str, int] = {}
+    completions, waits, weights = [], [], []
+    clock = 0.0
+    next_index = 0
+    sequence = 0
+    while next_index < len(jobs) or pending or running:
+        while next_index < len(jobs) and arrivals[next_index] <= clock:
+            pending.append({**jobs[next_index], "_arrival": arrivals[next_index]})
+            next_index += 1
+        while len(running) < workers and pending:
+            ordered = policy.order(pending, base + timedelta(seconds=clock), running_routes)
+            if not ordered:
+                break
+            job = ordered[0]
+            pending.remove(job)
+            duration = job.get("duration_seconds")
+            if duration is None:
+                duration = policy.model.expected_seconds(job)
+            key = route_key(job.get("source_location"), job.get("target_location"))
+            running_routes[key] = running_routes.get(key, 0) + 1
+            heapq.heappush(running, (clock + duration, sequence, job, key))
+            sequence += 1
+            waits.append(clock - job["_arrival"])
+        next_arrival = arrivals[next_index] if next_index < len(jobs) else float("inf")
+        next_finish = running[0][0] if running else float("inf")
+        if next_arrival == float("inf") and next_finish == float("inf"):
+            break
+        clock = min(next_arrival, next_finish)
+        while running and running[0][0] <= clock:
+            finish, _, job, key = heapq.heappop(running)
+            running_routes[key] -= 1
+            completions.append(finish - job["_arrival"])
+            weights.append(max(job.get("priority") or 1, 1))
+    completions = np.array(completions)
+    weights = np.array(weights, dtype=np.float64)
+    waits = np.array(waits)
+    return {
+        "policy": policy.name,
+        "jobs": len(completions),
+        "makespan_seconds": round(clock, 1),
+        "mean_completion_seconds": round(float(completions.mean()), 1),
+        "weighted_mean_completion_seconds": round(float((completions * weights).sum() / weights.sum()), 1),
+        "p95_wait_seconds": round(float(np.percentile(waits, 95)), 1),
+        "max_wait_seconds": round(float(waits.max()), 1)
+    }
+
+def compare_policies(jobs: List[Dict], policies: List[SchedulingPolicy], workers: int) -> List[Dict]:
+    return [simulate(jobs, policy, workers) for policy in policies]
@@ -2,13 +2,19 @@ from .cloud_adapter import CloudAdapter
 from .aws_handler import AWSHandler
 from .azure_handler import AzureHandler
 from .gcp_handler import GCPHandler
+from .filesystem_adapter import FilesystemAdapter
 from .consistency_manager import ConsistencyManager
+from .transfer_engine import ChunkedTransferEngine, FileSource, AdapterSource, TransferInterrupted
+from .streaming_upload import StreamingUploader
+from .client_cache import CloudClientCache
 
-def get_cloud_adapter(location: str) -> CloudAdapter:
-    adapters = {"aws": AWSHandler, "azure": AzureHandler, "gcp": GCPHandler}
+def get_cloud_adapter(location: str, credentials: dict = None) -> CloudAdapter:
+    adapters = {"aws": AWSHandler, "azure": AzureHandler, "gcp": GCPHandler, "on-premise": FilesystemAdapter}
     adapter_class = adapters.get(location)
     if not adapter_class:
         raise ValueError(f"Unknown cloud location: {location}")
+    if credentials and hasattr(adapter_class, "from_credentials"):
+        return adapter_class.from_credentials(credentials)
     return adapter_class()
 
-__all__ = ['CloudAdapter', 'AWSHandler', 'AzureHandler', 'GCPHandler', 'ConsistencyManager', 'get_cloud_adapter']
+__all__ = ['CloudAdapter', 'AWSHandler', 'AzureHandler', 'GCPHandler', 'FilesystemAdapter', 'ConsistencyManager', 'ChunkedTransferEngine', 'FileSource', 'AdapterSource', 'TransferInterrupted', 'StreamingUploader', 'CloudClientCache', 'get_cloud_adapter']
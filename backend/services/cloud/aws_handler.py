@@ -1,18 +1,28 @@
 import boto3
 import os
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from .cloud_adapter import CloudAdapter
 from config.settings import settings
 
 class AWSHandler(CloudAdapter):
-    def __init__(self):
-        self.s3_client = boto3.client('s3',
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region
+    def __init__(self, access_key_id: str = None, secret_access_key: str = None, region: str = None, bucket_name: str = None, endpoint_url: str = None):
+        self.region = region or settings.aws_region
+        self.s3_client = boto3.session.Session().client('s3',
+            aws_access_key_id=access_key_id or settings.aws_access_key_id,
+            aws_secret_access_key=secret_access_key or settings.aws_secret_access_key,
+            region_name=self.region,
+            endpoint_url=endpoint_url,
+            config=Config(max_pool_connections=settings.cloud_max_pool_connections, retries={"max_attempts": settings.migration_max_retries, "mode": "adaptive"})
         )
-        self.bucket_name = settings.aws_s3_bucket
-    async def upload(self, file_path: str, destination: str) -> str:
+        self.bucket_name = bucket_name or settings.aws_s3_bucket
+    @classmethod
+    def from_credentials(cls, credentials: dict):
+        return cls(credentials['access_key_id'], credentials['secret_access_key'], credentials.get('region', 'us-east-1'), credentials.get('bucket_name', 'cloudflow-data'), credentials.get('endpoint_url'))
+    def verify(self) -> dict:
+        self.s3_client.head_bucket(Bucket=self.bucket_name)
+        return {"region": self.region, "bucket": self.bucket_name}
+    def _upload_file(self, file_path: str, destination: str) -> str:
         try:
             file_size = os.path.getsize(file_path)
             if file_size > 100 * 1024 * 1024:
@@ -22,20 +32,22 @@ class AWSHandler(CloudAdapter):
             return f"s3://{self.bucket_name}/{destination}"
         except ClientError as e:
             raise Exception(f"AWS upload failed: {str(e)}")
+    async def upload(self, file_path: str, destination: str) -> str:
+        return await self.run_io(self._upload_file, file_path, destination)
     async def download(self, source_url: str, local_path: str) -> bool:
         key = source_url.replace(f"s3://{self.bucket_name}/", "")
-        self.s3_client.download_file(self.bucket_name, key, local_path)
+        await self.run_io(self.s3_client.download_file, self.bucket_name, key, local_path)
         return True
     async def delete(self, url: str) -> bool:
         key = url.replace(f"s3://{self.bucket_name}/", "")
-        self.s3_client.delete_object(Bucket=self.bucket_name, Key=key)
+        await self.run_io(self.s3_client.delete_object, Bucket=self.bucket_name, Key=key)
         return True
     async def list_objects(self, prefix: str) -> list:
-        response = self.s3_client.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
+        response = await self.run_io(self.s3_client.list_objects_v2, Bucket=self.bucket_name, Prefix=prefix)
         return [{'key': obj['Key'], 'size': obj['Size']} for obj in response.get('Contents', [])]
     async def get_metadata(self, url: str) -> dict:
         key = url.replace(f"s3://{self.bucket_name}/", "")
-        response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        response = await self.run_io(self.s3_client.head_object, Bucket=self.bucket_name, Key=key)
         return {'size': response['ContentLength'], 'last_modified': response['LastModified']}
     def set_storage_tier(self, key: str, tier: str):
         storage_class_map = {"hot": "STANDARD", "warm": "STANDARD_IA", "cold": "GLACIER"}
@@ -45,12 +57,38 @@ class AWSHandler(CloudAdapter):
             Key=key,
             StorageClass=storage_class_map[tier]
         )
-    def _multipart_upload(self, file_path: str, destination: str):
+    def read_range(self, url: str, offset: int, length: int) -> bytes:
+        key = url.replace(f"s3://{self.bucket_name}/", "")
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key, Range=f"bytes={offset}-{offset + length - 1}")
+        return response['Body'].read()
+    def begin_multipart(self, destination: str) -> str:
         multipart = self.s3_client.create_multipart_upload(
             Bucket=self.bucket_name,
             Key=destination,
             ServerSideEncryption='AES256'
         )
+        return multipart['UploadId']
+    def upload_part(self, destination: str, upload_id: str, part_number: int, data: bytes) -> str:
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=destination,
+            PartNumber=part_number,
+            UploadId=upload_id,
+            Body=data
+        )
+        return response['ETag']
+    def complete_multipart(self, destination: str, upload_id: str, parts: list) -> str:
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=destination,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': p['part_number'], 'ETag': p['part_id']} for p in parts]}
+        )
+        return f"s3://{self.bucket_name}/{destination}"
+    def abort_multipart(self, destination: str, upload_id: str):
+        self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=destination, UploadId=upload_id)
+    def _multipart_upload(self, file_path: str, destination: str):
+        upload_id = self.begin_multipart(destination)
         parts = []
         part_size = 100 * 1024 * 1024
         with open(file_path, 'rb') as f:
@@ -59,18 +97,6 @@ class AWSHandler(CloudAdapter):
                 data = f.read(part_size)
                 if not data:
                     break
-                response = self.s3_client.upload_part(
-                    Bucket=self.bucket_name,
-                    Key=destination,
-                    PartNumber=part_number,
-                    UploadId=multipart['UploadId'],
-                    Body=data
-                )
-                parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+                parts.append({'part_number': part_number, 'part_id': self.upload_part(destination, upload_id, part_number, data)})
                 part_number += 1
-        self.s3_client.complete_multipart_upload(
-            Bucket=self.bucket_name,
-            Key=destination,
-            UploadId=multipart['UploadId'],
-            MultipartUpload={'Parts': parts}
-        )
+        self.complete_multipart(destination, upload_id, parts)
@@ -1,37 +1,115 @@
-from azure.storage.blob import BlobServiceClient
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient, BlobBlock
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+from requests.adapters import HTTPAdapter
+import requests
+import asyncio
+import base64
+import logging
+import threading
+import uuid
+import weakref
 from .cloud_adapter import CloudAdapter
 from config.settings import settings
 
 class AzureHandler(CloudAdapter):
-    def __init__(self):
-        self.blob_service = BlobServiceClient.from_connection_string(settings.azure_storage_connection_string)
-        self.container_name = settings.azure_container_name
+    def __init__(self, connection_string: str = None, container_name: str = None):
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=settings.cloud_max_pool_connections, pool_maxsize=settings.cloud_max_pool_connections))
+        self.connection_string = connection_string or settings.azure_storage_connection_string
+        self.blob_service = BlobServiceClient.from_connection_string(self.connection_string, transport=RequestsTransport(session=session, session_owner=False))
+        self.async_services = weakref.WeakKeyDictionary()
+        self.async_lock = threading.Lock()
+        self.container_name = container_name or settings.azure_container_name
+    @classmethod
+    def from_credentials(cls, credentials: dict):
+        connection_string = f"DefaultEndpointsProtocol=https;AccountName={credentials['account_name']};AccountKey={credentials['account_key']};EndpointSuffix=core.windows.net"
+        return cls(connection_string, credentials.get('container_name', 'cloudflow-data'))
+    def verify(self) -> dict:
+        self.blob_service.get_container_client(self.container_name).get_container_properties()
+        return {"account": self.blob_service.account_name, "container": self.container_name}
+    def _async_service(self) -> AsyncBlobServiceClient:
+        loop = asyncio.get_running_loop()
+        with self.async_lock:
+            service = self.async_services.get(loop)
+            if service is None:
+                service = AsyncBlobServiceClient.from_connection_string(self.connection_string, max_single_put_size=settings.transfer_part_size, max_block_size=settings.transfer_part_size)
+                self.async_services[loop] = service
+            return service
+    def shutdown(self):
+        with self.async_lock:
+            services = list(self.async_services.items())
+            self.async_services.clear()
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for loop, service in services:
+            if loop is current:
+                loop.create_task(service.close())
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(service.close(), loop)
+            elif current is None:
+                self._close_idle(loop, service)
+            else:
+                threading.Thread(target=self._close_idle, args=(loop, service), daemon=True).start()
+    def _close_idle(self, loop: asyncio.AbstractEventLoop, service: AsyncBlobServiceClient):
+        try:
+            if loop.is_closed():
+                asyncio.run(service.close())
+            else:
+                loop.run_until_complete(service.close())
+        except Exception as e:
+            logging.warning(f"Could not close Azure async client: {str(e)}")
+    async def close(self):
+        with self.async_lock:
+            service = self.async_services.pop(asyncio.get_running_loop(), None)
+        if service is not None:
+            await service.close()
+        self.shutdown()
     async def upload(self, file_path: str, destination: str) -> str:
-        blob_client = self.blob_service.get_blob_client(container=self.container_name, blob=destination)
+        blob_client = self._async_service().get_blob_client(container=self.container_name, blob=destination)
         with open(file_path, "rb") as data:
-            blob_client.upload_blob(data, overwrite=True)
+            await blob_client.upload_blob(data, overwrite=True, max_concurrency=settings.transfer_concurrency)
         return f"azure://{self.container_name}/{destination}"
     async def download(self, source_url: str, local_path: str) -> bool:
         blob_name = source_url.replace(f"azure://{self.container_name}/", "")
-        blob_client = self.blob_service.get_blob_client(container=self.container_name, blob=blob_name)
+        blob_client = self._async_service().get_blob_client(container=self.container_name, blob=blob_name)
+        downloader = await blob_client.download_blob(max_concurrency=settings.transfer_concurrency)
         with open(local_path, "wb") as download_file:
-            download_file.write(blob_client.download_blob().readall())
+            await downloader.readinto(download_file)
         return True
     async def delete(self, url: str) -> bool:
         blob_name = url.replace(f"azure://{self.container_name}/", "")
-        blob_client = self.blob_service.get_blob_client(container=self.container_name, blob=blob_name)
-        blob_client.delete_blob()
+        blob_client = self._async_service().get_blob_client(container=self.container_name, blob=blob_name)
+        await blob_client.delete_blob()
         return True
     async def list_objects(self, prefix: str) -> list:
-        container_client = self.blob_service.get_container_client(self.container_name)
-        blobs = container_client.list_blobs(name_starts_with=prefix)
-        return [{'key': blob.name, 'size': blob.size} for blob in blobs]
+        container_client = self._async_service().get_container_client(self.container_name)
+        return [{'key': blob.name, 'size': blob.size} async for blob in container_client.list_blobs(name_starts_with=prefix)]
     async def get_metadata(self, url: str) -> dict:
         blob_name = url.replace(f"azure://{self.container_name}/", "")
-        blob_client = self.blob_service.get_blob_client(container=self.container_name, blob=blob_name)
-        properties = blob_client.get_blob_properties()
+        blob_client = self._async_service().get_blob_client(container=self.container_name, blob=blob_name)
+        properties = await blob_client.get_blob_properties()
         return {'size': properties.size, 'last_modified': properties.last_modified}
     def set_storage_tier(self, blob_name: str, tier: str):
         tier_map = {"hot": "Hot", "warm": "Cool", "cold": "Archive"}
         blob_client = self.blob_service.get_blob_client(container=self.container_name, blob=blob_name)
         blob_client.set_standard_blob_tier(tier_map[tier])
+    def read_range(self, url: str, offset: int, length: int) -> bytes:
+        blob_name = url.replace(f"azure://{self.container_name}/", "")
+        blob_client = self.blob_service.get_blob_client(container=self.container_name, blob=blob_name)
+        return blob_client.download_blob(offset=offset, length=length).readall()
+    def begin_multipart(self, destination: str) -> str:
+        return uuid.uuid4().hex
+    def upload_part(self, destination: str, upload_id: str, part_number: int, data: bytes) -> str:
+        block_id = base64.b64encode(f"{upload_id}-{part_number:06d}".encode()).decode()
+        blob_client = self.blob_service.get_blob_client(container=self.container_name, blob=destination)
+        blob_client.stage_block(block_id=block_id, data=data, length=len(data))
+        return block_id
+    def complete_multipart(self, destination: str, upload_id: str, parts: list) -> str:
+        blob_client = self.blob_service.get_blob_client(container=self.container_name, blob=destination)
+        blob_client.commit_block_list([BlobBlock(block_id=p['part_id']) for p in parts])
+        return f"azure://{self.container_name}/{destination}"
+    def abort_multipart(self, destination: str, upload_id: str):
+        return None
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+import logging
+import threading
+from config.settings import settings
+from utils.encryption import decrypt_credentials
+from .cloud_adapter import CloudAdapter
+
+class CloudClientCache:
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size or settings.cloud_client_cache_size
+        self.entries: "OrderedDict[Tuple[str, object], CloudAdapter]" = OrderedDict()
+        self.building: Dict[Tuple[str, object], threading.Lock] = {}
+        self.lock = threading.Lock()
+    def _lookup(self, key: Tuple[str, object]):
+        adapter = self.entries.get(key)
+        if adapter is not None:
+            self.entries.move_to_end(key)
+        return adapter
+    def _store(self, key: Tuple[str, object], adapter: CloudAdapter) -> List[CloudAdapter]:
+        evicted = [self.entries.pop(stale) for stale in [k for k in self.entries if k[0] == key[0]]]
+        self.entries[key] = adapter
+        while len(self.entries) > self.max_size:
+            evicted.append(self.entries.popitem(last=False)[1])
+        return evicted
+    def _shutdown(self, adapters: List[CloudAdapter]):
+        for adapter in adapters:
+            try:
+                adapter.shutdown()
+            except Exception as e:
+                logging.warning(f"Could not shut down evicted {type(adapter).__name__}: {str(e)}")
+    def _get(self, key: Tuple[str, object], build) -> CloudAdapter:
+        with self.lock:
+            adapter = self._lookup(key)
+            if adapter is not None:
+                return adapter
+            build_lock = self.building.setdefault(key, threading.Lock())
+        with build_lock:
+            try:
+                with self.lock:
+                    adapter = self._lookup(key)
+                if adapter is None:
+                    adapter = build()
+                    with self.lock:
+                        evicted = self._store(key, adapter)
+                    self._shutdown(evicted)
+                return adapter
+            finally:
+                with self.lock:
+                    self.building.pop(key, None)
+    def get_adapter(self, credential: dict) -> CloudAdapter:
+        from . import get_cloud_adapter
+        key = (str(credential["_id"]), credential.get("version", 0))
+        return self._get(key, lambda: get_cloud_adapter(credential["provider"], decrypt_credentials(credential["credentials_encrypted"])))
+    def default_adapter(self, location: str) -> CloudAdapter:
+        from . import get_cloud_adapter
+        return self._get((f"default:{location}", 0), lambda: get_cloud_adapter(location))
+    def invalidate(self, credential_id: str):
+        with self.lock:
+            evicted = [self.entries.pop(key) for key in [k for k in self.entries if k[0] == str(credential_id)]]
+        self._shutdown(evicted)
+    def clear(self):
+        with self.lock:
+            evicted = list(self.entries.values())
+            self.entries.clear()
+        self._shutdown(evicted)
+    async def close(self):
+        with self.lock:
+            adapters = list(self.entries.values())
+            self.entries.clear()
+        for adapter in adapters:
+            try:
+                await adapter.close()
+            except Exception as e:
+                logging.warning(f"Could not close {type(adapter).__name__}: {str(e)}")
+    def __len__(self) -> int:
+        return len(self.entries)
+
+client_cache = CloudClientCache()
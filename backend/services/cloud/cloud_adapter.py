@@ -1,6 +1,21 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
+import asyncio
+import functools
 import hashlib
+import threading
+from config.settings import settings
+
+_io_executor = None
+_io_executor_lock = threading.Lock()
+
+def io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    with _io_executor_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(max_workers=settings.cloud_io_threads, thread_name_prefix="cloud-io")
+        return _io_executor
 
 class CloudAdapter(ABC):
     @abstractmethod
@@ -21,6 +36,30 @@ class CloudAdapter(ABC):
     @abstractmethod
     def set_storage_tier(self, key: str, tier: str):
         pass
+    @abstractmethod
+    def read_range(self, url: str, offset: int, length: int) -> bytes:
+        pass
+    @abstractmethod
+    def begin_multipart(self, destination: str) -> str:
+        pass
+    @abstractmethod
+    def upload_part(self, destination: str, upload_id: str, part_number: int, data: bytes) -> str:
+        pass
+    @abstractmethod
+    def complete_multipart(self, destination: str, upload_id: str, parts: List[dict]) -> str:
+        pass
+    @abstractmethod
+    def abort_multipart(self, destination: str, upload_id: str):
+        pass
+    async def run_io(self, func, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(io_executor(), functools.partial(func, *args, **kwargs))
+    @abstractmethod
+    def verify(self) -> dict:
+        pass
+    def shutdown(self):
+        return None
+    async def close(self):
+        self.shutdown()
     def calculate_checksum(self, file_path: str) -> str:
         sha256_hash = hashlib.sha256()
         with open(file_path, "rb") as f:
@@ -0,0 +1,78 @@
+import hashlib
+import os
+import shutil
+import uuid
+from .cloud_adapter import CloudAdapter
+from config.settings import settings
+
+class FilesystemAdapter(CloudAdapter):
+    def __init__(self, root: str = None):
+        self.root = os.path.abspath(root or settings.local_storage_path)
+        self.multipart_root = os.path.join(self.root, ".multipart")
+        os.makedirs(self.multipart_root, exist_ok=True)
+    def verify(self) -> dict:
+        if not os.access(self.root, os.W_OK):
+            raise PermissionError(f"Storage root is not writable: {self.root}")
+        return {"root": self.root}
+    def _path(self, url_or_key: str) -> str:
+        key = url_or_key.replace(f"file://{self.root}/", "")
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Path escapes storage root: {url_or_key}")
+        return path
+    def _url(self, key: str) -> str:
+        return f"file://{self.root}/{key}"
+    async def upload(self, file_path: str, destination: str) -> str:
+        path = self._path(destination)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        await self.run_io(shutil.copyfile, file_path, path)
+        return self._url(destination)
+    async def download(self, source_url: str, local_path: str) -> bool:
+        await self.run_io(shutil.copyfile, self._path(source_url), local_path)
+        return True
+    async def delete(self, url: str) -> bool:
+        await self.run_io(os.remove, self._path(url))
+        return True
+    async def list_objects(self, prefix: str) -> list:
+        return await self.run_io(self._list_objects, prefix)
+    def _list_objects(self, prefix: str) -> list:
+        objects = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d != ".multipart"]
+            for filename in filenames:
+                key = os.path.relpath(os.path.join(dirpath, filename), self.root)
+                if key.startswith(prefix):
+                    objects.append({'key': key, 'size': os.path.getsize(os.path.join(dirpath, filename))})
+        return objects
+    async def get_metadata(self, url: str) -> dict:
+        stat = os.stat(self._path(url))
+        return {'size': stat.st_size, 'last_modified': stat.st_mtime}
+    def set_storage_tier(self, key: str, tier: str):
+        return None
+    def read_range(self, url: str, offset: int, length: int) -> bytes:
+        with open(self._path(url), "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+    def begin_multipart(self, destination: str) -> str:
+        upload_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.multipart_root, upload_id))
+        return upload_id
+    def upload_part(self, destination: str, upload_id: str, part_number: int, data: bytes) -> str:
+        part_path = os.path.join(self.multipart_root, upload_id, f"{part_number:06d}")
+        with open(f"{part_path}.tmp", "wb") as f:
+            f.write(data)
+        os.replace(f"{part_path}.tmp", part_path)
+        return hashlib.md5(data).hexdigest()
+    def complete_multipart(self, destination: str, upload_id: str, parts: list) -> str:
+        path = self._path(destination)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        upload_dir = os.path.join(self.multipart_root, upload_id)
+        with open(f"{path}.{upload_id}.tmp", "wb") as out:
+            for part in parts:
+                with open(os.path.join(upload_dir, f"{part['part_number']:06d}"), "rb") as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(f"{path}.{upload_id}.tmp", path)
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        return self._url(destination)
+    def abort_multipart(self, destination: str, upload_id: str):
+        shutil.rmtree(os.path.join(self.multipart_root, upload_id), ignore_errors=True)
@@ -1,36 +1,83 @@
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import storage
+from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
 from .cloud_adapter import CloudAdapter
 from config.settings import settings
+import json
 import os
+import uuid
 
 class GCPHandler(CloudAdapter):
-    def __init__(self):
-        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = settings.google_application_credentials
-        self.client = storage.Client()
-        self.bucket = self.client.bucket(settings.gcp_bucket_name)
+    COMPOSE_LIMIT = 32
+    def __init__(self, service_account_info: dict = None, bucket_name: str = None, project: str = None):
+        if service_account_info:
+            credentials = service_account.Credentials.from_service_account_info(service_account_info, scopes=storage.Client.SCOPE)
+            session = AuthorizedSession(credentials)
+            session.mount("https://", HTTPAdapter(pool_connections=settings.cloud_max_pool_connections, pool_maxsize=settings.cloud_max_pool_connections))
+            self.client = storage.Client(project=project or service_account_info.get("project_id"), credentials=credentials, _http=session)
+        else:
+            os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = settings.google_application_credentials
+            self.client = storage.Client()
+        self.bucket_name = bucket_name or settings.gcp_bucket_name
+        self.bucket = self.client.bucket(self.bucket_name)
+    @classmethod
+    def from_credentials(cls, credentials: dict):
+        return cls(json.loads(credentials['service_account_json']), credentials.get('bucket_name', 'cloudflow-data'), credentials.get('project_id'))
+    def verify(self) -> dict:
+        self.bucket.reload()
+        return {"project": self.client.project, "bucket": self.bucket_name}
     async def upload(self, file_path: str, destination: str) -> str:
         blob = self.bucket.blob(destination)
-        blob.upload_from_filename(file_path)
-        return f"gs://{settings.gcp_bucket_name}/{destination}"
+        await self.run_io(blob.upload_from_filename, file_path)
+        return f"gs://{self.bucket_name}/{destination}"
     async def download(self, source_url: str, local_path: str) -> bool:
-        blob_name = source_url.replace(f"gs://{settings.gcp_bucket_name}/", "")
+        blob_name = source_url.replace(f"gs://{self.bucket_name}/", "")
         blob = self.bucket.blob(blob_name)
-        blob.download_to_filename(local_path)
+        await self.run_io(blob.download_to_filename, local_path)
         return True
     async def delete(self, url: str) -> bool:
-        blob_name = url.replace(f"gs://{settings.gcp_bucket_name}/", "")
+        blob_name = url.replace(f"gs://{self.bucket_name}/", "")
         blob = self.bucket.blob(blob_name)
-        blob.delete()
+        await self.run_io(blob.delete)
         return True
     async def list_objects(self, prefix: str) -> list:
-        blobs = self.client.list_blobs(self.bucket, prefix=prefix)
+        blobs = await self.run_io(lambda: list(self.client.list_blobs(self.bucket, prefix=prefix)))
         return [{'key': blob.name, 'size': blob.size} for blob in blobs]
     async def get_metadata(self, url: str) -> dict:
-        blob_name = url.replace(f"gs://{settings.gcp_bucket_name}/", "")
+        blob_name = url.replace(f"gs://{self.bucket_name}/", "")
         blob = self.bucket.blob(blob_name)
-        blob.reload()
+        await self.run_io(blob.reload)
         return {'size': blob.size, 'last_modified': blob.updated}
     def set_storage_tier(self, blob_name: str, tier: str):
         class_map = {"hot": "STANDARD", "warm": "NEARLINE", "cold": "COLDLINE"}
         blob = self.bucket.blob(blob_name)
         blob.update_storage_class(class_map[tier])
+    def read_range(self, url: str, offset: int, length: int) -> bytes:
+        blob_name = url.replace(f"gs://{self.bucket_name}/", "")
+        return self.bucket.blob(blob_name).download_as_bytes(start=offset, end=offset + length - 1)
+    def _parts_prefix(self, destination: str, upload_id: str) -> str:
+        return f"{destination}.parts/{upload_id}/"
+    def begin_multipart(self, destination: str) -> str:
+        return uuid.uuid4().hex
+    def upload_part(self, destination: str, upload_id: str, part_number: int, data: bytes) -> str:
+        part_name = f"{self._parts_prefix(destination, upload_id)}{part_number:06d}"
+        self.bucket.blob(part_name).upload_from_string(data)
+        return part_name
+    def complete_multipart(self, destination: str, upload_id: str, parts: list) -> str:
+        names = [p['part_id'] for p in parts]
+        level = 0
+        while len(names) > self.COMPOSE_LIMIT:
+            composed = []
+            for i in range(0, len(names), self.COMPOSE_LIMIT):
+                name = f"{self._parts_prefix(destination, upload_id)}compose-{level}-{i // self.COMPOSE_LIMIT:06d}"
+                self.bucket.blob(name).compose([self.bucket.blob(n) for n in names[i:i + self.COMPOSE_LIMIT]])
+                composed.append(name)
+            names = composed
+            level += 1
+        self.bucket.blob(destination).compose([self.bucket.blob(n) for n in names])
+        self.abort_multipart(destination, upload_id)
+        return f"gs://{self.bucket_name}/{destination}"
+    def abort_multipart(self, destination: str, upload_id: str):
+        for blob in self.client.list_blobs(self.bucket, prefix=self._parts_prefix(destination, upload_id)):
+            blob.delete()
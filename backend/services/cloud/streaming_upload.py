@@ -0,0 +1,81 @@
+from typing import Dict, Optional
+import asyncio
+import hashlib
+import logging
+from config.settings import settings
+from .cloud_adapter import CloudAdapter
+
+async def read_part(stream, size: int) -> bytes:
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = await stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+class StreamingUploader:
+    def __init__(self, adapter: Optional[CloudAdapter] = None, part_size: int = None, max_in_flight: int = None):
+        self.adapter = adapter
+        self.part_size = part_size or settings.transfer_part_size
+        self.max_in_flight = max_in_flight or settings.transfer_concurrency
+
+    async def digest(self, stream) -> Dict:
+        hasher = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = await read_part(stream, self.part_size)
+            if not chunk:
+                break
+            await asyncio.to_thread(hasher.update, chunk)
+            size += len(chunk)
+        return {"size_bytes": size, "sha256": hasher.hexdigest(), "parts": 0, "url": None}
+
+    async def upload(self, stream, destination: str) -> Dict:
+        if self.adapter is None:
+            return await self.digest(stream)
+        adapter = self.adapter
+        upload_id = await adapter.run_io(adapter.begin_multipart, destination)
+        hasher = hashlib.sha256()
+        parts = {}
+        in_flight = set()
+        size = 0
+        part_number = 0
+
+        async def send_part(number: int, data: bytes):
+            return number, await adapter.run_io(adapter.upload_part, destination, upload_id, number, data)
+
+        async def drain(limit: int):
+            nonlocal in_flight
+            while len(in_flight) > limit:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    number, part_id = task.result()
+                    parts[number] = part_id
+
+        try:
+            while True:
+                chunk = await read_part(stream, self.part_size)
+                if not chunk and part_number:
+                    break
+                await asyncio.to_thread(hasher.update, chunk)
+                part_number += 1
+                size += len(chunk)
+                await drain(self.max_in_flight - 1)
+                in_flight.add(asyncio.create_task(send_part(part_number, chunk)))
+                if size < part_number * self.part_size:
+                    break
+            await drain(0)
+            ordered = [{"part_number": number, "part_id": parts[number]} for number in sorted(parts)]
+            url = await adapter.run_io(adapter.complete_multipart, destination, upload_id, ordered)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            try:
+                await adapter.run_io(adapter.abort_multipart, destination, upload_id)
+            except Exception as e:
+                logging.warning(f"Could not abort streaming upload {upload_id}: {str(e)}")
+            raise
+        return {"size_bytes": size, "sha256": hasher.hexdigest(), "parts": len(ordered), "url": url}
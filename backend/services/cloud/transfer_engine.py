@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional
+import logging
+import math
+import os
+from config.settings import settings
+from .cloud_adapter import CloudAdapter
+
+class TransferInterrupted(Exception):
+    pass
+
+class FileSource:
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+    def read(self, offset: int, length: int) -> bytes:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+class AdapterSource:
+    def __init__(self, adapter: CloudAdapter, url: str, size: int):
+        self.adapter = adapter
+        self.url = url
+        self.size = size
+    def read(self, offset: int, length: int) -> bytes:
+        return self.adapter.read_range(self.url, offset, length)
+
+class ChunkedTransferEngine:
+    def __init__(self, collection, part_size: int = None, max_concurrency: int = None):
+        self.collection = collection
+        self.part_size = part_size or settings.transfer_part_size
+        self.max_concurrency = max_concurrency or settings.transfer_concurrency
+    def _start_upload(self, job_filter: Dict, state: Dict, source, adapter: CloudAdapter, destination: str) -> Dict:
+        if state.get("upload_id"):
+            try:
+                adapter.abort_multipart(state["destination"], state["upload_id"])
+            except Exception as e:
+                logging.warning(f"Could not abort stale upload {state['upload_id']}: {str(e)}")
+        state = {
+            "upload_id": adapter.begin_multipart(destination),
+            "destination": destination,
+            "part_size": self.part_size,
+            "size": source.size,
+            "parts": {}
+        }
+        self._update(job_filter, {"$set": {"transfer": state, "bytes_transferred": 0}})
+        return state
+    def _update(self, job_filter: Dict, update: Dict):
+        if self.collection.update_one(job_filter, update).matched_count == 0:
+            raise TransferInterrupted("Migration job is no longer owned by this worker")
+    def transfer(self, job_filter: Dict, source, adapter: CloudAdapter, destination: str, on_progress: Optional[Callable[[int, int], None]] = None, should_continue: Optional[Callable[[], bool]] = None) -> str:
+        job = self.collection.find_one(job_filter, {"transfer": 1})
+        if job is None:
+            raise TransferInterrupted("Migration job is no longer owned by this worker")
+        state = job.get("transfer") or {}
+        resumable = state.get("upload_id") and state.get("destination") == destination and state.get("part_size") == self.part_size and state.get("size") == source.size
+        if not resumable:
+            state = self._start_upload(job_filter, state, source, adapter, destination)
+        upload_id = state["upload_id"]
+        completed = {int(n): part for n, part in (state.get("parts") or {}).items()}
+        total_parts = max(1, math.ceil(source.size / self.part_size))
+        pending = iter([n for n in range(1, total_parts + 1) if n not in completed])
+        transferred = sum(part["size"] for part in completed.values())
+        if completed:
+            logging.info(f"Resuming upload {upload_id} to {destination} at part {len(completed) + 1}/{total_parts}")
+        def send_part(part_number: int):
+            offset = (part_number - 1) * self.part_size
+            length = min(self.part_size, source.size - offset)
+            part_id = adapter.upload_part(destination, upload_id, part_number, source.read(offset, length))
+            return part_number, part_id, length
+        interrupted = False
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            in_flight = set()
+            while True:
+                while not interrupted and len(in_flight) < self.max_concurrency:
+                    part_number = next(pending, None)
+                    if part_number is None:
+                        break
+                    in_flight.add(executor.submit(send_part, part_number))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    part_number, part_id, length = future.result()
+                    completed[part_number] = {"part_id": part_id, "size": length}
+                    self._update(job_filter, {
+                        "$set": {f"transfer.parts.{part_number}": completed[part_number]},
+                        "$inc": {"bytes_transferred": length}
+                    })
+                    transferred += length
+                    if on_progress:
+                        on_progress(transferred, source.size)
+                if should_continue and not should_continue():
+                    interrupted = True
+        if interrupted and len(completed) < total_parts:
+            raise TransferInterrupted(f"Upload {upload_id} paused after {len(completed)}/{total_parts} parts")
+        parts: List[Dict] = [{"part_number": n, "part_id": completed[n]["part_id"]} for n in sorted(completed)]
+        url = adapter.complete_multipart(destination, upload_id, parts)
+        self._update(job_filter, {"$unset": {"transfer": ""}, "$set": {"bytes_transferred": source.size}})
+        return url
@@ -0,0 +1,127 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List
+import lzma
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+class Codec(ABC):
+    name = "base"
+    extension = ""
+    default_level = 6
+    available = True
+
+    @abstractmethod
+    def compressor(self, level: int = None):
+        pass
+
+    @abstractmethod
+    def decompressor(self):
+        pass
+
+    def compress(self, data: bytes, level: int = None) -> bytes:
+        stream = self.compressor(level)
+        return stream.compress(data) + stream.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        output = []
+        while data:
+            stream = self.decompressor()
+            output.append(stream.decompress(data))
+            if not stream.eof:
+                raise ValueError(f"Truncated {self.name} stream")
+            data = stream.unused_data
+        return b"".join(output)
+
+class ZlibCodec(Codec):
+    name = "zlib"
+    extension = ".zz"
+    wbits = zlib.MAX_WBITS
+
+    def compressor(self, level: int = None):
+        return zlib.compressobj(self.default_level if level is None else level, zlib.DEFLATED, self.wbits)
+
+    def decompressor(self):
+        return zlib.decompressobj(self.wbits)
+
+class GzipCodec(ZlibCodec):
+    name = "gzip"
+    extension = ".gz"
+    wbits = 16 + zlib.MAX_WBITS
+
+class LzmaCodec(Codec):
+    name = "lzma"
+    extension = ".xz"
+
+    def compressor(self, level: int = None):
+        return lzma.LZMACompressor(preset=self.default_level if level is None else level)
+
+    def decompressor(self):
+        return lzma.LZMADecompressor()
+
+class ZstdCodec(Codec):
+    name = "zstd"
+    extension = ".zst"
+    default_level = 3
+    available = zstandard is not None
+
+    def compressor(self, level: int = None):
+        return zstandard.ZstdCompressor(level=self.default_level if level is None else level).compressobj()
+
+    def decompressor(self):
+        return zstandard.ZstdDecompressor().decompressobj()
+
+class Lz4Codec(Codec):
+    name = "lz4"
+    extension = ".lz4"
+    default_level = 0
+    available = lz4_frame is not None
+
+    def compressor(self, level: int = None):
+        return _Lz4Compressor(self.default_level if level is None else level)
+
+    def decompressor(self):
+        return lz4_frame.LZ4FrameDecompressor()
+
+class _Lz4Compressor:
+    def __init__(self, level: int):
+        self.stream = lz4_frame.LZ4FrameCompressor(compression_level=level)
+        self.header = self.stream.begin()
+
+    def compress(self, data: bytes) -> bytes:
+        output = self.header + self.stream.compress(data)
+        self.header = b""
+        return output
+
+    def flush(self) -> bytes:
+        output = self.header + self.stream.flush()
+        self.header = b""
+        return output
+
+CODECS: Dict[str, Codec] = {}
+
+def register_codec(codec: Codec) -> Codec:
+    CODECS[codec.name] = codec
+    return codec
+
+for _codec in (GzipCodec(), ZlibCodec(), LzmaCodec(), ZstdCodec(), Lz4Codec()):
+    register_codec(_codec)
+
+def get_codec(name: str) -> Codec:
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Unknown compression codec: {name}")
+    if not codec.available:
+        raise ValueError(f"Compression codec {name} is not installed")
+    return codec
+
+def available_codecs() -> List[str]:
+    return [name for name, codec in CODECS.items() if codec.available]
@@ -1,27 +1,149 @@
-import gzip
-from typing import Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+import os
+import time
 from config.settings import settings
+from .codecs import get_codec, available_codecs
 
 class Compressor:
     def __init__(self):
         self.enabled = settings.compression_enabled
         self.level = settings.compression_level
-    def compress(self, data: bytes) -> Tuple[bytes, float]:
+        self.codec = settings.compression_codec
+        self.chunk_size = settings.compression_chunk_size
+        self.block_size = settings.compression_block_size
+        self.threads = settings.compression_threads
+    def _level(self, codec_name: str, level: Optional[int]) -> Optional[int]:
+        if level is not None:
+            return level
+        return self.level if codec_name in ("gzip", "zlib", "lzma") else None
+    def compress(self, data: bytes, codec: str = None, level: int = None) -> Tuple[bytes, float]:
         if not self.enabled:
             return data, 0.0
-        compressed = gzip.compress(data, compresslevel=self.level)
+        name = codec or self.codec
+        compressed = get_codec(name).compress(data, self._level(name, level))
         original_size = len(data)
         compressed_size = len(compressed)
         ratio = ((original_size - compressed_size) / original_size * 100) if original_size > 0 else 0.0
         return compressed, round(ratio, 2)
-    def decompress(self, data: bytes) -> bytes:
+    def decompress(self, data: bytes, codec: str = None) -> bytes:
         if not self.enabled:
             return data
-        return gzip.decompress(data)
-    def should_compress(self, file_size: int, file_extension: str) -> bool:
-        if not self.enabled:
+        return get_codec(codec or self.codec).decompress(data)
+    def compress_stream(self, source, destination, codec: str = None, level: int = None, threads: int = None) -> Dict:
+        name = codec or self.codec
+        selected = get_codec(name)
+        level = self._level(name, level)
+        threads = self.threads if threads is None else threads
+        started = time.process_time()
+        input_bytes = output_bytes = 0
+        if threads > 1:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                pending = deque()
+                while True:
+                    block = source.read(self.block_size)
+                    if block:
+                        input_bytes += len(block)
+                        pending.append(pool.submit(selected.compress, block, level))
+                    while pending and (len(pending) >= threads * 2 or not block):
+                        output = pending.popleft().result()
+                        destination.write(output)
+                        output_bytes += len(output)
+                    if not block:
+                        break
+            if input_bytes == 0:
+                output = selected.compress(b"", level)
+                destination.write(output)
+                output_bytes += len(output)
+        else:
+            stream = selected.compressor(level)
+            while True:
+                chunk = source.read(self.chunk_size)
+                if not chunk:
+                    break
+                input_bytes += len(chunk)
+                output = stream.compress(chunk)
+                destination.write(output)
+                output_bytes += len(output)
+            output = stream.flush()
+            destination.write(output)
+            output_bytes += len(output)
+        return {
+            "codec": name,
+            "input_bytes": input_bytes,
+            "output_bytes": output_bytes,
+            "ratio": round((input_bytes - output_bytes) / input_bytes * 100, 2) if input_bytes else 0.0,
+            "cpu_seconds": round(time.process_time() - started, 4)
+        }
+    def decompress_stream(self, source, destination, codec: str = None) -> int:
+        selected = get_codec(codec or self.codec)
+        stream = selected.decompressor()
+        fed = False
+        written = 0
+        while True:
+            chunk = source.read(self.chunk_size)
+            if not chunk:
+                break
+            while chunk:
+                output = stream.decompress(chunk)
+                fed = True
+                destination.write(output)
+                written += len(output)
+                if stream.eof:
+                    chunk = stream.unused_data
+                    stream = selected.decompressor()
+                    fed = False
+                else:
+                    chunk = b""
+        if fed:
+            raise ValueError(f"Truncated {selected.name} stream")
+        return written
+    def sample(self, source, sample_size: int = None) -> bytes:
+        sample_size = sample_size or settings.compression_sample_size
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            data = bytes(source)
+            if len(data) <= sample_size:
+                return data
+            third = sample_size // 3
+            middle = len(data) // 2
+            return data[:third] + data[middle:middle + third] + data[-third:]
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        if size <= sample_size:
+            offsets, length = (0,), size
+        else:
+            length = sample_size // 3
+            offsets = (0, size // 2 - length // 2, size - length)
+        pieces = []
+        for offset in offsets:
+            source.seek(offset)
+            pieces.append(source.read(length))
+        source.seek(position)
+        return b"".join(pieces)
+    def select_codec(self, sample: bytes) -> Tuple[Optional[str], float]:
+        if not self.enabled or len(sample) < 1024:
+            return None, 0.0
+        candidates = [name for name in settings.compression_candidates_list if name in available_codecs()]
+        best_name, best_ratio = None, 0.0
+        for name in candidates:
+            codec = get_codec(name)
+            started = time.perf_counter()
+            compressed = codec.compress(sample, self._level(name, None))
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            ratio = (len(sample) - len(compressed)) / len(sample) * 100
+            throughput = len(sample) / (1024 * 1024) / elapsed
+            if throughput >= settings.compression_min_throughput_mbps and ratio > best_ratio:
+                best_name, best_ratio = name, ratio
+        if best_ratio < settings.compression_min_savings:
+            return None, round(best_ratio, 2)
+        return best_name, round(best_ratio, 2)
+    def should_compress(self, file_size: int, file_extension: str, sample: bytes = None) -> bool:
+        if not self.enabled or file_size <= 1024:
             return False
+        if sample is not None:
+            return self.select_codec(sample)[0] is not None
         skip_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.mp4', '.zip', '.gz', '.bz2'}
-        return file_extension.lower() not in skip_extensions and file_size > 1024
+        return file_extension.lower() not in skip_extensions
 
 compressor = Compressor()
@@ -0,0 +1,93 @@
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import os
+import tempfile
+import threading
+from config.settings import settings
+from .compressor import compressor
+
+def billable_bytes(data_obj: dict) -> int:
+    compression = data_obj.get("compression") or {}
+    return compression.get("stored_bytes") or data_obj.get("size_bytes") or 0
+
+def compresses_tier(tier: str) -> bool:
+    return compressor.enabled and tier in settings.compression_tiers_list
+
+class SourceReader:
+    def __init__(self, source):
+        self.source = source
+        self.offset = 0
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self.offset, os.SEEK_END: self.source.size}[whence]
+        self.offset = max(base + offset, 0)
+        return self.offset
+    def tell(self) -> int:
+        return self.offset
+    def read(self, size: int = -1) -> bytes:
+        remaining = self.source.size - self.offset
+        length = remaining if size is None or size < 0 else min(size, remaining)
+        if length <= 0:
+            return b""
+        data = self.source.read(self.offset, length)
+        self.offset += len(data)
+        return data
+
+class SpooledSource:
+    def __init__(self, spool, size: int):
+        self.spool = spool
+        self.size = size
+        self.lock = threading.Lock()
+    def read(self, offset: int, length: int) -> bytes:
+        with self.lock:
+            self.spool.seek(offset)
+            return self.spool.read(length)
+    def close(self):
+        self.spool.close()
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(max_size=settings.compression_spool_size)
+
+def compressed_source(source, codec: str) -> Tuple[SpooledSource, Dict]:
+    spool = _spool()
+    try:
+        result = compressor.compress_stream(SourceReader(source), spool, codec=codec)
+    except Exception:
+        spool.close()
+        raise
+    return SpooledSource(spool, result["output_bytes"]), result
+
+def decompressed_source(source, codec: str) -> SpooledSource:
+    spool = _spool()
+    try:
+        size = compressor.decompress_stream(SourceReader(source), spool, codec=codec)
+    except Exception:
+        spool.close()
+        raise
+    return SpooledSource(spool, size)
+
+def choose_codec(source, data_obj: dict, target_tier: str) -> Optional[str]:
+    if data_obj.get("compression") or not compresses_tier(target_tier):
+        return None
+    return compressor.select_codec(compressor.sample(SourceReader(source)))[0]
+
+def stage_source(source, data_obj: dict, target_tier: str, codec: Optional[str] = None) -> Tuple[object, Dict]:
+    current = data_obj.get("compression")
+    if current:
+        if compresses_tier(target_tier):
+            return source, {}
+        return open_source(source, data_obj), {"$unset": {"compression": ""}}
+    if not codec:
+        return source, {"$unset": {"compression": ""}}
+    staged, result = compressed_source(source, codec)
+    return staged, {"$set": {"compression": {
+        "codec": codec,
+        "ratio": result["ratio"],
+        "original_bytes": result["input_bytes"],
+        "stored_bytes": result["output_bytes"],
+        "cpu_seconds": result["cpu_seconds"],
+        "compressed_at": datetime.utcnow()
+    }}}
+
+def open_source(source, data_obj: dict):
+    current = data_obj.get("compression")
+    return decompressed_source(source, current["codec"]) if current else source
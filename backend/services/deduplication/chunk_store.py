@@ -0,0 +1,221 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from pymongo import UpdateOne
+import asyncio
+import bisect
+import hashlib
+import logging
+from config.settings import settings
+from .chunker import FastCDC
+
+CHUNKS_COLLECTION = "dedup_chunks"
+MANIFESTS_COLLECTION = "dedup_manifests"
+STATS_COLLECTION = "dedup_stats"
+
+class PackWriter:
+    def __init__(self, adapter, destination: str, part_size: int = None):
+        self.adapter = adapter
+        self.destination = destination
+        self.part_size = part_size or settings.transfer_part_size
+        self.upload_id = None
+        self.buffer = bytearray()
+        self.parts: List[Dict] = []
+        self.size = 0
+        self.url = None
+
+    async def _flush(self):
+        if self.upload_id is None:
+            self.upload_id = await self.adapter.run_io(self.adapter.begin_multipart, self.destination)
+        number = len(self.parts) + 1
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        part_id = await self.adapter.run_io(self.adapter.upload_part, self.destination, self.upload_id, number, data)
+        self.parts.append({"part_number": number, "part_id": part_id})
+
+    async def write(self, data: bytes) -> int:
+        offset = self.size
+        self.buffer += data
+        self.size += len(data)
+        if len(self.buffer) >= self.part_size:
+            await self._flush()
+        return offset
+
+    async def close(self) -> Optional[str]:
+        if self.size == 0:
+            return None
+        if self.buffer:
+            await self._flush()
+        self.url = await self.adapter.run_io(self.adapter.complete_multipart, self.destination, self.upload_id, self.parts)
+        return self.url
+
+    async def abort(self):
+        if self.upload_id is None:
+            return
+        try:
+            await self.adapter.run_io(self.adapter.abort_multipart, self.destination, self.upload_id)
+        except Exception as e:
+            logging.warning(f"Could not abort pack upload {self.upload_id}: {str(e)}")
+
+class ChunkStore:
+    def __init__(self, db, user_id: str, adapter=None, chunker: FastCDC = None):
+        self.db = db
+        self.user_id = user_id
+        self.adapter = adapter
+        self.chunker = chunker or FastCDC()
+        self.chunks = db[CHUNKS_COLLECTION]
+        self.manifests = db[MANIFESTS_COLLECTION]
+        self.stats = db[STATS_COLLECTION]
+
+    def ensure_indexes(self):
+        self.manifests.create_index([("object_id", 1), ("seq", 1)], unique=True)
+
+    def _chunk_id(self, digest: str) -> str:
+        return f"{self.user_id}:{digest}"
+
+    def _lookup(self, digests: List[str]) -> Dict[str, Dict]:
+        found = self.chunks.find({"_id": {"$in": [self._chunk_id(d) for d in digests]}}, {"hash": 1, "refcount": 1, "size": 1})
+        return {doc["hash"]: doc for doc in found}
+
+    async def store_stream(self, stream, object_id: str, pack_destination: str) -> Dict:
+        pack = PackWriter(self.adapter, pack_destination)
+        file_hasher = hashlib.sha256()
+        manifest: List[tuple] = []
+        known: Dict[str, Dict] = {}
+        new_chunks: Dict[str, Dict] = {}
+        revived = {"chunks": 0, "bytes": 0}
+        pending: List[tuple] = []
+
+        async def resolve(batch: List[tuple]):
+            unseen = [digest for digest, _ in batch if digest not in known and digest not in new_chunks]
+            if unseen:
+                for digest, doc in (await asyncio.to_thread(self._lookup, list(dict.fromkeys(unseen)))).items():
+                    known[digest] = doc
+                    if doc.get("refcount", 0) <= 0:
+                        revived["chunks"] += 1
+                        revived["bytes"] += doc["size"]
+            for digest, chunk in batch:
+                if digest not in known and digest not in new_chunks:
+                    new_chunks[digest] = {"offset": await pack.write(chunk), "size": len(chunk)}
+
+        try:
+            async for chunk in self.chunker.stream_chunks(stream):
+                file_hasher.update(chunk)
+                digest = hashlib.sha256(chunk).hexdigest()
+                manifest.append((digest, len(chunk)))
+                pending.append((digest, chunk))
+                if len(pending) >= settings.dedup_lookup_batch:
+                    await resolve(pending)
+                    pending = []
+            if pending:
+                await resolve(pending)
+            pack_url = await pack.close()
+        except BaseException:
+            await pack.abort()
+            raise
+        size = sum(chunk_size for _, chunk_size in manifest)
+        new_bytes = sum(chunk["size"] for chunk in new_chunks.values())
+        await asyncio.to_thread(self._commit, object_id, manifest, new_chunks, pack_url, size, new_bytes, revived)
+        return {
+            "size_bytes": size,
+            "sha256": file_hasher.hexdigest(),
+            "chunks": len(manifest),
+            "new_chunks": len(new_chunks),
+            "new_bytes": new_bytes,
+            "pack_url": pack_url
+        }
+
+    def _commit(self, object_id: str, manifest: List[tuple], new_chunks: Dict[str, Dict], pack_url: Optional[str], size: int, new_bytes: int, revived: Dict):
+        now = datetime.utcnow()
+        refs = Counter(digest for digest, _ in manifest)
+        ops = []
+        for digest, count in refs.items():
+            update = {"$inc": {"refcount": count}}
+            if digest in new_chunks:
+                update["$setOnInsert"] = {"hash": digest, "user_id": self.user_id, "size": new_chunks[digest]["size"], "pack_url": pack_url, "offset": new_chunks[digest]["offset"], "created_at": now}
+            ops.append(UpdateOne({"_id": self._chunk_id(digest)}, update, upsert=digest in new_chunks))
+        inserted = self.chunks.bulk_write(ops, ordered=False).upserted_count if ops else 0
+        segment = settings.dedup_manifest_segment_size
+        self.manifests.delete_many({"object_id": object_id})
+        segments = [{
+            "object_id": object_id,
+            "user_id": self.user_id,
+            "seq": seq,
+            "hashes": [digest for digest, _ in manifest[start:start + segment]],
+            "sizes": [chunk_size for _, chunk_size in manifest[start:start + segment]],
+            "created_at": now
+        } for seq, start in enumerate(range(0, len(manifest), segment))]
+        if segments:
+            self.manifests.insert_many(segments)
+        self.stats.update_one(
+            {"_id": self.user_id},
+            {"$inc": {
+                "objects": 1,
+                "logical_bytes": size,
+                "stored_bytes": new_bytes + revived["bytes"],
+                "unreferenced_bytes": -revived["bytes"],
+                "chunk_refs": len(manifest),
+                "unique_chunks": inserted + revived["chunks"]
+            }, "$set": {"updated_at": now}},
+            upsert=True
+        )
+
+    def load_manifest(self, object_id: str) -> List[tuple]:
+        manifest = []
+        for segment in self.manifests.find({"object_id": object_id}).sort("seq", 1):
+            manifest.extend(zip(segment["hashes"], segment["sizes"]))
+        return manifest
+
+    def release(self, object_id: str) -> int:
+        manifest = self.load_manifest(object_id)
+        if not manifest:
+            return 0
+        refs = Counter(digest for digest, _ in manifest)
+        self.chunks.bulk_write([UpdateOne({"_id": self._chunk_id(digest)}, {"$inc": {"refcount": -count}}) for digest, count in refs.items()], ordered=False)
+        orphaned = list(self.chunks.find({"_id": {"$in": [self._chunk_id(d) for d in refs]}, "refcount": {"$lte": 0}}, {"size": 1}))
+        freed = sum(doc["size"] for doc in orphaned)
+        self.manifests.delete_many({"object_id": object_id})
+        self.stats.update_one(
+            {"_id": self.user_id},
+            {"$inc": {
+                "objects": -1,
+                "logical_bytes": -sum(chunk_size for _, chunk_size in manifest),
+                "stored_bytes": -freed,
+                "unreferenced_bytes": freed,
+                "chunk_refs": -len(manifest),
+                "unique_chunks": -len(orphaned)
+            }, "$set": {"updated_at": datetime.utcnow()}}
+        )
+        return freed
+
+class DedupSource:
+    def __init__(self, store: ChunkStore, object_id: str):
+        self.store = store
+        self.manifest = store.load_manifest(object_id)
+        self.offsets = [0]
+        for _, chunk_size in self.manifest:
+            self.offsets.append(self.offsets[-1] + chunk_size)
+        self.size = self.offsets[-1]
+        self.locations: Dict[str, Dict] = {}
+
+    def _locate(self, digests: List[str]):
+        missing = [d for d in dict.fromkeys(digests) if d not in self.locations]
+        if not missing:
+            return
+        for doc in self.store.chunks.find({"_id": {"$in": [self.store._chunk_id(d) for d in missing]}}, {"hash": 1, "pack_url": 1, "offset": 1}):
+            self.locations[doc["hash"]] = doc
+
+    def read(self, offset: int, length: int) -> bytes:
+        end = min(offset + length, self.size)
+        first = bisect.bisect_right(self.offsets, offset) - 1
+        last = bisect.bisect_left(self.offsets, end)
+        digests = [digest for digest, _ in self.manifest[first:last]]
+        self._locate(digests)
+        pieces = []
+        for index in range(first, last):
+            digest, chunk_size = self.manifest[index]
+            location = self.locations[digest]
+            start = max(offset - self.offsets[index], 0)
+            stop = min(end - self.offsets[index], chunk_size)
+            pieces.append(self.store.adapter.read_range(location["pack_url"], location["offset"] + start, stop - start))
+        return b"".join(pieces)
@@ -0,0 +1,93 @@
+from typing import AsyncIterator, List, Optional
+import asyncio
+import math
+import numpy as np
+from config.settings import settings
+from services.cloud.streaming_upload import read_part
+
+GEAR = np.random.default_rng(0x5EED).integers(0, 2 ** 32, size=256, dtype=np.uint64).astype(np.uint32)
+
+def _top_bits_mask(bits: int) -> int:
+    return ((1 << bits) - 1) << (32 - bits)
+
+class FastCDC:
+    def __init__(self, min_size: int = None, avg_size: int = None, max_size: int = None, normalization: int = 2):
+        self.min_size = min_size or settings.dedup_chunk_min_size
+        self.avg_size = avg_size or settings.dedup_chunk_avg_size
+        self.max_size = max_size or settings.dedup_chunk_max_size
+        if not self.min_size < self.avg_size < self.max_size:
+            raise ValueError("Chunk sizes must satisfy min < avg < max")
+        bits = int(round(math.log2(self.avg_size)))
+        self.mask_strict = np.uint32(_top_bits_mask(bits + normalization))
+        self.mask_loose = np.uint32(_top_bits_mask(bits - normalization))
+
+    def gear_hashes(self, data) -> np.ndarray:
+        hashes = GEAR[np.frombuffer(data, dtype=np.uint8)]
+        shifted = np.empty_like(hashes)
+        length = len(hashes)
+        width = 1
+        while width < min(32, length):
+            np.left_shift(hashes[:length - width], np.uint32(width), out=shifted[:length - width])
+            np.add(hashes[width:], shifted[:length - width], out=hashes[width:])
+            width *= 2
+        return hashes
+
+    def _next_cut(self, strict: np.ndarray, loose: np.ndarray, start: int, length: int) -> Optional[int]:
+        if length - start <= self.min_size:
+            return None
+        index = np.searchsorted(strict, start + self.min_size)
+        if index < len(strict) and strict[index] < min(start + self.avg_size, length):
+            return int(strict[index]) + 1
+        if start + self.avg_size > length:
+            return None
+        index = np.searchsorted(loose, start + self.avg_size)
+        if index < len(loose) and loose[index] < min(start + self.max_size, length):
+            return int(loose[index]) + 1
+        if start + self.max_size <= length:
+            return start + self.max_size
+        return None
+
+    def cut_points(self, data, final: bool = True) -> List[int]:
+        length = len(data)
+        if length == 0:
+            return []
+        hashes = self.gear_hashes(data)
+        loose = np.flatnonzero((hashes & self.mask_loose) == 0)
+        strict = loose[(hashes[loose] & self.mask_strict) == 0]
+        cuts = []
+        start = 0
+        while start < length:
+            end = self._next_cut(strict, loose, start, length)
+            if end is None:
+                if final:
+                    cuts.append(length)
+                break
+            cuts.append(end)
+            start = end
+        return cuts
+
+    def split(self, data: bytes) -> List[bytes]:
+        view = memoryview(data)
+        chunks = []
+        start = 0
+        for end in self.cut_points(data):
+            chunks.append(bytes(view[start:end]))
+            start = end
+        return chunks
+
+    async def stream_chunks(self, stream, buffer_size: int = None) -> AsyncIterator[bytes]:
+        buffer_size = buffer_size or settings.dedup_scan_buffer_size
+        carry = b""
+        while True:
+            data = await read_part(stream, buffer_size)
+            final = len(data) < buffer_size
+            buffer = carry + data if carry else data
+            cuts = await asyncio.to_thread(self.cut_points, buffer, final)
+            view = memoryview(buffer)
+            start = 0
+            for end in cuts:
+                yield bytes(view[start:end])
+                start = end
+            carry = bytes(view[start:])
+            if final:
+                return
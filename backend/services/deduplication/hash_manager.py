@@ -3,12 +3,15 @@ from typing import Optional
 from config.settings import settings
 from config.database import get_database
 from datetime import datetime
+from .chunk_store import ChunkStore, STATS_COLLECTION
 
 class HashManager:
     def __init__(self):
         self.enabled = settings.deduplication_enabled
     def calculate_hash(self, file_content: bytes) -> str:
         return hashlib.sha256(file_content).hexdigest()
+    def chunk_store(self, user_id: str, adapter=None, db=None) -> ChunkStore:
+        return ChunkStore(db if db is not None else get_database(), user_id, adapter)
     async def check_duplicate(self, file_hash: str, user_id: str) -> Optional[dict]:
         if not self.enabled:
             return None
@@ -19,14 +22,30 @@ class HashManager:
         if not self.enabled:
             return
         hash_collection = get_database()["file_hashes"]
+        copies = hash_collection.count_documents({"hash": file_hash, "user_id": user_id}, limit=2)
         hash_collection.insert_one({"hash": file_hash, "user_id": user_id, "object_id": object_id, "file_size": file_size, "created_at": datetime.utcnow()})
+        if copies:
+            get_database()[STATS_COLLECTION].update_one(
+                {"_id": user_id},
+                {"$inc": {"duplicates_found": 1 if copies == 1 else 0, "duplicate_file_bytes": file_size}, "$set": {"updated_at": datetime.utcnow()}},
+                upsert=True
+            )
     async def get_storage_savings(self, user_id: str) -> dict:
         if not self.enabled:
             return {"duplicates_found": 0, "space_saved_bytes": 0, "space_saved_gb": 0.0}
-        hash_collection = get_database()["file_hashes"]
-        pipeline = [{"$match": {"user_id": user_id}}, {"$group": {"_id": "$hash", "count": {"$sum": 1}, "size": {"$first": "$file_size"}}}, {"$match": {"count": {"$gt": 1}}}]
-        duplicates = list(hash_collection.aggregate(pipeline))
-        total_saved = sum(d["size"] * (d["count"] - 1) for d in duplicates)
-        return {"duplicates_found": len(duplicates), "space_saved_bytes": total_saved, "space_saved_gb": round(total_saved / (1024 ** 3), 2)}
+        stats = get_database()[STATS_COLLECTION].find_one({"_id": user_id}) or {}
+        logical = stats.get("logical_bytes", 0)
+        stored = stats.get("stored_bytes", 0)
+        total_saved = stats.get("duplicate_file_bytes", 0) + max(logical - stored, 0)
+        return {
+            "duplicates_found": stats.get("duplicates_found", 0),
+            "space_saved_bytes": total_saved,
+            "space_saved_gb": round(total_saved / (1024 ** 3), 2),
+            "chunked_objects": stats.get("objects", 0),
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "unique_chunks": stats.get("unique_chunks", 0),
+            "dedup_ratio": round(logical / stored, 2) if stored else None
+        }
 
 hash_manager = HashManager()
@@ -8,14 +8,19 @@ class PerformanceTracker:
     def __init__(self):
         self.enabled = settings.performance_metrics_enabled
         self.collection_interval = settings.metrics_collection_interval
-    async def track_migration_performance(self, job_id: str, operation: str, start_time: float, success: bool, data_size: int):
+    async def track_migration_performance(self, job_id: str, operation: str, start_time: float, success: bool, data_size: int, source_location: str = None, target_location: str = None):
+        self.record_migration_performance(job_id, operation, start_time, success, data_size, source_location, target_location)
+    def record_migration_performance(self, job_id: str, operation: str, start_time: float, success: bool, data_size: int, source_location: str = None, target_location: str = None, db=None):
         if not self.enabled:
             return
         end_time = time.time()
         duration_ms = (end_time - start_time) * 1000
         throughput_mbps = (data_size / (1024 * 1024)) / ((end_time - start_time) if (end_time - start_time) > 0 else 1)
-        metrics_collection = get_database()["performance_metrics"]
+        metrics_collection = (db if db is not None else get_database())["performance_metrics"]
         metric = {"job_id": job_id, "operation": operation, "duration_ms": round(duration_ms, 2), "throughput_mbps": round(throughput_mbps, 2), "data_size_bytes": data_size, "success": success, "timestamp": datetime.utcnow()}
+        if source_location and target_location:
+            metric["source_location"] = source_location
+            metric["target_location"] = target_location
         metrics_collection.insert_one(metric)
     async def get_average_latency(self, time_range_minutes: int = 60) -> float:
         metrics_collection = get_database()["performance_metrics"]
@@ -3,6 +3,8 @@ import json
 import logging
 from datetime import datetime
 from config.settings import settings
+from ml.prediction_cache import prediction_cache
+from ml.feature_store import FeatureStore
 import threading
 
 class CloudFlowKafkaConsumer:
@@ -11,6 +13,8 @@ class CloudFlowKafkaConsumer:
         self.redis = redis_client
         self.consumer = None
         self.running = False
+        self.feature_store = FeatureStore(db) if settings.feature_store_enabled else None
+        prediction_cache.attach_redis(redis_client)
         self._connect()
     
     def _connect(self):
@@ -58,6 +62,8 @@ class CloudFlowKafkaConsumer:
                 self._handle_access_event(event)
             elif event_type == "migration":
                 self._handle_migration_event(event)
+            elif event_type == "migration_batch":
+                self._handle_migration_batch_event(event)
             elif event_type == "metrics":
                 self._handle_metrics_event(event)
         except Exception as e:
@@ -79,6 +85,9 @@ class CloudFlowKafkaConsumer:
                 "$set": {"last_accessed": datetime.utcnow()}
             }
         )
+        if self.feature_store:
+            self.feature_store.mark_stale([str(event["data_object_id"])])
+        prediction_cache.invalidate(event["data_object_id"])
         recent_key = f"recent_access:{event['data_object_id']}"
         self.redis.lpush(recent_key, json.dumps(event))
         self.redis.ltrim(recent_key, 0, 99)
@@ -101,6 +110,15 @@ class CloudFlowKafkaConsumer:
         migration_key = f"migration_status:{job_id}"
         self.redis.set(migration_key, json.dumps(event), ex=3600)
     
+    def _handle_migration_batch_event(self, event: dict):
+        updates = event.get("updates") or []
+        if not updates:
+            return
+        pipe = self.redis.pipeline()
+        for update in updates:
+            pipe.set(f"migration_status:{update['job_id']}", json.dumps({**update, "event_type": "migration", "timestamp": event["timestamp"]}), ex=3600)
+        pipe.execute()
+    
     def _handle_metrics_event(self, event: dict):
         metric_key = f"metrics:{event['metric_type']}:{datetime.utcnow().strftime('%Y%m%d%H')}"
         self.redis.lpush(metric_key, json.dumps(event["data"]))
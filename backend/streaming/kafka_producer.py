@@ -62,6 +62,23 @@ class CloudFlowKafkaProducer:
             logging.error(f"Failed to send migration event: {str(e)}")
             return False
     
+    def send_migration_progress_batch(self, updates: list):
+        if not self.producer:
+            logging.warning("Kafka producer not available")
+            return False
+        try:
+            event = {
+                "event_type": "migration_batch",
+                "timestamp": datetime.utcnow().isoformat(),
+                "updates": updates
+            }
+            self.producer.send(settings.kafka_topic_migration, value=event)
+            self.producer.flush()
+            return True
+        except Exception as e:
+            logging.error(f"Failed to send migration progress batch: {str(e)}")
+            return False
+    
     def send_metrics_event(self, metric_type: str, metric_data: dict):
         if not self.producer:
             logging.warning("Kafka producer not available")
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+import os
+import socket
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config.settings import settings
+
+LEASES_COLLECTION = "job_leases"
+
+def lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def acquire_lease(db, name: str, seconds: int = None, owner: str = None) -> bool:
+    owner = owner or lease_owner()
+    now = datetime.utcnow()
+    try:
+        lease = db[LEASES_COLLECTION].find_one_and_update(
+            {"_id": name, "expires_at": {"$lte": now}},
+            {"$set": {"owner": owner, "acquired_at": now, "expires_at": now + timedelta(seconds=seconds or settings.scheduled_job_lease_seconds)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        return False
+    return lease is not None and lease["owner"] == owner
+
+def release_lease(db, name: str, until: datetime = None, owner: str = None):
+    db[LEASES_COLLECTION].update_one({"_id": name, "owner": owner or lease_owner()}, {"$set": {"expires_at": until or datetime.utcnow()}})
+
+def run_exclusive(db, name: str, interval: int, job) -> bool:
+    if not acquire_lease(db, name):
+        return False
+    started = datetime.utcnow()
+    try:
+        job()
+    except Exception:
+        release_lease(db, name)
+        raise
+    release_lease(db, name, started + timedelta(seconds=interval))
+    return True
@@ -0,0 +1,21 @@
+from typing import Dict, Iterator, List
+
+def after_id(query: Dict, last_id) -> Dict:
+    if last_id is None:
+        return dict(query or {})
+    return {"$and": [query, {"_id": {"$gt": last_id}}]} if query else {"_id": {"$gt": last_id}}
+
+def iter_id_pages(collection, query: Dict = None, projection: Dict = None, page_size: int = 1000, limit: int = 0) -> Iterator[List[dict]]:
+    last_id = None
+    remaining = limit
+    while True:
+        size = min(page_size, remaining) if limit else page_size
+        page = list(collection.find(after_id(query, last_id), projection).sort("_id", 1).limit(size))
+        if not page:
+            return
+        yield page
+        last_id = page[-1]["_id"]
+        if limit:
+            remaining -= len(page)
+            if remaining <= 0:
+                return
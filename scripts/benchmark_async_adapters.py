@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import unquote
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from aiohttp import web
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import storage
+from services.cloud import AWSHandler, AzureHandler, GCPHandler
+
+class FakeObjectStore:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.objects = {}
+
+    def _headers(self, key: str) -> dict:
+        return {"ETag": f'"{abs(hash(self.objects[key])):x}"', "Last-Modified": formatdate(usegmt=True), "x-ms-blob-type": "BlockBlob", "Accept-Ranges": "bytes"}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        path = request.path
+        if path.startswith("/upload/storage/v1/b/"):
+            bucket = path.split("/")[5]
+            body = await request.read()
+            boundary = request.headers["Content-Type"].split("boundary=")[1].strip('"')
+            parts = body.split(f"--{boundary}".encode())
+            metadata = json.loads(parts[1].split(b"\r\n\r\n", 1)[1])
+            key = f"gcs/{bucket}/{metadata['name']}"
+            self.objects[key] = parts[2].split(b"\r\n\r\n", 1)[1].rstrip(b"\r\n")
+            return web.json_response({"kind": "storage#object", "name": metadata["name"], "bucket": bucket, "size": str(len(self.objects[key])), "generation": "1"})
+        if path.startswith("/download/storage/v1/b/"):
+            segments = path.split("/")
+            key = f"gcs/{segments[5]}/{unquote('/'.join(segments[7:]))}"
+        else:
+            key = path
+        if request.method == "PUT":
+            self.objects[key] = await request.read()
+            return web.Response(status=201, headers=self._headers(key))
+        if key not in self.objects:
+            return web.Response(status=404)
+        if request.method == "DELETE":
+            del self.objects[key]
+            return web.Response(status=202)
+        data = self.objects[key]
+        headers = {**self._headers(key), "Content-Length": str(len(data))}
+        if request.method == "HEAD":
+            return web.Response(status=200, headers=headers)
+        byte_range = request.headers.get("x-ms-range") or request.headers.get("Range")
+        if byte_range:
+            start, end = byte_range.split("=")[1].split("-")
+            start, end = int(start), min(int(end or len(data) - 1), len(data) - 1)
+            headers.update({"Content-Range": f"bytes {start}-{end}/{len(data)}", "Content-Length": str(end - start + 1)})
+            return web.Response(status=206, body=data[start:end + 1], headers=headers)
+        return web.Response(status=200, body=data, headers=headers)
+
+    def serve(self) -> str:
+        ready = threading.Event()
+        address = {}
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            app = web.Application(client_max_size=1024 ** 3)
+            app.router.add_route("*", "/{tail:.*}", self.handle)
+            runner = web.AppRunner(app, access_log=None)
+            loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            loop.run_until_complete(site.start())
+            address["url"] = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+            ready.set()
+            loop.run_forever()
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return address["url"]
+
+class BenchGCPHandler(GCPHandler):
+    def __init__(self, endpoint: str, bucket_name: str):
+        self.client = storage.Client(project="bench", credentials=AnonymousCredentials(), client_options={"api_endpoint": endpoint})
+        self.bucket_name = bucket_name
+        self.bucket = self.client.bucket(bucket_name)
+
+def adapters(endpoint: str) -> dict:
+    account_key = base64.b64encode(b"bench" * 8).decode()
+    azure = AzureHandler(f"DefaultEndpointsProtocol=http;AccountName=bench;AccountKey={account_key};BlobEndpoint={endpoint}/bench;", "bench")
+    aws = AWSHandler("bench", "bench", "us-east-1", "bench", endpoint)
+    gcp = BenchGCPHandler(endpoint, "bench")
+    def aws_blocking(path: str, key: str, out: str):
+        aws.s3_client.upload_file(path, "bench", key)
+        aws.s3_client.download_file("bench", key, out)
+    def azure_blocking(path: str, key: str, out: str):
+        blob = azure.blob_service.get_blob_client("bench", key)
+        with open(path, "rb") as data:
+            blob.upload_blob(data, overwrite=True)
+        with open(out, "wb") as f:
+            f.write(blob.download_blob().readall())
+    def gcp_blocking(path: str, key: str, out: str):
+        gcp.bucket.blob(key).upload_from_filename(path)
+        gcp.bucket.blob(key).download_to_filename(out)
+    return {"aws": (aws, aws_blocking), "azure": (azure, azure_blocking), "gcp": (gcp, gcp_blocking)}
+
+async def loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+async def run_level(adapter, blocking, mode: str, concurrency: int, total_ops: int, payload: str, workdir: str) -> dict:
+    stop = asyncio.Event()
+    lag = asyncio.create_task(loop_lag(stop))
+    per_worker = max(total_ops // concurrency, 1)
+    async def worker(index: int):
+        for op in range(per_worker):
+            key = f"bench/{mode}/{concurrency}/{index}-{op}"
+            out = os.path.join(workdir, f"{index}-{op}.out")
+            if mode == "async":
+                url = await adapter.upload(payload, key)
+                await adapter.download(url, out)
+            else:
+                blocking(payload, key, out)
+            assert os.path.getsize(out) == os.path.getsize(payload)
+            os.remove(out)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    ops = per_worker * concurrency
+    return {"ops": ops, "elapsed": elapsed, "lag": await lag}
+
+async def main_async(args):
+    store = FakeObjectStore(args.latency_ms / 1000)
+    endpoint = store.serve()
+    size = args.object_kb * 1024
+    with tempfile.TemporaryDirectory() as workdir:
+        payload = os.path.join(workdir, "payload.bin")
+        with open(payload, "wb") as f:
+            f.write(os.urandom(size))
+        selected = adapters(endpoint)
+        print(f"fake store at {endpoint}, {args.latency_ms:g} ms per request, {args.object_kb} KiB objects, upload+download per op\n")
+        print(f"{'provider':<9}{'mode':<10}{'conc':>5}{'ops':>6}{'ops/s':>9}{'MiB/s':>9}{'max loop lag ms':>17}")
+        for provider in args.providers:
+            adapter, blocking = selected[provider]
+            for mode in ("blocking", "async"):
+                for concurrency in args.concurrency:
+                    result = await run_level(adapter, blocking, mode, concurrency, args.ops, payload, workdir)
+                    mib = 2 * size * result["ops"] / 2 ** 20
+                    print(f"{provider:<9}{mode:<10}{concurrency:>5}{result['ops']:>6}{result['ops'] / result['elapsed']:>9.1f}{mib / result['elapsed']:>9.1f}{result['lag'] * 1000:>17.1f}")
+            if provider == "azure":
+                await adapter.close()
+            print()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure aggregate adapter throughput on one event loop against a local fake object store")
+    parser.add_argument("--providers", nargs="+", choices=["aws", "azure", "gcp"], default=["aws", "azure", "gcp"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 64])
+    parser.add_argument("--ops", type=int, default=128)
+    parser.add_argument("--object-kb", type=int, default=256)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated round trip added to every request")
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
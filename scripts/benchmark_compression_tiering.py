@@ -0,0 +1,68 @@
+import argparse
+import io
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from services.compression.codecs import available_codecs
+from services.compression.compressor import compressor
+
+COLD_PRICES = {"aws": 0.004, "azure": 0.002, "gcp": 0.004, "on-premise": 0.010}
+
+def corpora(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    levels = ["INFO", "INFO", "INFO", "WARN", "ERROR"]
+    paths = ["/api/v1/data", "/api/v1/migration/trigger", "/api/v1/analytics/costs", "/health"]
+    logs = io.BytesIO()
+    while logs.tell() < size:
+        logs.write(f"2024-03-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}Z {rng.choice(levels)} {rng.choice(paths)} status={rng.choice([200, 200, 201, 404, 500])} latency_ms={rng.randint(1, 900)}\n".encode())
+    records = io.BytesIO()
+    while records.tell() < size:
+        records.write(json.dumps({"object_id": f"{rng.getrandbits(96):024x}", "tier": rng.choice(["hot", "warm", "cold"]), "size_bytes": rng.randint(1, 10**10), "tags": rng.sample(["backup", "media", "logs", "ml", "archive"], 2)}).encode() + b"\n")
+    yield "logs", logs.getvalue()[:size]
+    yield "json", records.getvalue()[:size]
+    yield "random", rng.randbytes(size)
+
+def measure(codec: str, data: bytes, threads: int):
+    output = io.BytesIO()
+    started = time.perf_counter()
+    result = compressor.compress_stream(io.BytesIO(data), output, codec=codec, threads=threads)
+    wall = time.perf_counter() - started
+    restored = io.BytesIO()
+    restore_started = time.process_time()
+    compressor.decompress_stream(io.BytesIO(output.getvalue()), restored, codec=codec)
+    restore_cpu = time.process_time() - restore_started
+    assert restored.getvalue() == data
+    return result, wall, restore_cpu
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CPU spent compressing cold-tier data against the storage dollars it saves")
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--cpu-hour-usd", type=float, default=0.0425, help="Price of one vCPU hour")
+    parser.add_argument("--location", choices=sorted(COLD_PRICES), default="aws")
+    parser.add_argument("--months", type=float, default=12.0, help="Expected residency in the cold tier")
+    args = parser.parse_args()
+    price = COLD_PRICES[args.location]
+    print(f"cold tier {args.location} ${price}/GiB-month, vCPU ${args.cpu_hour_usd}/h, residency {args.months:g} months, threads={args.threads}\n")
+    print(f"{'corpus':<8}{'codec':<7}{'ratio':>8}{'MiB/s':>9}{'cpu s/GiB':>11}{'restore s/GiB':>15}{'cpu $/GiB':>11}{'saved $/GiB':>13}{'net $/GiB':>11}{'break-even':>12}")
+    for name, data in corpora(args.size_mb * 2**20):
+        gib = len(data) / 2**30
+        selected, _ = compressor.select_codec(compressor.sample(data))
+        for codec in available_codecs():
+            result, wall, restore_cpu = measure(codec, data, args.threads)
+            cpu_per_gib = result["cpu_seconds"] / gib
+            cpu_cost = (result["cpu_seconds"] + restore_cpu) / gib / 3600 * args.cpu_hour_usd
+            saved_per_month = price * (result["input_bytes"] - result["output_bytes"]) / result["input_bytes"]
+            saved = saved_per_month * args.months
+            break_even = f"{cpu_cost / saved_per_month * 30:.1f} days" if saved_per_month > 0 else "never"
+            marker = "*" if codec == selected else " "
+            print(f"{name:<8}{codec + marker:<7}{result['ratio']:>7.1f}%{len(data) / 2**20 / wall:>9.1f}{cpu_per_gib:>11.2f}{restore_cpu / gib:>15.2f}{cpu_cost:>11.5f}{saved:>13.5f}{saved - cpu_cost:>11.5f}{break_even:>12}")
+        print(f"{'':<8}auto-select: {selected or 'store uncompressed'}\n")
+
+if __name__ == "__main__":
+    main()
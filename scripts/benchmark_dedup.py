@@ -0,0 +1,63 @@
+import argparse
+import hashlib
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from services.deduplication.chunker import FastCDC
+
+def versioned_backups(size: int, versions: int, edits: int, seed: int = 11):
+    rng = random.Random(seed)
+    data = bytearray(rng.randbytes(size))
+    yield bytes(data)
+    for _ in range(versions - 1):
+        for _ in range(edits):
+            position = rng.randrange(len(data))
+            action = rng.choice(["insert", "delete", "overwrite"])
+            length = rng.randint(16, 4096)
+            if action == "insert":
+                data[position:position] = rng.randbytes(length)
+            elif action == "delete":
+                del data[position:position + length]
+            else:
+                data[position:position + length] = rng.randbytes(min(length, len(data) - position))
+        yield bytes(data)
+
+def fixed_chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def replay(label: str, backups, split):
+    index = set()
+    logical = stored = 0
+    elapsed = 0.0
+    for version, data in enumerate(backups):
+        started = time.perf_counter()
+        chunks = split(data)
+        elapsed += time.perf_counter() - started
+        new_bytes = 0
+        for chunk in chunks:
+            digest = hashlib.sha256(chunk).digest()
+            if digest not in index:
+                index.add(digest)
+                new_bytes += len(chunk)
+        logical += len(data)
+        stored += new_bytes
+        print(f"{label:<6} v{version:<3} size={len(data) / 2**20:8.1f} MiB  chunks={len(chunks):7d}  transferred={new_bytes / 2**20:8.2f} MiB ({100 * new_bytes / len(data):5.1f}%)")
+    print(f"{label:<6} total logical={logical / 2**20:.1f} MiB stored={stored / 2**20:.1f} MiB ratio={logical / stored:.2f}x chunking={logical / 2**20 / elapsed:.1f} MiB/s\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic versioned backups through content-defined and fixed-size chunking")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--versions", type=int, default=5)
+    parser.add_argument("--edits", type=int, default=20, help="Random inserts/deletes/overwrites between versions")
+    args = parser.parse_args()
+    backups = list(versioned_backups(args.size_mb * 2**20, args.versions, args.edits))
+    cdc = FastCDC()
+    replay("fastcdc", backups, cdc.split)
+    replay("fixed", backups, lambda data: fixed_chunks(data, cdc.avg_size))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import hashlib
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from services.cloud.streaming_upload import StreamingUploader
+from services.cloud.filesystem_adapter import FilesystemAdapter
+
+class SyntheticStream:
+    def __init__(self, size: int, read_size: int = 1024 * 1024):
+        self.size = size
+        self.read_size = read_size
+        self.position = 0
+        self.block = random.Random(read_size).randbytes(read_size)
+    async def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = self.size - self.position
+        size = min(size, self.size - self.position, self.read_size)
+        self.position += size
+        return self.block[:size]
+    async def read_all(self) -> bytes:
+        chunks = []
+        while True:
+            chunk = await self.read(self.read_size)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+class DiscardAdapter:
+    def begin_multipart(self, destination: str) -> str:
+        return "discard"
+    def upload_part(self, destination: str, upload_id: str, part_number: int, data: bytes) -> str:
+        time.sleep(0.002)
+        return str(part_number)
+    def complete_multipart(self, destination: str, upload_id: str, parts: list) -> str:
+        return f"discard://{destination}"
+    def abort_multipart(self, destination: str, upload_id: str):
+        return None
+
+async def buffered(size: int, adapter) -> dict:
+    content = await SyntheticStream(size).read_all()
+    checksum = hashlib.sha256(content).hexdigest()
+    upload_id = adapter.begin_multipart("bench/buffered.bin")
+    part_id = adapter.upload_part("bench/buffered.bin", upload_id, 1, content)
+    adapter.complete_multipart("bench/buffered.bin", upload_id, [{"part_number": 1, "part_id": part_id}])
+    return {"size_bytes": len(content), "sha256": checksum}
+
+async def streamed(size: int, adapter, part_size: int, in_flight: int) -> dict:
+    return await StreamingUploader(adapter, part_size, in_flight).upload(SyntheticStream(size), "bench/streamed.bin")
+
+def measure(label: str, factory) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = asyncio.run(factory())
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mb = result["size_bytes"] / (1024 * 1024)
+    print(f"{label:<10} size={mb:8.1f} MiB  peak={peak / (1024 * 1024):8.1f} MiB  time={elapsed:6.2f}s  throughput={mb / elapsed:8.1f} MiB/s  sha256={result['sha256'][:12]}")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of buffered and streaming uploads")
+    parser.add_argument("--size-mb", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--part-size-mb", type=int, default=8)
+    parser.add_argument("--in-flight", type=int, default=4)
+    parser.add_argument("--store", help="Write parts to a filesystem adapter rooted here instead of discarding them")
+    parser.add_argument("--skip-buffered", action="store_true")
+    args = parser.parse_args()
+    adapter = FilesystemAdapter(args.store) if args.store else DiscardAdapter()
+    part_size = args.part_size_mb * 1024 * 1024
+    print(f"part_size={args.part_size_mb} MiB in_flight={args.in_flight} expected streaming bound ~{args.part_size_mb * (args.in_flight + 1)} MiB")
+    for size_mb in args.size_mb:
+        size = size_mb * 1024 * 1024
+        if not args.skip_buffered:
+            expected = measure("buffered", lambda: buffered(size, adapter))
+        result = measure("streamed", lambda: streamed(size, adapter, part_size, args.in_flight))
+        if not args.skip_buffered:
+            assert expected["sha256"] == result["sha256"]
+
+if __name__ == "__main__":
+    main()
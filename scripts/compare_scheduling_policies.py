@@ -0,0 +1,65 @@
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from orchestration.scheduler import RouteThroughputModel, SCHEDULING_POLICIES, route_key
+from orchestration.scheduler_simulator import load_job_log, compare_policies
+
+ROUTE_MBPS = {
+    route_key("on-premise", "aws"): 400.0,
+    route_key("on-premise", "azure"): 250.0,
+    route_key("aws", "gcp"): 120.0,
+    route_key("azure", "gcp"): 60.0
+}
+
+def synthetic_log(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    clock = start
+    jobs = []
+    for i in range(count):
+        clock += timedelta(seconds=rng.expovariate(1 / 20))
+        route = rng.choice(list(ROUTE_MBPS))
+        source, target = route.split("->")
+        size = int(rng.choice([0.1, 0.5, 1, 5, 20, 100]) * 1024**3)
+        jobs.append({
+            "job_id": f"job-{i}",
+            "created_at": clock,
+            "priority": rng.choice([1, 5, 5, 5, 10]),
+            "source_location": source,
+            "target_location": target,
+            "total_bytes": size,
+            "duration_seconds": (size / 1024**2) / ROUTE_MBPS[route]
+        })
+    return jobs
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a migration job log against scheduling policies")
+    parser.add_argument("--log", help="JSON lines job log (created_at, priority, source_location, target_location, total_bytes, duration_seconds)")
+    parser.add_argument("--mongo", action="store_true", help="Replay completed jobs from migration_jobs")
+    parser.add_argument("--synthetic", type=int, default=500, help="Number of synthetic jobs when no log is given")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=0)
+    args = parser.parse_args()
+    if args.mongo:
+        from config.database import get_database
+        db = get_database()
+        jobs = load_job_log(db, limit=args.limit)
+        model = RouteThroughputModel(db)
+        model.refresh()
+    else:
+        jobs = load_job_log(path=args.log) if args.log else synthetic_log(args.synthetic)
+        model = RouteThroughputModel(refresh_interval=float("inf"))
+        if not args.log:
+            model.rates = dict(ROUTE_MBPS)
+    policies = [policy_class(model) for policy_class in SCHEDULING_POLICIES.values()]
+    print(f"Replaying {len(jobs)} jobs on {args.workers} workers")
+    for result in compare_policies(jobs, policies, args.workers):
+        print(result)
+
+if __name__ == "__main__":
+    main()
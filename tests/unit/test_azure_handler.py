@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import weakref
+from services.cloud.azure_handler import AzureHandler
+
+class FakeService:
+    def __init__(self):
+        self.closed_on = None
+    async def close(self):
+        self.closed_on = asyncio.get_running_loop()
+
+def make_handler(*loops):
+    handler = AzureHandler.__new__(AzureHandler)
+    handler.async_services = weakref.WeakKeyDictionary()
+    handler.async_lock = threading.Lock()
+    services = []
+    for loop in loops:
+        handler.async_services[loop] = FakeService()
+        services.append(handler.async_services[loop])
+    return handler, services
+
+def test_shutdown_closes_clients_on_idle_and_closed_loops():
+    idle, finished = asyncio.new_event_loop(), asyncio.new_event_loop()
+    finished.close()
+    handler, (idle_service, finished_service) = make_handler(idle, finished)
+    handler.shutdown()
+    assert idle_service.closed_on is idle
+    assert finished_service.closed_on is not None and finished_service.closed_on is not finished
+    assert len(handler.async_services) == 0
+    idle.close()
+
+def test_shutdown_from_a_running_loop_closes_other_idle_loops():
+    idle = asyncio.new_event_loop()
+    handler, (service,) = make_handler(idle)
+    async def run():
+        handler.shutdown()
+        while service.closed_on is None:
+            await asyncio.sleep(0.01)
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert service.closed_on is idle
+    idle.close()
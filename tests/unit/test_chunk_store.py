@@ -0,0 +1,57 @@
+import asyncio
+import random
+import mongomock
+from services.cloud.filesystem_adapter import FilesystemAdapter
+from services.deduplication.chunk_store import ChunkStore, DedupSource
+from services.deduplication.chunker import FastCDC
+
+class ChunkedStream:
+    def __init__(self, payload, read_size):
+        self.payload = payload
+        self.read_size = read_size
+        self.position = 0
+    async def read(self, size=-1):
+        chunk = self.payload[self.position:self.position + min(size, self.read_size)]
+        self.position += len(chunk)
+        return chunk
+
+def make_store(tmp_path):
+    return ChunkStore(mongomock.MongoClient().db, "u1", FilesystemAdapter(str(tmp_path)), FastCDC(min_size=1024, avg_size=4096, max_size=16384))
+
+def store(chunk_store, payload, object_id):
+    return asyncio.run(chunk_store.store_stream(ChunkedStream(payload, 5000), object_id, f"packs/u1/{object_id}.pack"))
+
+def refcounts(chunk_store):
+    return sorted(doc["refcount"] for doc in chunk_store.chunks.find())
+
+def test_shared_chunks_are_stored_once_and_read_back(tmp_path):
+    chunk_store = make_store(tmp_path)
+    payload = random.Random(3).randbytes(96 * 1024)
+    first = store(chunk_store, payload, "a")
+    second = store(chunk_store, payload, "b")
+    assert first["new_bytes"] == len(payload) and second["new_chunks"] == 0 and second["pack_url"] is None
+    assert set(refcounts(chunk_store)) == {2}
+    stats = chunk_store.stats.find_one({"_id": "u1"})
+    assert stats["objects"] == 2 and stats["logical_bytes"] == 2 * len(payload) and stats["stored_bytes"] == len(payload)
+    assert stats["unique_chunks"] == first["chunks"] and stats["chunk_refs"] == 2 * first["chunks"]
+    source = DedupSource(chunk_store, "b")
+    assert source.size == len(payload) and source.read(0, source.size) == payload
+    assert source.read(5000, 20000) == payload[5000:25000]
+
+def test_release_frees_orphans_and_restore_revives_them(tmp_path):
+    chunk_store = make_store(tmp_path)
+    payload = random.Random(4).randbytes(64 * 1024)
+    stored = store(chunk_store, payload, "a")
+    store(chunk_store, payload, "b")
+    assert chunk_store.release("a") == 0
+    assert set(refcounts(chunk_store)) == {1}
+    assert chunk_store.release("b") == len(payload)
+    assert chunk_store.release("b") == 0
+    assert set(refcounts(chunk_store)) == {0} and chunk_store.manifests.count_documents({}) == 0
+    stats = chunk_store.stats.find_one({"_id": "u1"})
+    assert stats["objects"] == 0 and stats["stored_bytes"] == 0 and stats["unreferenced_bytes"] == len(payload) and stats["unique_chunks"] == 0
+    revived = store(chunk_store, payload, "c")
+    assert revived["new_chunks"] == 0
+    stats = chunk_store.stats.find_one({"_id": "u1"})
+    assert stats["stored_bytes"] == len(payload) and stats["unreferenced_bytes"] == 0 and stats["unique_chunks"] == stored["chunks"]
+    assert DedupSource(chunk_store, "c").read(0, len(payload)) == payload
@@ -0,0 +1,30 @@
+import asyncio
+import random
+from services.deduplication.chunker import FastCDC
+
+class ChunkedStream:
+    def __init__(self, payload, read_size):
+        self.payload = payload
+        self.read_size = read_size
+        self.position = 0
+    async def read(self, size=-1):
+        chunk = self.payload[self.position:self.position + min(size, self.read_size)]
+        self.position += len(chunk)
+        return chunk
+
+def test_chunk_boundaries_survive_insertions():
+    chunker = FastCDC(min_size=1024, avg_size=4096, max_size=16384)
+    data = random.Random(5).randbytes(512 * 1024)
+    chunks = chunker.split(data)
+    assert b"".join(chunks) == data
+    assert all(1024 <= len(chunk) <= 16384 for chunk in chunks[:-1])
+    edited = data[:100000] + b"inserted bytes" + data[100000:]
+    changed = set(chunker.split(edited)) - set(chunks)
+    assert len(changed) <= 2
+
+def test_stream_chunks_match_whole_buffer_split():
+    chunker = FastCDC(min_size=1024, avg_size=4096, max_size=16384)
+    data = random.Random(9).randbytes(300 * 1024 + 123)
+    async def collect():
+        return [chunk async for chunk in chunker.stream_chunks(ChunkedStream(data, 7001), buffer_size=65536)]
+    assert asyncio.run(collect()) == chunker.split(data)
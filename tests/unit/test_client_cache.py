@@ -0,0 +1,50 @@
+import pytest
+from unittest.mock import MagicMock
+from services.cloud import client_cache as cache_module
+from services.cloud.client_cache import CloudClientCache
+
+def make_cache(monkeypatch, max_size=2):
+    builds = []
+    monkeypatch.setattr(cache_module, "decrypt_credentials", lambda encrypted: {"secret": encrypted})
+    monkeypatch.setattr("services.cloud.get_cloud_adapter", lambda provider, credentials=None: builds.append((provider, credentials)) or MagicMock())
+    return CloudClientCache(max_size=max_size), builds
+
+def test_adapters_are_reused_until_the_credential_changes(monkeypatch):
+    cache, builds = make_cache(monkeypatch)
+    credential = {"_id": "c1", "provider": "aws", "credentials_encrypted": "v1", "version": 1}
+    first = cache.get_adapter(credential)
+    assert cache.get_adapter(dict(credential)) is first
+    assert len(builds) == 1
+    rotated = cache.get_adapter({**credential, "credentials_encrypted": "v2", "version": 2})
+    assert rotated is not first and builds[-1] == ("aws", {"secret": "v2"})
+    assert len(cache) == 1
+    cache.invalidate("c1")
+    assert cache.get_adapter({**credential, "version": 2}) is not rotated
+
+def test_cache_is_bounded_lru(monkeypatch):
+    cache, builds = make_cache(monkeypatch)
+    a, b, c = ({"_id": name, "provider": "gcp", "credentials_encrypted": name} for name in "abc")
+    first = cache.get_adapter(a)
+    cache.get_adapter(b)
+    cache.get_adapter(a)
+    cache.get_adapter(c)
+    assert len(cache) == 2
+    assert cache.get_adapter(a) is first
+    cache.get_adapter(b)
+    assert len(builds) == 4
+
+def test_failed_build_releases_its_lock(monkeypatch):
+    cache, builds = make_cache(monkeypatch)
+    monkeypatch.setattr(cache_module, "decrypt_credentials", lambda encrypted: 1 / 0)
+    credential = {"_id": "c1", "provider": "aws", "credentials_encrypted": "v1"}
+    with pytest.raises(ZeroDivisionError):
+        cache.get_adapter(credential)
+    assert cache.building == {} and len(cache) == 0
+
+def test_evicted_adapters_are_shut_down(monkeypatch):
+    cache, builds = make_cache(monkeypatch, max_size=1)
+    first = cache.get_adapter({"_id": "a", "provider": "azure", "credentials_encrypted": "a"})
+    second = cache.get_adapter({"_id": "b", "provider": "azure", "credentials_encrypted": "b"})
+    first.shutdown.assert_called_once()
+    cache.invalidate("b")
+    second.shutdown.assert_called_once()
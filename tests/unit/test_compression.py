@@ -0,0 +1,51 @@
+import gzip
+import io
+import random
+import pytest
+from services.compression.codecs import available_codecs
+from services.compression.compressor import compressor
+
+PAYLOAD = b"".join(f"row {i},value {i * 7 % 113},status ok\n".encode() for i in range(60000))
+
+@pytest.mark.parametrize("codec", available_codecs())
+@pytest.mark.parametrize("threads", [1, 4])
+def test_stream_round_trip(codec, threads):
+    compressed = io.BytesIO()
+    result = compressor.compress_stream(io.BytesIO(PAYLOAD), compressed, codec=codec, threads=threads)
+    assert result["input_bytes"] == len(PAYLOAD)
+    assert result["output_bytes"] == len(compressed.getvalue()) < len(PAYLOAD)
+    restored = io.BytesIO()
+    compressor.decompress_stream(io.BytesIO(compressed.getvalue()), restored, codec=codec)
+    assert restored.getvalue() == PAYLOAD
+    assert compressor.decompress(compressed.getvalue(), codec=codec) == PAYLOAD
+
+def test_block_mode_output_is_standard_gzip():
+    compressed = io.BytesIO()
+    compressor.compress_stream(io.BytesIO(PAYLOAD * 4), compressed, codec="gzip", threads=4)
+    assert gzip.decompress(compressed.getvalue()) == PAYLOAD * 4
+    with pytest.raises(ValueError):
+        compressor.decompress_stream(io.BytesIO(compressed.getvalue()[:-10]), io.BytesIO(), codec="gzip")
+
+def test_select_codec_skips_incompressible_samples():
+    assert compressor.select_codec(random.Random(3).randbytes(200000))[0] is None
+    name, ratio = compressor.select_codec(compressor.sample(io.BytesIO(PAYLOAD)))
+    assert name is not None and ratio > 50
+
+def test_demote_and_promote_round_trip(monkeypatch, tmp_path):
+    from services.cloud import FileSource
+    from services.compression import pipeline
+    monkeypatch.setattr(pipeline.settings, "compression_tiers", "cold")
+    path = tmp_path / "object.csv"
+    path.write_bytes(PAYLOAD)
+    source = FileSource(str(path))
+    staged, update = pipeline.stage_source(source, {}, "cold", "gzip")
+    compression = update["$set"]["compression"]
+    assert staged.size == compression["stored_bytes"] < len(PAYLOAD)
+    data_obj = {"size_bytes": len(PAYLOAD), "compression": compression}
+    assert pipeline.billable_bytes(data_obj) == staged.size
+    assert pipeline.stage_source(staged, data_obj, "cold") == (staged, {})
+    restored, update = pipeline.stage_source(staged, data_obj, "hot")
+    assert update == {"$unset": {"compression": ""}}
+    assert restored.read(0, restored.size) == PAYLOAD
+    restored.close()
+    staged.close()
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+import mongomock
+from bson import ObjectId
+from engines.classification_engine import DataClassificationEngine
+from utils.job_lease import acquire_lease, run_exclusive
+
+def seed(db, hours_ago, count):
+    object_id = db.data_objects.insert_one({"name": "a.csv", "size_bytes": 1024, "current_tier": "cold", "current_location": "aws"}).inserted_id
+    logged_at = datetime.utcnow() - timedelta(hours=hours_ago)
+    prefix = ObjectId.from_datetime(logged_at).binary[:4]
+    db.access_logs.insert_many([{"_id": ObjectId(prefix + ObjectId().binary[4:]), "data_object_id": object_id, "timestamp": logged_at, "latency_ms": 10} for _ in range(count)])
+    return str(object_id)
+
+def hourly_counts(db, object_id):
+    return {hour: bucket["count"] for hour, bucket in db.classification_state.find_one({"_id": object_id})["hourly"].items()}
+
+def test_replaying_a_log_range_does_not_double_count():
+    db = mongomock.MongoClient().db
+    engine = DataClassificationEngine(db)
+    object_id = seed(db, 2, 30)
+    engine.incremental_classify()
+    first = hourly_counts(db, object_id)
+    assert sum(first.values()) == 30
+    db.classification_state.delete_one({"_id": engine.STATE_WATERMARK_ID})
+    engine.incremental_classify()
+    engine.incremental_classify()
+    assert hourly_counts(db, object_id) == first
+
+def test_scheduled_runs_are_exclusive_across_processes():
+    db = mongomock.MongoClient().db
+    assert acquire_lease(db, "incremental_classification", owner="other-worker")
+    runs = []
+    assert not run_exclusive(db, "incremental_classification", 300, lambda: runs.append(1))
+    assert runs == []
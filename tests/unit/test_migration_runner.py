@@ -0,0 +1,80 @@
+from datetime import datetime
+import asyncio
+import gzip
+import mongomock
+import pytest
+import random
+from bson import ObjectId
+from config.settings import settings
+from orchestration import migration_runner as runner_module
+from orchestration import queue_stats as queue_stats_module
+from orchestration.migration_runner import MigrationRunner
+from services.cloud.filesystem_adapter import FilesystemAdapter
+from services.deduplication.chunk_store import ChunkStore
+from services.deduplication.chunker import FastCDC
+
+@pytest.fixture
+def db(monkeypatch):
+    database = mongomock.MongoClient().db
+    monkeypatch.setattr(runner_module, "get_database", lambda: database)
+    monkeypatch.setattr(queue_stats_module, "_shared", {})
+    monkeypatch.setattr(runner_module.performance_tracker, "record_migration_performance", lambda *args, **kwargs: None)
+    return database
+
+class ChunkedStream:
+    def __init__(self, payload):
+        self.payload = payload
+        self.position = 0
+    async def read(self, size=-1):
+        chunk = self.payload[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+def queue_job(db, **fields):
+    object_id = db.data_objects.insert_one({"name": "report.csv", "size_bytes": 2048, "current_location": "on-premise", "current_tier": "hot", "created_at": datetime.utcnow(), **fields}).inserted_id
+    return str(db.migration_jobs.insert_one({"object_id": str(object_id), "user_id": "u1", "source_location": "on-premise", "target_location": "on-premise", "target_tier": "cold", "status": "pending"}).inserted_id), object_id
+
+def test_runner_transitions_reach_the_shared_queue_counters(db):
+    stats = queue_stats_module.shared_queue_stats(db["migration_jobs"])
+    job_id, _ = queue_job(db)
+    assert stats.snapshot()["pending"] == 1
+    outcome, _ = MigrationRunner(step_delay=0)._execute(job_id, "u1")
+    assert outcome == "completed"
+    stats.totals_at = stats.active_at = float("inf")
+    snapshot = stats.snapshot()
+    assert snapshot["completed"] == 1 and snapshot["pending"] == 0
+
+def test_tier_changes_compress_and_restore_the_stored_bytes(db, tmp_path, monkeypatch):
+    adapter = FilesystemAdapter(str(tmp_path))
+    monkeypatch.setattr(runner_module, "_resolve_adapter", lambda *args: adapter)
+    monkeypatch.setattr(settings, "compression_candidates", "gzip")
+    monkeypatch.setattr(settings, "compression_min_throughput_mbps", 0.0)
+    payload = b"timestamp,object,latency\n" * 8192
+    (tmp_path / "seed.csv").write_bytes(payload)
+    job_id, object_id = queue_job(db, current_location="aws", cloud_url=adapter._url("seed.csv"), size_bytes=len(payload))
+    db.migration_jobs.update_one({"_id": ObjectId(job_id)}, {"$set": {"source_location": "aws", "target_location": "aws"}})
+    assert MigrationRunner(step_delay=0)._execute(job_id, "u1")[0] == "completed"
+    demoted = db.data_objects.find_one({"_id": object_id})
+    stored = (tmp_path / "cloudflow" / "u1" / "report.csv").read_bytes()
+    assert demoted["compression"]["codec"] == "gzip" and demoted["compression"]["stored_bytes"] == len(stored) < len(payload)
+    assert gzip.decompress(stored) == payload
+    promote_id = str(db.migration_jobs.insert_one({"object_id": str(object_id), "user_id": "u1", "source_location": "aws", "target_location": "aws", "target_tier": "hot", "status": "pending"}).inserted_id)
+    assert MigrationRunner(step_delay=0)._execute(promote_id, "u1")[0] == "completed"
+    promoted = db.data_objects.find_one({"_id": object_id})
+    assert "compression" not in promoted and promoted["current_tier"] == "hot"
+    assert (tmp_path / "cloudflow" / "u1" / "report.csv").read_bytes() == payload
+
+def test_deduplicated_objects_are_reassembled_and_released(db, tmp_path, monkeypatch):
+    adapter = FilesystemAdapter(str(tmp_path))
+    monkeypatch.setattr(runner_module, "_resolve_adapter", lambda *args: adapter)
+    payload = random.Random(7).randbytes(200 * 1024)
+    object_id = ObjectId()
+    chunk_store = ChunkStore(db, "u1", adapter, FastCDC(min_size=1024, avg_size=4096, max_size=16384))
+    asyncio.run(chunk_store.store_stream(ChunkedStream(payload), str(object_id), f"packs/u1/{object_id}.pack"))
+    job_id, _ = queue_job(db, _id=object_id, user_id="u1", current_location="aws", cloud_url=f"dedup://{object_id}", dedup=True, size_bytes=len(payload))
+    db.migration_jobs.update_one({"_id": ObjectId(job_id)}, {"$set": {"source_location": "aws", "target_location": "aws", "target_tier": "hot"}})
+    assert MigrationRunner(step_delay=0)._execute(job_id, "u1")[0] == "completed"
+    migrated = db.data_objects.find_one({"_id": object_id})
+    assert migrated["dedup"] is False and migrated["cloud_url"] == adapter._url("cloudflow/u1/report.csv")
+    assert (tmp_path / "cloudflow" / "u1" / "report.csv").read_bytes() == payload
+    assert chunk_store.manifests.count_documents({}) == 0 and set(doc["refcount"] for doc in chunk_store.chunks.find()) == {0}
@@ -0,0 +1,14 @@
+import mongomock
+from utils.pagination import iter_id_pages
+from ml.feature_pipeline import FeaturePipeline
+
+def ids(pages):
+    return [[doc["_id"] for doc in page] for page in pages]
+
+def test_pages_keep_caller_id_filters():
+    db = mongomock.MongoClient().db
+    db.data_objects.insert_many([{"_id": i, "size_bytes": i} for i in range(1, 6)])
+    assert ids(iter_id_pages(db.data_objects, page_size=2)) == [[1, 2], [3, 4], [5]]
+    assert ids(iter_id_pages(db.data_objects, {"_id": 3}, page_size=1)) == [[3]]
+    assert ids(iter_id_pages(db.data_objects, {"_id": {"$gte": 2}}, page_size=2, limit=3)) == [[2, 3], [4]]
+    assert ids(FeaturePipeline(db).iter_pages({"_id": 4}, page_size=1)) == [[4]]
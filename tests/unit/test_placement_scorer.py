@@ -0,0 +1,32 @@
+import numpy as np
+from engines.classification_engine import DataClassificationEngine
+from engines.placement_scorer import PlacementScorer
+
+def test_best_locations_match_scalar_scoring(mock_db):
+    engine = DataClassificationEngine(mock_db)
+    scorer = engine.placement_scorer
+    sizes = np.array([1, 5, 50, 500, 5000], dtype=np.float64) * 1024**3
+    latencies = np.array([20.0, 60.0, 150.0, 400.0, 0.0])
+    tiers = ["hot", "warm", "cold", "warm", "cold"]
+    best = scorer.best_locations(sizes, latencies, scorer.encode_tiers(tiers))
+    for i, tier in enumerate(tiers):
+        expected = engine._find_optimal_location(tier, sizes[i] / 1024**3, latencies[i])
+        assert scorer.locations[best[i]] == expected
+
+def test_score_returns_savings_against_current_placement(mock_db):
+    scorer = DataClassificationEngine(mock_db).placement_scorer
+    size = np.array([100 * 1024**3], dtype=np.float64)
+    best, proposed, savings = scorer.score(size, np.array([0.0]), scorer.encode_tiers(["cold"]), scorer.encode_locations(["aws"]), scorer.encode_tiers(["hot"]))
+    assert scorer.locations[best[0]] == "on-premise"
+    assert proposed[0] == 100 * 0.010
+    assert round(savings[0], 6) == round(100 * 0.023 - 100 * 0.010, 6)
+
+def test_unknown_current_placement_uses_default_rate(mock_db):
+    scorer = DataClassificationEngine(mock_db).placement_scorer
+    cost = scorer.placement_cost(scorer.encode_locations(["simulation"]), scorer.encode_tiers(["hot"]), np.array([1024**3]))
+    assert cost[0] == 0.020
+
+def test_top_k_orders_descending():
+    values = np.array([3.0, 9.0, 1.0, 7.0, 5.0])
+    assert list(PlacementScorer.top_k(values, 3)) == [1, 3, 4]
+    assert list(PlacementScorer.top_k(values, 10)) == [1, 3, 4, 0, 2]
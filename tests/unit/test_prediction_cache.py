@@ -0,0 +1,33 @@
+from unittest.mock import MagicMock
+from ml.prediction_cache import PredictionCache, INVALIDATION_CHANNEL
+
+def test_cache_is_keyed_by_model_version():
+    cache = PredictionCache(max_size=10, ttl=60)
+    cache.set("obj1", "v1", ("hot", "aws", 0.9))
+    assert cache.get("obj1", "v1") == ("hot", "aws", 0.9)
+    assert cache.get("obj1", "v2") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_invalidate_and_lru_eviction():
+    cache = PredictionCache(max_size=2, ttl=60)
+    cache.set("obj1", "v1", ("hot", "aws", 0.9))
+    cache.set("obj2", "v1", ("warm", "gcp", 0.8))
+    cache.get("obj1", "v1")
+    cache.set("obj3", "v1", ("cold", "azure", 0.7))
+    assert cache.get("obj2", "v1") is None
+    assert cache.get("obj1", "v1") is not None
+    cache.invalidate("obj1")
+    assert cache.get("obj1", "v1") is None
+    assert cache.stats()["evictions"] == 1
+
+def test_invalidation_is_broadcast_to_other_processes():
+    redis = MagicMock()
+    PredictionCache(redis, max_size=10, ttl=60).invalidate("obj1")
+    redis.pipeline.return_value.publish.assert_called_once_with(INVALIDATION_CHANNEL, "obj1")
+    peer = PredictionCache(max_size=10, ttl=60)
+    peer.set("obj1", "v1", ("hot", "aws", 0.9))
+    peer._drop(b"obj1")
+    assert peer.get("obj1", "v1") is None
+    assert peer.stats()["remote_invalidations"] == 1
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+from orchestration.scheduler import RouteThroughputModel, PriorityFifoPolicy, ShortestExpectedJobFirstPolicy
+from orchestration.scheduler_simulator import simulate
+
+def make_model():
+    model = RouteThroughputModel(default_mbps=100.0, refresh_interval=float("inf"))
+    model.rates = {"aws->gcp": 10.0}
+    return model
+
+def test_sejf_prefers_short_jobs_and_respects_route_caps():
+    now = datetime(2024, 1, 1)
+    jobs = [
+        {"job_id": "big", "priority": 5, "created_at": now, "source_location": "aws", "target_location": "azure", "total_bytes": 2000 * 1024**2},
+        {"job_id": "slow", "priority": 5, "created_at": now, "source_location": "aws", "target_location": "gcp", "total_bytes": 100 * 1024**2},
+        {"job_id": "small", "priority": 5, "created_at": now, "source_location": "aws", "target_location": "azure", "total_bytes": 10 * 1024**2}
+    ]
+    policy = ShortestExpectedJobFirstPolicy(make_model(), route_caps={"aws->gcp": 15.0})
+    assert [job["job_id"] for job in policy.order(jobs, now)] == ["small", "slow", "big"]
+    assert "slow" not in [job["job_id"] for job in policy.order(jobs, now, {"aws->gcp": 1})]
+
+def test_simulator_sejf_lowers_mean_completion():
+    start = datetime(2024, 1, 1)
+    jobs = [{
+        "job_id": f"j{i}",
+        "priority": 5,
+        "created_at": start + timedelta(seconds=i),
+        "source_location": "aws",
+        "target_location": "azure",
+        "total_bytes": (1000 if i % 4 == 0 else 10) * 1024**2
+    } for i in range(40)]
+    model = make_model()
+    fifo = simulate(jobs, PriorityFifoPolicy(model, route_caps={}), workers=1)
+    sejf = simulate(jobs, ShortestExpectedJobFirstPolicy(model, route_caps={}), workers=1)
+    assert fifo["jobs"] == sejf["jobs"] == 40
+    assert sejf["mean_completion_seconds"] < fifo["mean_completion_seconds"]
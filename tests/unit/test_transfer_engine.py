@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import os
+import threading
+import pytest
+from services.cloud.filesystem_adapter import FilesystemAdapter
+from services.cloud.transfer_engine import ChunkedTransferEngine, FileSource, TransferInterrupted
+from services.cloud.streaming_upload import StreamingUploader
+
+class JobCollection:
+    def __init__(self, doc):
+        self.doc = doc
+    def find_one(self, query, projection=None):
+        return self.doc
+    def update_one(self, query, update):
+        for key, value in update.get("$set", {}).items():
+            target = self.doc
+            *path, last = key.split(".")
+            for part in path:
+                target = target.setdefault(part, {})
+            target[last] = value
+        for key, value in update.get("$inc", {}).items():
+            self.doc[key] = self.doc.get(key, 0) + value
+        for key in update.get("$unset", {}):
+            self.doc.pop(key, None)
+        return type('obj', (object,), {'matched_count': 1})
+
+def test_transfer_resumes_from_committed_parts(tmp_path):
+    payload = os.urandom(5 * 1024 + 17)
+    source_path = tmp_path / "source.bin"
+    source_path.write_bytes(payload)
+    adapter = FilesystemAdapter(str(tmp_path / "store"))
+    jobs = JobCollection({"job_id": "job1"})
+    engine = ChunkedTransferEngine(jobs, part_size=1024, max_concurrency=2)
+    with pytest.raises(TransferInterrupted):
+        engine.transfer({"job_id": "job1"}, FileSource(str(source_path)), adapter, "dest/file.bin", should_continue=lambda: False)
+    committed = set(jobs.doc["transfer"]["parts"])
+    assert 0 < len(committed) < 6
+    uploaded = []
+    upload_part = adapter.upload_part
+    adapter.upload_part = lambda *args: uploaded.append(args[2]) or upload_part(*args)
+    url = engine.transfer({"job_id": "job1"}, FileSource(str(source_path)), adapter, "dest/file.bin")
+    assert not committed & {str(n) for n in uploaded}
+    assert (tmp_path / "store" / "dest" / "file.bin").read_bytes() == payload
+    assert url.endswith("dest/file.bin")
+    assert jobs.doc["bytes_transferred"] == len(payload)
+    assert "transfer" not in jobs.doc
+
+class ChunkedStream:
+    def __init__(self, payload, read_size):
+        self.payload = payload
+        self.read_size = read_size
+        self.position = 0
+    async def read(self, size=-1):
+        size = min(size, self.read_size)
+        chunk = self.payload[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+@pytest.mark.parametrize("length", [0, 1024, 5 * 1024 + 17])
+def test_streaming_upload_hashes_and_assembles_parts(tmp_path, length):
+    payload = os.urandom(length)
+    adapter = FilesystemAdapter(str(tmp_path / "store"))
+    result = asyncio.run(StreamingUploader(adapter, part_size=1024, max_in_flight=2).upload(ChunkedStream(payload, 300), "up/file.bin"))
+    assert result["sha256"] == hashlib.sha256(payload).hexdigest()
+    assert result["size_bytes"] == length
+    assert result["parts"] == max(1, -(-length // 1024))
+    assert (tmp_path / "store" / "up" / "file.bin").read_bytes() == payload
+
+def test_adapter_io_runs_off_the_event_loop(tmp_path):
+    adapter = FilesystemAdapter(str(tmp_path / "store"))
+    source_path = tmp_path / "source.bin"
+    source_path.write_bytes(b"x" * 4096)
+    async def run():
+        threads = await asyncio.gather(*(adapter.run_io(lambda: threading.current_thread().name) for _ in range(4)))
+        urls = await asyncio.gather(*(adapter.upload(str(source_path), f"many/{i}.bin") for i in range(16)))
+        listed = await adapter.list_objects("many/")
+        await asyncio.gather(*(adapter.delete(url) for url in urls))
+        return threads, listed
+    threads, listed = asyncio.run(run())
+    assert all(name.startswith("cloud-io") for name in threads)
+    assert len(listed) == 16
+    assert not list((tmp_path / "store" / "many").iterdir())